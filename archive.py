@@ -0,0 +1,406 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional as optional
+
+
+def data_dir() -> str:
+    """
+    Returns the directory used for Keep's persistent data, creating it if needed.
+
+    Uses $KEEP_DATA_DIR if set, otherwise $XDG_DATA_HOME/keep or ~/.local/share/keep.
+
+    Returns:
+        str: The data directory path.
+    """
+    path = os.environ.get("KEEP_DATA_DIR") or os.path.join(
+        os.environ.get("XDG_DATA_HOME") or str(Path.home() / ".local" / "share"),
+        "keep",
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Computes the SHA-256 digest of a file.
+
+    Args:
+        path (str): The file path.
+        chunk_size (int, optional): Bytes read per iteration. Defaults to 1 MiB.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class downloads:
+    """
+    Persistent index of kept videos.
+
+    Every finished download is recorded with its extractor, video ID, output path and format,
+    so later runs can skip it with a single primary key lookup instead of extracting and
+    downloading it again. Hashing a large file costs a full read, so the file hash is only
+    computed when a record is first verified.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Opens (and creates if needed) the download archive.
+
+        Args:
+            path (str, optional): Path to the SQLite database. Defaults to 'archive.sqlite' in data_dir().
+        """
+        self.path = path or os.path.join(data_dir(), "archive.sqlite")
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS downloads (
+                extractor TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                format TEXT,
+                sha256 TEXT,
+                downloaded REAL NOT NULL,
+                PRIMARY KEY (extractor, video_id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._db.commit()
+        # the workers of batch() and the daemon write through one connection
+        self._lock = threading.Lock()
+
+    def get(self, extractor: str, video_id: str) -> optional[dict]:
+        """
+        Returns the archive record of a video if it was kept and its file still exists.
+
+        Args:
+            extractor (str): The extractor name (e.g., "youtube").
+            video_id (str): The video ID.
+
+        Returns:
+            dict: The archive record, or None if the video has to be downloaded.
+        """
+        row = self._db.execute(
+            "SELECT * FROM downloads WHERE extractor = ? AND video_id = ?",
+            (extractor, video_id),
+        ).fetchone()
+        if row is None or not os.path.exists(row["path"]):
+            return None
+        return dict(row)
+
+    def add(
+        self,
+        extractor: str,
+        video_id: str,
+        path: str,
+        format: str = None,
+        sha256: str = None,
+    ) -> None:
+        """
+        Records a kept video, replacing any previous record.
+
+        Args:
+            extractor (str): The extractor name (e.g., "youtube").
+            video_id (str): The video ID.
+            path (str): The final output file path.
+            format (str, optional): The downloaded format. Defaults to None.
+            sha256 (str, optional): The file hash. Defaults to None, so it is computed by the first verify().
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?)",
+                (extractor, video_id, path, format, sha256, time.time()),
+            )
+
+    def verify(self, extractor: str, video_id: str) -> bool:
+        """
+        Checks that the kept file of a video still has the recorded hash.
+
+        A record without a hash is hashed now and the hash stored, so later checks compare
+        against the file as it was first verified.
+
+        Args:
+            extractor (str): The extractor name (e.g., "youtube").
+            video_id (str): The video ID.
+
+        Returns:
+            bool: True if the file exists and matches its hash.
+        """
+        record = self.get(extractor, video_id)
+        if record is None or not os.path.isfile(record["path"]):
+            return False
+        sha256 = file_hash(record["path"])
+        if record["sha256"] is None:
+            with self._lock, self._db:
+                self._db.execute(
+                    "UPDATE downloads SET sha256 = ? WHERE extractor = ? AND video_id = ?",
+                    (sha256, extractor, video_id),
+                )
+            return True
+        return sha256 == record["sha256"]
+
+    def delete(self, extractor: str, video_id: str) -> None:
+        """
+        Removes a video from the archive.
+
+        Args:
+            extractor (str): The extractor name (e.g., "youtube").
+            video_id (str): The video ID.
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM downloads WHERE extractor = ? AND video_id = ?",
+                (extractor, video_id),
+            )
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        self._db.close()
+
+
+class marks:
+    """
+    Persistent high-water marks of synced playlists and channels.
+
+    Every mark holds the newest video ID and upload date seen in a listing, so the next sync
+    enumerates the listing only down to that video instead of walking all of it again.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Opens (and creates if needed) the sync marks, stored next to the download archive.
+
+        Args:
+            path (str, optional): Path to the SQLite database. Defaults to 'archive.sqlite' in data_dir().
+        """
+        self.path = path or os.path.join(data_dir(), "archive.sqlite")
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS marks (
+                source TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                upload_date TEXT,
+                synced REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._db.commit()
+
+    def get(self, source: str) -> optional[dict]:
+        """
+        Returns the mark of a playlist or channel.
+
+        Args:
+            source (str): The playlist or channel URL.
+
+        Returns:
+            dict: The mark with video_id, upload_date and synced, or None if it was never synced.
+        """
+        row = self._db.execute(
+            "SELECT * FROM marks WHERE source = ?", (source,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def put(self, source: str, video_id: str, upload_date: str = None) -> None:
+        """
+        Moves the mark of a playlist or channel to its newest video.
+
+        Args:
+            source (str): The playlist or channel URL.
+            video_id (str): The newest video ID.
+            upload_date (str, optional): Its upload date as YYYYMMDD. Defaults to None.
+        """
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO marks VALUES (?, ?, ?, ?)",
+                (source, video_id, upload_date, time.time()),
+            )
+
+    def delete(self, source: str) -> None:
+        """
+        Removes the mark of a playlist or channel, so the next sync walks it completely.
+
+        Args:
+            source (str): The playlist or channel URL.
+        """
+        with self._db:
+            self._db.execute("DELETE FROM marks WHERE source = ?", (source,))
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        self._db.close()
+
+
+class journal:
+    """
+    Crash-safe journal of download jobs.
+
+    Every job moves through the states queued, extracting, downloading, post-processing and
+    done (or failed, or cancelled), and the journal records the concrete format it chose, its temporary
+    files and the bytes downloaded so far. Every change is committed to a WAL database right
+    away, so after a crash or eviction the next run picks the same format again and yt-dlp
+    continues the .part files and skips streams that were already complete.
+    """
+
+    states = (
+        "queued",
+        "extracting",
+        "downloading",
+        "post-processing",
+        "done",
+        "failed",
+        "cancelled",
+    )
+    _fields = ("url", "state", "format", "selector", "temp", "downloaded", "total", "error")
+
+    def __init__(self, path: str = None):
+        """
+        Opens (and creates if needed) the job journal.
+
+        Args:
+            path (str, optional): Path to the SQLite database. Defaults to 'journal.sqlite' in data_dir().
+        """
+        self.path = path or os.path.join(data_dir(), "journal.sqlite")
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # every state change is its own transaction; WAL keeps them durable without a full fsync each
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                extractor TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                url TEXT,
+                state TEXT NOT NULL,
+                format TEXT,
+                selector TEXT,
+                temp TEXT,
+                downloaded INTEGER,
+                total INTEGER,
+                error TEXT,
+                updated REAL NOT NULL,
+                PRIMARY KEY (extractor, video_id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._db.commit()
+        # progress hooks of parallel streams write from several threads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> dict:
+        """
+        Converts a row to a record with the temporary file paths decoded.
+
+        Args:
+            row (sqlite3.Row): The jobs row.
+
+        Returns:
+            dict: The journal record.
+        """
+        record = dict(row)
+        record["temp"] = json.loads(record["temp"]) if record["temp"] else []
+        return record
+
+    def get(self, extractor: str, video_id: str) -> optional[dict]:
+        """
+        Returns the journal record of a job.
+
+        Args:
+            extractor (str): The extractor name (e.g., "youtube").
+            video_id (str): The video ID.
+
+        Returns:
+            dict: The record with url, state, format, selector, temp (a list of paths), downloaded, total, error and updated, or None if the video was never queued.
+        """
+        row = self._db.execute(
+            "SELECT * FROM jobs WHERE extractor = ? AND video_id = ?",
+            (extractor, video_id),
+        ).fetchone()
+        return self._record(row) if row else None
+
+    def update(self, extractor: str, video_id: str, state: str, **fields) -> None:
+        """
+        Records the state of a job, creating its record if needed. Fields that are not given keep their value.
+
+        Args:
+            extractor (str): The extractor name (e.g., "youtube").
+            video_id (str): The video ID.
+            state (str): One of journal.states.
+            **fields: Any of url, format, selector, temp, downloaded, total and error.
+
+        Raises:
+            ValueError: If the state or a field is unknown.
+        """
+        if state not in self.states:
+            raise ValueError(f"unknown job state: {state}")
+        unknown = set(fields) - set(self._fields)
+        if unknown:
+            raise ValueError(f"unknown journal fields: {', '.join(sorted(unknown))}")
+        if "temp" in fields:
+            fields["temp"] = json.dumps(fields["temp"] or [])
+        fields = {"state": state, **fields, "updated": time.time()}
+        columns = ", ".join(fields)
+        with self._lock, self._db:
+            self._db.execute(
+                f"""
+                INSERT INTO jobs (extractor, video_id, {columns})
+                VALUES (?, ?, {", ".join("?" * len(fields))})
+                ON CONFLICT (extractor, video_id) DO UPDATE SET
+                {", ".join(f"{column} = excluded.{column}" for column in fields)}
+                """,
+                (extractor, video_id, *fields.values()),
+            )
+
+    def unfinished(self) -> list[dict]:
+        """
+        Returns the jobs that were interrupted before they were done, failed or cancelled, oldest first.
+
+        Returns:
+            list[dict]: The journal records.
+        """
+        rows = self._db.execute(
+            "SELECT * FROM jobs WHERE state NOT IN ('done', 'failed', 'cancelled') "
+            "ORDER BY updated"
+        ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def delete(self, extractor: str, video_id: str) -> None:
+        """
+        Removes a job from the journal.
+
+        Args:
+            extractor (str): The extractor name (e.g., "youtube").
+            video_id (str): The video ID.
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM jobs WHERE extractor = ? AND video_id = ?",
+                (extractor, video_id),
+            )
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        self._db.close()
@@ -0,0 +1,881 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import statistics
+from shutil import which
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline benchmarks of Keep: a local HTTP server serves synthetic media, thumbnails and
+# subtitles, and a stub yt-dlp extractor resolves YouTube watch URLs to it, so startup,
+# extraction, download and post-processing can be measured reproducibly without the network.
+
+root = os.path.dirname(os.path.abspath(__file__))
+scenarios = ("startup", "router", "amplification", "extraction", "single", "batch")
+# scenarios run in a fresh interpreter against the benchmark server, see run()
+served = ("extraction", "single", "batch")
+# metrics where a higher value is better; every other numeric metric is a cost
+higher_is_better = ("bytes_per_second", "jobs_per_second", "urls_per_second")
+
+
+def media(path: str, seconds: float = 10, height: int = 720) -> dict:
+    """
+    Generates the synthetic media served by the benchmark server.
+
+    Args:
+        path (str): Directory the files are written to.
+        seconds (float, optional): Duration of the video and audio streams. Defaults to 10.
+        height (int, optional): Height of the video stream (16:9). Defaults to 720.
+
+    Returns:
+        dict: The contents of 'video.mp4', 'audio.m4a', 'thumbnail.jpg' and 'subtitles.en.srt' by file name.
+
+    Raises:
+        FileNotFoundError: If ffmpeg is not installed.
+        subprocess.CalledProcessError: If ffmpeg fails.
+    """
+    ffmpeg = which("ffmpeg")
+    if ffmpeg is None:
+        raise FileNotFoundError("ffmpeg is required to generate the benchmark media")
+    size = f"{height * 16 // 9 // 2 * 2}x{height}"
+    commands = {
+        "video.mp4": [
+            "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30", "-t", str(seconds),
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "30", "-pix_fmt", "yuv420p",
+        ],
+        "audio.m4a": [
+            "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100", "-t", str(seconds),
+            "-c:a", "aac", "-b:a", "128k",
+        ],
+        "thumbnail.jpg": ["-f", "lavfi", "-i", f"testsrc2=size={size}", "-frames:v", "1"],
+    }
+    files = {}
+    for name, options in commands.items():
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", *options, os.path.join(path, name)],
+            check=True,
+            timeout=300,
+        )
+        with open(os.path.join(path, name), "rb") as f:
+            files[name] = f.read()
+    cues = []
+    for n in range(int(seconds // 2)):
+        cues.append(
+            f"{n + 1}\n00:00:{n * 2:02},000 --> 00:00:{n * 2 + 2:02},000\nCue {n + 1}\n"
+        )
+    files["subtitles.en.srt"] = "\n".join(cues).encode("utf-8")
+    return files
+
+
+class server:
+    """
+    Local HTTP server of synthetic media and the video information the stub extractor reads.
+
+    /api/<video_id> returns the video information of any video ID, /media/<name> serves a file
+    with range requests, and /fragments/<name>/<n> serves the nth of `fragments` equal parts of
+    a file, so the video stream is downloaded like a DASH stream and the audio stream like a
+    progressive one. Every video ID gets the same media.
+    """
+
+    def __init__(
+        self,
+        files: dict,
+        seconds: float = 10,
+        height: int = 720,
+        fragments: int = 10,
+        delay: float = 0.0,
+    ):
+        """
+        Args:
+            files (dict): The media by file name, see media().
+            seconds (float, optional): Duration reported in the video information. Defaults to 10.
+            height (int, optional): Height reported in the video information. Defaults to 720.
+            fragments (int, optional): Number of fragments of the video stream. Defaults to 10.
+            delay (float, optional): Seconds every /api request waits, to simulate a remote extraction. Defaults to 0.
+        """
+        self.files = files
+        self.seconds = seconds
+        self.height = height
+        self.fragments = fragments
+        self.delay = delay
+        self._httpd = None
+
+    @property
+    def url(self) -> str:
+        """
+        Returns:
+            str: The base URL of the running server.
+        """
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def payload(self) -> int:
+        """
+        Returns:
+            int: The bytes of the video and audio streams downloaded per video.
+        """
+        return len(self.files["video.mp4"]) + len(self.files["audio.m4a"])
+
+    def info(self, video_id: str) -> dict:
+        """
+        Returns the video information of a video.
+
+        Args:
+            video_id (str): The video ID.
+
+        Returns:
+            dict: The information in yt-dlp's format, pointing at this server.
+        """
+        base, video, audio = self.url, self.files["video.mp4"], self.files["audio.m4a"]
+        return {
+            "id": video_id,
+            "title": f"Keep benchmark {video_id}",
+            "description": "Synthetic media for Keep's offline benchmarks.",
+            "uploader": "Keep",
+            "upload_date": "20240101",
+            "duration": self.seconds,
+            "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+            "chapters": [
+                {"start_time": 0, "end_time": self.seconds / 2, "title": "First half"},
+                {"start_time": self.seconds / 2, "end_time": self.seconds, "title": "Second half"},
+            ],
+            "thumbnails": [{"id": "0", "url": f"{base}/media/thumbnail.jpg"}],
+            "subtitles": {"en": [{"ext": "srt", "url": f"{base}/media/subtitles.en.srt"}]},
+            "automatic_captions": {},
+            "formats": [
+                {
+                    "format_id": "140",
+                    "url": f"{base}/media/audio.m4a",
+                    "protocol": "http",
+                    "ext": "m4a",
+                    "vcodec": "none",
+                    "acodec": "mp4a.40.2",
+                    "abr": 128,
+                    "tbr": 128,
+                    "filesize": len(audio),
+                },
+                {
+                    "format_id": "137",
+                    "url": f"{base}/media/video.mp4",
+                    "fragment_base_url": f"{base}/fragments/video.mp4/",
+                    "fragments": [{"path": str(n)} for n in range(self.fragments)],
+                    "protocol": "http_dash_segments",
+                    "ext": "mp4",
+                    "vcodec": "avc1.64001f",
+                    "acodec": "none",
+                    "height": self.height,
+                    "fps": 30,
+                    "tbr": len(video) * 8 / 1000 / self.seconds,
+                    "filesize": len(video),
+                },
+            ],
+        }
+
+    def _handler(self):
+        """
+        Builds the request handler class bound to this server.
+
+        Returns:
+            type: The BaseHTTPRequestHandler subclass.
+        """
+        service = self
+
+        class handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, data: bytes, content_type: str) -> None:
+                status, start, end = 200, 0, len(data) - 1
+                ranges = self.headers.get("Range", "")
+                if ranges.startswith("bytes="):
+                    first, _, last = ranges[6:].split(",")[0].partition("-")
+                    start = int(first or 0)
+                    end = min(int(last), end) if last else end
+                    if start > end:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(data)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    status = 206
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(data[start : end + 1])
+
+            def do_GET(self) -> None:
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if len(parts) == 2 and parts[0] == "api":
+                    time.sleep(service.delay)
+                    data = json.dumps(service.info(parts[1])).encode("utf-8")
+                    return self._send(data, "application/json")
+                if len(parts) == 2 and parts[0] == "media" and parts[1] in service.files:
+                    return self._send(service.files[parts[1]], "application/octet-stream")
+                if len(parts) == 3 and parts[0] == "fragments" and parts[1] in service.files:
+                    data, n = service.files[parts[1]], int(parts[2])
+                    step = -(-len(data) // service.fragments)
+                    return self._send(data[n * step : (n + 1) * step], "video/mp4")
+                self.send_error(404)
+
+            do_HEAD = do_GET
+
+        return handler
+
+    def __enter__(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def extractor(url: str):
+    """
+    Builds a stub yt-dlp extractor that resolves YouTube watch URLs to a benchmark server.
+
+    Args:
+        url (str): The base URL of the server.
+
+    Returns:
+        type: The InfoExtractor subclass.
+    """
+    from yt_dlp.extractor.common import InfoExtractor
+
+    class KeepBenchmarkIE(InfoExtractor):
+        IE_NAME = "keep:benchmark"
+        _VALID_URL = r"https?://(?:www\.)?youtube\.com/watch\?v=(?P<id>[\w-]{11})"
+
+        def _real_extract(self, link):
+            video_id = self._match_id(link)
+            return self._download_json(f"{url}/api/{video_id}", video_id)
+
+    return KeepBenchmarkIE
+
+
+@contextmanager
+def offline(url: str):
+    """
+    Makes every YoutubeDL instance created inside the context extract YouTube URLs from a benchmark server.
+
+    Args:
+        url (str): The base URL of the server.
+    """
+    import yt_dlp
+
+    stub = extractor(url)
+    original = yt_dlp.YoutubeDL.add_default_info_extractors
+
+    def add_default_info_extractors(self):
+        # tried before every real extractor, so it wins for the URLs it accepts
+        self.add_info_extractor(stub())
+        original(self)
+
+    yt_dlp.YoutubeDL.add_default_info_extractors = add_default_info_extractors
+    try:
+        yield stub
+    finally:
+        yt_dlp.YoutubeDL.add_default_info_extractors = original
+
+
+def watch(n: int) -> str:
+    """
+    Returns the watch URL of the nth benchmark video. Every job uses a new video ID, so no cache or deduplication serves it.
+
+    Args:
+        n (int): The video number.
+
+    Returns:
+        str: The URL.
+    """
+    return f"https://www.youtube.com/watch?v=keep{n:07d}"
+
+
+def cookies(work: str) -> str:
+    """
+    Writes an empty cookie file, which the downloader requires.
+
+    Args:
+        work (str): The working directory.
+
+    Returns:
+        str: The cookie file path.
+    """
+    path = os.path.join(work, "cookies.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Netscape HTTP Cookie File\n")
+    return path
+
+
+def rss() -> dict:
+    """
+    Returns the peak resident set size of this process.
+
+    Child processes such as ffmpeg are left out: they inherit the peak of the process that
+    forked them, so their figure says nothing about themselves.
+
+    Returns:
+        dict: 'peak_rss_kib', or an empty dict where the resource module is missing.
+    """
+    try:
+        import resource
+    except ImportError:
+        return {}
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    scale = 1024 if sys.platform == "darwin" else 1
+    return {"peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale}
+
+
+@contextmanager
+def postprocessing(totals: list):
+    """
+    Adds the duration of every single-pass post-processing run inside the context to a list.
+
+    Args:
+        totals (list): The list the durations in seconds are appended to.
+    """
+    from postprocess import FFmpegSinglePassPP
+
+    original = FFmpegSinglePassPP.run
+
+    def run(self, info):
+        started = time.perf_counter()
+        try:
+            return original(self, info)
+        finally:
+            totals.append(time.perf_counter() - started)
+
+    FFmpegSinglePassPP.run = run
+    try:
+        yield totals
+    finally:
+        FFmpegSinglePassPP.run = original
+
+
+def startup(runs: int = 5) -> dict:
+    """
+    Measures the startup time of the CLI in fresh interpreters.
+
+    Args:
+        runs (int, optional): Runs per command; the median is reported. Defaults to 5.
+
+    Returns:
+        dict: 'import_ms' (import main) and 'help_ms' (main.py --help).
+    """
+    result = {}
+    for metric, args in (("import_ms", ["-c", "import main"]), ("help_ms", ["main.py", "--help"])):
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run(
+                [sys.executable, *args],
+                cwd=root,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )
+            times.append((time.perf_counter() - started) * 1000)
+        result[metric] = statistics.median(times)
+    return result
+
+
+def router(count: int = 200000) -> dict:
+    """
+    Measures the bulk URL API, which canonicalizes and de-duplicates the lines of a batch.
+
+    Args:
+        count (int, optional): URLs routed, in four forms of half as many videos. Defaults to 200000.
+
+    Returns:
+        dict: 'urls_per_second'.
+    """
+    import utils
+
+    forms = (
+        "https://www.youtube.com/watch?v={}&t=1s\n",
+        "https://youtu.be/{}\n",
+        "https://m.youtube.com/shorts/{}\n",
+        "https://music.youtube.com/watch?v={}\n",
+    )
+    lines = [forms[i % 4].format(f"{i // 2:011d}") for i in range(count)]
+    started = time.perf_counter()
+    for _ in utils.router.bulk(lines):
+        pass
+    return {"urls_per_second": count / (time.perf_counter() - started)}
+
+
+def amplification(work: str, files: dict) -> dict:
+    """
+    Measures the bytes ffmpeg writes per byte of the final file.
+
+    yt-dlp's merger is followed by separate metadata and subtitle rewrites of the merged file,
+    while the single-pass post-processor writes it once.
+
+    Args:
+        work (str): The working directory.
+        files (dict): The synthetic media, see media().
+
+    Returns:
+        dict: 'merger_written_per_byte' and 'single_pass_written_per_byte'.
+    """
+    import yt_dlp
+    from yt_dlp.postprocessor import (
+        FFmpegEmbedSubtitlePP,
+        FFmpegMergerPP,
+        FFmpegMetadataPP,
+        FFmpegPostProcessor,
+    )
+    from postprocess import FFmpegSinglePassPP
+
+    written = [0]
+    original = FFmpegPostProcessor.real_run_ffmpeg
+
+    def run_ffmpeg(self, input_path_opts, output_path_opts, **kwargs):
+        result = original(self, input_path_opts, output_path_opts, **kwargs)
+        written[0] += sum(os.path.getsize(path) for path, _ in output_path_opts)
+        return result
+
+    result = {}
+    FFmpegPostProcessor.real_run_ffmpeg = run_ffmpeg
+    try:
+        with yt_dlp.YoutubeDL({"quiet": True, "noprogress": True}) as ydl:
+            for name, postprocessors in (
+                (
+                    "merger",
+                    [
+                        FFmpegMergerPP(ydl),
+                        FFmpegMetadataPP(ydl, add_infojson=False),
+                        FFmpegEmbedSubtitlePP(ydl),
+                    ],
+                ),
+                ("single_pass", [FFmpegSinglePassPP(ydl, embed_thumbnail=False)]),
+            ):
+                directory = os.path.join(work, "amplification", name)
+                os.makedirs(directory, exist_ok=True)
+                for file, data in files.items():
+                    with open(os.path.join(directory, file), "wb") as f:
+                        f.write(data)
+                video, audio, subtitles = (
+                    os.path.join(directory, file)
+                    for file in ("video.mp4", "audio.m4a", "subtitles.en.srt")
+                )
+                info = {
+                    "id": "keep0000000",
+                    "title": "Keep benchmark",
+                    "ext": "mkv",
+                    "filepath": os.path.join(directory, "video.mkv"),
+                    "requested_formats": [
+                        {"format_id": "137", "ext": "mp4", "vcodec": "avc1.64001f", "acodec": "none", "protocol": "https"},
+                        {"format_id": "140", "ext": "m4a", "vcodec": "none", "acodec": "mp4a.40.2", "protocol": "https"},
+                    ],
+                    "requested_subtitles": {
+                        "en": {"ext": "srt", "filepath": subtitles}
+                    },
+                    "__files_to_merge": [video, audio],
+                    "__files_to_mux": [video, audio],
+                }
+                written[0] = 0
+                for postprocessor in postprocessors:
+                    _, info = postprocessor.run(info)
+                result[f"{name}_written_per_byte"] = written[0] / os.path.getsize(
+                    info["filepath"]
+                )
+    finally:
+        FFmpegPostProcessor.real_run_ffmpeg = original
+    return result
+
+
+def extraction(url: str, work: str, runs: int = 5, **options) -> dict:
+    """
+    Measures the latency of creating a downloader, which extracts the video information.
+
+    Args:
+        url (str): The base URL of the server.
+        work (str): The working directory.
+        runs (int, optional): Extractions; the first one is reported separately as it imports yt-dlp. Defaults to 5.
+
+    Returns:
+        dict: 'import_ms', 'first_ms' and the median of the others in 'median_ms'.
+    """
+    started = time.perf_counter()
+    import youtube
+
+    imported = (time.perf_counter() - started) * 1000
+    times = []
+    with offline(url):
+        for n in range(max(2, runs)):
+            started = time.perf_counter()
+            youtube.downloader(
+                url=watch(n),
+                cookie=cookies(work),
+                interactive=False,
+                bypass=True,
+                cache=False,
+                archive=False,
+                journal=False,
+            )
+            times.append((time.perf_counter() - started) * 1000)
+    return {
+        "import_ms": imported,
+        "first_ms": times[0],
+        "median_ms": statistics.median(times[1:]),
+    }
+
+
+def single(url: str, work: str, payload: int, **options) -> dict:
+    """
+    Measures one interactive-free download with subtitles, thumbnail, chapters and the single-pass merge.
+
+    Args:
+        url (str): The base URL of the server.
+        work (str): The working directory the video is saved to.
+        payload (int): The bytes of the video and audio streams.
+
+    Returns:
+        dict: 'seconds', 'bytes_per_second' and 'postprocess_seconds'.
+    """
+    import youtube
+
+    totals = []
+    with offline(url), postprocessing(totals):
+        dd = youtube.downloader(
+            url=watch(0),
+            cookie=cookies(work),
+            interactive=False,
+            subtitle=["en"],
+            output=work,
+            cache=False,
+            archive=False,
+            journal=False,
+        )
+        started = time.perf_counter()
+        dd.download()
+        elapsed = time.perf_counter() - started
+    return {
+        "seconds": elapsed,
+        "bytes_per_second": payload / elapsed,
+        "postprocess_seconds": sum(totals),
+    }
+
+
+def batch(url: str, work: str, payload: int, jobs: int = 8, workers: int = 4, **options) -> dict:
+    """
+    Measures a batch of downloads on the worker pool with the background post-processing pipeline.
+
+    Args:
+        url (str): The base URL of the server.
+        work (str): The working directory the videos are saved to.
+        payload (int): The bytes of the video and audio streams of one video.
+        jobs (int, optional): Number of videos. Defaults to 8.
+        workers (int, optional): Number of concurrent downloads. Defaults to 4.
+
+    Returns:
+        dict: 'seconds', 'jobs_per_second', 'bytes_per_second' and the summed 'postprocess_seconds'.
+
+    Raises:
+        RuntimeError: If a job failed.
+    """
+    import youtube
+
+    totals = []
+    with offline(url), postprocessing(totals):
+        started = time.perf_counter()
+        results = youtube.batch(
+            [watch(n) for n in range(jobs)],
+            cookie=cookies(work),
+            subtitle=["en"],
+            output=work,
+            workers=workers,
+            archive=False,
+            progress="none",
+            cache=False,
+            journal=False,
+        )
+        elapsed = time.perf_counter() - started
+    failed = [result for result in results if result["status"] != "done"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {jobs} jobs failed: {failed[0]['error']}")
+    return {
+        "seconds": elapsed,
+        "jobs_per_second": jobs / elapsed,
+        "bytes_per_second": jobs * payload / elapsed,
+        "postprocess_seconds": sum(totals),
+    }
+
+
+def run(name: str, url: str, work: str, payload: int, jobs: int, workers: int, runs: int) -> dict:
+    """
+    Runs one scenario in a fresh interpreter, so its startup costs and peak memory are its own.
+
+    Args:
+        name (str): "extraction", "single" or "batch".
+        url (str): The base URL of the server.
+        work (str): The working directory, with Keep's data and cache directories inside.
+        payload (int): The bytes of the video and audio streams of one video.
+        jobs (int): Number of videos of the batch scenario.
+        workers (int): Number of concurrent downloads of the batch scenario.
+        runs (int): Extractions of the extraction scenario.
+
+    Returns:
+        dict: The scenario's metrics, including its peak RSS.
+
+    Raises:
+        RuntimeError: If the scenario failed.
+    """
+    directory = os.path.join(work, name)
+    os.makedirs(directory, exist_ok=True)
+    result = os.path.join(directory, "result.json")
+    env = {
+        **os.environ,
+        "KEEP_DATA_DIR": os.path.join(directory, "data"),
+        "KEEP_CACHE_DIR": os.path.join(directory, "cache"),
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+    }
+    process = subprocess.run(
+        [
+            sys.executable, __file__, "--run", name, "--url", url, "--work", directory,
+            "--payload", str(payload), "--jobs", str(jobs), "--workers", str(workers),
+            "--runs", str(runs), "--result", result,
+        ],
+        cwd=root,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{process.stdout.strip()[-2000:]}")
+    with open(result, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def suite(
+    selected: list[str] = None,
+    jobs: int = 8,
+    workers: int = 4,
+    runs: int = 5,
+    seconds: float = 10,
+    height: int = 720,
+    delay: float = 0.0,
+) -> dict:
+    """
+    Runs the benchmark scenarios against a fresh benchmark server.
+
+    Args:
+        selected (list[str], optional): The scenarios to run. Defaults to all of them.
+        jobs (int, optional): Number of videos of the batch scenario. Defaults to 8.
+        workers (int, optional): Number of concurrent downloads of the batch scenario. Defaults to 4.
+        runs (int, optional): Repetitions of the startup and extraction measurements. Defaults to 5.
+        seconds (float, optional): Duration of the synthetic video. Defaults to 10.
+        height (int, optional): Height of the synthetic video. Defaults to 720.
+        delay (float, optional): Seconds every extraction request waits on the server. Defaults to 0.
+
+    Returns:
+        dict: The environment, parameters and the metrics of every scenario in 'results'.
+    """
+    from yt_dlp.version import __version__ as yt_dlp_version
+
+    selected = selected or list(scenarios)
+    revision = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    report = {
+        "keep": revision or None,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "yt_dlp": yt_dlp_version,
+        "platform": platform.platform(),
+        "parameters": {
+            "jobs": jobs,
+            "workers": workers,
+            "runs": runs,
+            "seconds": seconds,
+            "height": height,
+            "delay": delay,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="keep-benchmark-") as work:
+        if "startup" in selected:
+            report["results"]["startup"] = startup(runs)
+        if "router" in selected:
+            report["results"]["router"] = router()
+        if set(selected) - {"startup", "router"}:
+            files = media(work, seconds, height)
+        if "amplification" in selected:
+            report["results"]["amplification"] = amplification(work, files)
+        if set(selected) & set(served):
+            with server(files, seconds=seconds, height=height, delay=delay) as service:
+                report["parameters"]["payload"] = service.payload
+                for name in selected:
+                    if name in served:
+                        report["results"][name] = run(
+                            name, service.url, work, service.payload, jobs, workers, runs
+                        )
+    return report
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.1) -> list[dict]:
+    """
+    Compares the metrics of two benchmark reports.
+
+    Args:
+        baseline (dict): The earlier report.
+        current (dict): The new report.
+        tolerance (float, optional): Relative change a metric may worsen by before it counts as a regression. Defaults to 0.1.
+
+    Returns:
+        list[dict]: The scenario, metric, baseline and current value, relative change and whether it regressed, for every metric both reports have.
+    """
+    rows = []
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            before = baseline.get("results", {}).get(name, {}).get(metric)
+            if not isinstance(value, (int, float)) or not before:
+                continue
+            change = (value - before) / before
+            worse = -change if metric.endswith(higher_is_better) else change
+            rows.append(
+                {
+                    "scenario": name,
+                    "metric": metric,
+                    "baseline": before,
+                    "current": value,
+                    "change": change,
+                    "regressed": worse > tolerance,
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks of Keep against a local media server."
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=scenarios,
+        help="Scenario to run; repeat for more (default: all)",
+    )
+    parser.add_argument("--output", "-o", type=str, metavar="file", help="Write the results as JSON to a file")
+    parser.add_argument("--compare", type=str, metavar="file", help="Compare the results with an earlier results file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        metavar="ratio",
+        help="Relative change a metric may worsen by before --compare fails (default: 0.1)",
+    )
+    parser.add_argument("--jobs", type=int, default=8, metavar="count", help="Videos of the batch scenario (default: 8)")
+    parser.add_argument("--workers", type=int, default=4, metavar="count", help="Concurrent downloads of the batch scenario (default: 4)")
+    parser.add_argument("--runs", type=int, default=5, metavar="count", help="Repetitions of the startup and extraction measurements (default: 5)")
+    parser.add_argument("--seconds", type=float, default=10, metavar="seconds", help="Duration of the synthetic video (default: 10)")
+    parser.add_argument("--height", type=int, default=720, metavar="pixels", help="Height of the synthetic video (default: 720)")
+    parser.add_argument("--delay", type=float, default=0.0, metavar="seconds", help="Latency added to every extraction request (default: 0)")
+    # a single scenario in a child process, see run()
+    parser.add_argument("--run", choices=served, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--work", help=argparse.SUPPRESS)
+    parser.add_argument("--payload", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        sys.path.insert(0, root)
+        measure = {"extraction": extraction, "single": single, "batch": batch}[args.run]
+        result = measure(
+            url=args.url,
+            work=args.work,
+            payload=args.payload,
+            jobs=args.jobs,
+            workers=args.workers,
+            runs=args.runs,
+        )
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump({**result, **rss()}, f)
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console(stderr=True)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    try:
+        with console.status("[cyan]Running benchmarks...[/cyan]"):
+            report = suite(
+                args.scenario,
+                jobs=args.jobs,
+                workers=args.workers,
+                runs=args.runs,
+                seconds=args.seconds,
+                height=args.height,
+                delay=args.delay,
+            )
+    except (OSError, RuntimeError, subprocess.CalledProcessError) as e:
+        console.print(f"\n[bold red]❌ {e}[/bold red]\n")
+        sys.exit(1)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        sys.stdout.write(json.dumps(report, indent=2) + "\n")
+
+    table = Table(title="Keep benchmarks")
+    table.add_column("Scenario", style="cyan")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    if baseline:
+        table.add_column("Baseline", justify="right")
+        table.add_column("Change", justify="right")
+    rows = {
+        (row["scenario"], row["metric"]): row
+        for row in (compare(baseline, report, args.tolerance) if baseline else [])
+    }
+    for name, metrics in report["results"].items():
+        for metric, value in metrics.items():
+            cells = [name, metric, f"{value:,.2f}"]
+            row = rows.get((name, metric))
+            if baseline:
+                cells += (
+                    [
+                        f"{row['baseline']:,.2f}",
+                        f"[{'red' if row['regressed'] else 'green'}]{row['change']:+.1%}[/]",
+                    ]
+                    if row
+                    else ["-", "-"]
+                )
+            table.add_row(*cells)
+    console.print(table)
+    if any(row["regressed"] for row in rows.values()):
+        console.print(
+            f"\n[bold red]❌ Metrics regressed by more than {args.tolerance:.0%}![/bold red]\n"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
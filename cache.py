@@ -0,0 +1,430 @@
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import warnings
+import threading
+from pathlib import Path
+from typing import Optional as optional
+
+# signed format URLs carry their expiry as a unix timestamp, either as a query
+# parameter (?expire=...) or as a path segment in manifest URLs (/expire/...)
+expire_pattern = re.compile(r"[?&/]expire[=/](\d+)")
+
+
+def cache_dir() -> str:
+    """
+    Returns the directory used for Keep's persistent caches, creating it if needed.
+
+    Uses $KEEP_CACHE_DIR if set, otherwise $XDG_CACHE_HOME/keep or ~/.cache/keep.
+
+    Returns:
+        str: The cache directory path.
+    """
+    path = os.environ.get("KEEP_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache"), "keep"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class metadata:
+    """
+    Persistent video information cache keyed by video ID.
+
+    Entries live in a SQLite database as compressed JSON. Each entry expires when the first of its
+    signed format URLs does (minus a safety margin) or after the default TTL, and the least
+    recently used entries are evicted once the cache grows beyond its size limit.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        ttl: int = 6 * 60 * 60,
+        margin: int = 10 * 60,
+        max_bytes: int = 128 * 1024 * 1024,
+    ):
+        """
+        Opens (and creates if needed) the metadata cache.
+
+        Args:
+            path (str, optional): Path to the SQLite database. Defaults to 'metadata.sqlite' in cache_dir().
+            ttl (int, optional): Maximum lifetime of an entry in seconds. Defaults to 6 hours.
+            margin (int, optional): Seconds subtracted from the format URL expiry. Defaults to 10 minutes.
+            max_bytes (int, optional): Size limit of the stored entries in bytes. Defaults to 128 MiB.
+        """
+        self.path = path or os.path.join(cache_dir(), "metadata.sqlite")
+        self.ttl = ttl
+        self.margin = margin
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS info (
+                video_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS info_accessed ON info (accessed)")
+        self._db.commit()
+
+    def expiry(self, info: dict) -> float:
+        """
+        Computes when the video information stops being usable for a download.
+
+        Args:
+            info (dict): The video information.
+
+        Returns:
+            float: The expiry as a unix timestamp.
+        """
+        expires = time.time() + self.ttl
+        for format in info.get("formats") or []:
+            for url in (format.get("url"), format.get("manifest_url")):
+                match = expire_pattern.search(url or "")
+                if match:
+                    expires = min(expires, int(match.group(1)) - self.margin)
+        return expires
+
+    def get(self, video_id: str) -> optional[dict]:
+        """
+        Returns the cached video information if present and not expired.
+
+        Args:
+            video_id (str): The video ID.
+
+        Returns:
+            dict: The video information, or None on a cache miss.
+        """
+        now = time.time()
+        row = self._db.execute(
+            "SELECT data FROM info WHERE video_id = ? AND expires > ?", (video_id, now)
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute(
+            "UPDATE info SET accessed = ? WHERE video_id = ?", (now, video_id)
+        )
+        self._db.commit()
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, video_id: str, info: dict) -> None:
+        """
+        Stores video information, then drops expired entries and evicts least recently used ones over the size limit.
+
+        Args:
+            video_id (str): The video ID.
+            info (dict): The video information to store.
+        """
+        now = time.time()
+        expires = self.expiry(info)
+        if expires <= now:
+            return
+        data = zlib.compress(json.dumps(info, ensure_ascii=False).encode("utf-8"))
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO info VALUES (?, ?, ?, ?, ?)",
+                (video_id, data, len(data), expires, now),
+            )
+            self._db.execute("DELETE FROM info WHERE expires <= ?", (now,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM info").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for key, size in self._db.execute(
+                "SELECT video_id, size FROM info ORDER BY accessed"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM info WHERE video_id = ?", (key,))
+                total -= size
+
+    def delete(self, video_id: str) -> None:
+        """
+        Removes a video from the cache.
+
+        Args:
+            video_id (str): The video ID.
+        """
+        with self._db:
+            self._db.execute("DELETE FROM info WHERE video_id = ?", (video_id,))
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        self._db.close()
+
+
+def components_dir() -> str:
+    """
+    Returns the directory of cached remote components, creating it if needed.
+
+    It is used as yt-dlp's cache directory, so it holds the challenge solver scripts and the
+    parsed signature data next to the player scripts of the players class. Copy it to
+    another machine's cache directory to pre-seed an offline worker.
+
+    Returns:
+        str: The components directory path.
+    """
+    path = os.path.join(cache_dir(), "components")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class players:
+    """
+    Persistent, integrity-checked store of YouTube player scripts.
+
+    yt-dlp keeps downloaded player scripts only in memory (its YouTube extractor's _code_cache),
+    so every new process downloads the current player again before it can solve signature and
+    n challenges. install() replaces that dictionary with an instance of this class: scripts are
+    stored under their player ID and variant, which change with every player release, verified
+    against their SHA-256 when loaded, and only the `keep` most recently stored are kept.
+    """
+
+    # scripts already loaded in this process, shared by every extractor
+    _loaded = {}
+    _lock = threading.Lock()
+
+    def __init__(self, path: str = None, keep: int = 8):
+        """
+        Args:
+            path (str, optional): Directory of the player scripts. Defaults to 'youtube-player' in components_dir().
+            keep (int, optional): Number of player scripts kept. Defaults to 8.
+        """
+        self.path = path or os.path.join(components_dir(), "youtube-player")
+        self.keep = keep
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def install(ydl, store: "players" = None) -> optional["players"]:
+        """
+        Makes the YouTube extractor of a YoutubeDL instance load and store player scripts through a store.
+
+        The player cache is a private attribute of yt-dlp, so a release without it keeps its
+        stock in-memory behaviour and a warning is issued.
+
+        Args:
+            ydl (yt_dlp.YoutubeDL): The YoutubeDL instance.
+            store (players, optional): The store. Defaults to a store in components_dir().
+
+        Returns:
+            players: The installed store, or None if the extractor has no player cache.
+        """
+        extractor = ydl.get_info_extractor("Youtube")
+        if not isinstance(getattr(extractor, "_code_cache", None), (dict, players)):
+            warnings.warn(
+                "yt-dlp's YouTube extractor has no player script cache, "
+                "so player scripts are not kept between runs",
+                RuntimeWarning,
+            )
+            return None
+        if not isinstance(extractor._code_cache, players):
+            store = store or players()
+            for key, code in extractor._code_cache.items():
+                store[key] = code
+            extractor._code_cache = store
+        return extractor._code_cache
+
+    def _file(self, key: str) -> str:
+        """
+        Returns the file of a player script.
+
+        Args:
+            key (str): The player key (e.g., "1b1f0ad8-main").
+
+        Returns:
+            str: The file path.
+        """
+        return os.path.join(self.path, re.sub(r"[^\w.-]", "_", key) + ".json")
+
+    def get(self, key: str, default: str = None) -> optional[str]:
+        """
+        Returns a player script, loading it from disk if needed. Scripts failing their integrity check are removed.
+
+        Args:
+            key (str): The player key.
+            default (str, optional): Returned if the script is not stored. Defaults to None.
+
+        Returns:
+            str: The player script.
+        """
+        with self._lock:
+            code = self._loaded.get((self.path, key))
+        if code is not None:
+            return code
+        try:
+            with open(self._file(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return default
+        code = entry.get("code") if isinstance(entry, dict) else None
+        if not code or hashlib.sha256(code.encode()).hexdigest() != entry.get("sha256"):
+            self.delete(key)
+            return default
+        with self._lock:
+            self._loaded[(self.path, key)] = code
+        return code
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> str:
+        code = self.get(key)
+        if code is None:
+            raise KeyError(key)
+        return code
+
+    def __setitem__(self, key: str, code: str) -> None:
+        """
+        Stores a player script and removes the oldest ones beyond `keep`.
+
+        Args:
+            key (str): The player key.
+            code (str): The player script.
+        """
+        with self._lock:
+            self._loaded[(self.path, key)] = code
+        entry = {
+            "key": key,
+            "sha256": hashlib.sha256(code.encode()).hexdigest(),
+            "stored": time.time(),
+            "code": code,
+        }
+        # written next to the final name and renamed, so readers never see a partial script
+        file = self._file(key)
+        with open(file + ".part", "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(file + ".part", file)
+        stored = sorted(
+            (entry for entry in os.scandir(self.path) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        removed = {entry.path for entry in stored[: max(0, len(stored) - self.keep)]}
+        for file in removed:
+            os.remove(file)
+        with self._lock:
+            for path, loaded in list(self._loaded):
+                if path == self.path and self._file(loaded) in removed:
+                    del self._loaded[(path, loaded)]
+
+    def items(self) -> list[tuple[str, str]]:
+        """
+        Returns every stored player script that passes its integrity check.
+
+        Returns:
+            list[tuple[str, str]]: The player keys and scripts.
+        """
+        keys = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".json"):
+                try:
+                    with open(entry.path, encoding="utf-8") as f:
+                        keys.append(json.load(f)["key"])
+                except (OSError, ValueError, KeyError, TypeError):
+                    os.remove(entry.path)
+        return [(key, code) for key in keys if (code := self.get(key)) is not None]
+
+    def delete(self, key: str) -> None:
+        """
+        Removes a player script.
+
+        Args:
+            key (str): The player key.
+        """
+        with self._lock:
+            self._loaded.pop((self.path, key), None)
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+
+
+def refresh_components(opts: dict = None, video_id: str = "jNQXAC9IVRw") -> dict:
+    """
+    Replaces the cached remote components with freshly downloaded ones.
+
+    The challenge solver scripts of the supported version are downloaded from the yt-dlp/ejs
+    releases and checked against the hashes yt-dlp ships, then the current player script is
+    downloaded. Nothing is removed unless the solver scripts passed their checks, and then only
+    the solver scripts and player scripts stored by Keep; the rest of the directory is yt-dlp's.
+
+    The solver hashes and the player lookup are yt-dlp internals. Without them, a warning is
+    issued and the affected components are left to yt-dlp, which downloads them when needed.
+
+    Args:
+        opts (dict, optional): Extra YoutubeDL options (e.g., cookiefile, proxy). Defaults to None.
+        video_id (str, optional): Video used to look up the current player. Defaults to "jNQXAC9IVRw".
+
+    Returns:
+        dict: The size in bytes of every stored component, by name.
+
+    Raises:
+        ValueError: If a downloaded solver script fails its integrity check.
+        yt_dlp.utils.YoutubeDLError: If a download fails.
+    """
+    import shutil
+    import yt_dlp
+
+    try:
+        from yt_dlp.extractor.youtube.jsc._builtin.vendor import HASHES, VERSION
+    except ImportError:
+        warnings.warn(
+            "this yt-dlp release does not ship the challenge solver hashes, "
+            "so the solver scripts are left to yt-dlp",
+            RuntimeWarning,
+        )
+        return {}
+
+    root = components_dir()
+    opts = {"quiet": True, "no_warnings": True, **(opts or {}), "cachedir": root}
+    stored = {}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        scripts = {}
+        for script in ("lib", "core"):
+            name = f"yt.solver.{script}.min.js"
+            with ydl.urlopen(
+                f"https://github.com/yt-dlp/ejs/releases/download/{VERSION}/{name}"
+            ) as response:
+                code = response.read().decode("utf-8")
+            if hashlib.sha3_512(code.encode()).hexdigest() != HASHES[name]:
+                raise ValueError(f"{name} {VERSION} failed its integrity check")
+            scripts[script] = code
+        store = players()
+        # yt-dlp's cache section of the solver scripts, and the player scripts of this module
+        for owned in (os.path.join(root, "challenge-solver"), store.path):
+            shutil.rmtree(owned, ignore_errors=True)
+        os.makedirs(store.path, exist_ok=True)
+        with players._lock:
+            for loaded in [key for key in players._loaded if key[0] == store.path]:
+                del players._loaded[loaded]
+        for script, code in scripts.items():
+            # the entry format of yt-dlp's EJS challenge providers
+            ydl.cache.store(
+                "challenge-solver",
+                script,
+                {"version": VERSION, "variant": "minified", "code": code},
+            )
+            stored[f"yt.solver.{script}.min.js"] = len(code)
+        extractor = ydl.get_info_extractor("Youtube")
+        internals = ("_download_player_url", "_load_player", "_player_js_cache_key")
+        if not all(hasattr(extractor, name) for name in internals):
+            warnings.warn(
+                "yt-dlp's YouTube extractor has no player lookup, "
+                "so the player script is downloaded on the next extraction",
+                RuntimeWarning,
+            )
+            return stored
+        players.install(ydl, store)
+        player_url = extractor._download_player_url(video_id, fatal=True)
+        code = extractor._load_player(video_id, player_url)
+        stored[f"player {extractor._player_js_cache_key(player_url)}"] = len(code)
+    return stored
@@ -0,0 +1,540 @@
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+import utils
+
+# the thin client only needs sockets and json; everything else is imported by the daemon itself
+
+
+def default_address() -> str:
+    """
+    Returns the default daemon address.
+
+    Returns:
+        str: A Unix socket in the data directory where supported, otherwise a localhost port.
+    """
+    if hasattr(socket, "AF_UNIX"):
+        from archive import data_dir
+
+        return "unix:" + os.path.join(data_dir(), "keep.sock")
+    return "127.0.0.1:8765"
+
+
+def _parse(address: str) -> tuple:
+    """
+    Parses a daemon address.
+
+    Args:
+        address (str): "unix:/path/to/socket", "host:port" or a port on localhost.
+
+    Returns:
+        tuple: The socket family and its address.
+
+    Raises:
+        ValueError: If the address can not be parsed.
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, os.path.expanduser(address[5:])
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"invalid daemon address: {address}")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def request(method: str, path: str, body=None, address: str = None, timeout: float = 30.0):
+    """
+    Sends one request to a running daemon.
+
+    The request is written as plain HTTP/1.0 on a raw socket, so a client invocation never
+    imports an HTTP library.
+
+    Args:
+        method (str): "GET", "POST" or "DELETE".
+        path (str): The API path (e.g., "/jobs").
+        body (optional): The JSON request body. Defaults to None.
+        address (str, optional): The daemon address. Defaults to default_address().
+        timeout (float, optional): Socket timeout in seconds. Defaults to 30.
+
+    Returns:
+        tuple: The HTTP status and the decoded JSON response.
+
+    Raises:
+        OSError: If no daemon is listening on the address.
+    """
+    family, target = _parse(address or default_address())
+    payload = json.dumps(body).encode() if body is not None else b""
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(target)
+        sock.sendall(
+            f"{method} {path} HTTP/1.0\r\nHost: keep\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+            + payload
+        )
+        response = b""
+        while chunk := sock.recv(65536):
+            response += chunk
+    head, _, data = response.partition(b"\r\n\r\n")
+    return int(head.split(None, 2)[1]), json.loads(data or b"null")
+
+
+class daemon:
+    """
+    Long-running download service.
+
+    One process serves every job, so the interpreter, yt-dlp and rich are imported once, and
+    extraction YoutubeDL instances (with their HTTP connections and player caches), the
+    connectivity probe, the circuit breaker and the bandwidth limiter stay warm between jobs.
+    Jobs run on a bounded worker pool with the batch post-processing pipeline; submitting one
+    costs a dictionary insert.
+    """
+
+    # options a client may set per job
+    job_options = (
+        "quality",
+        "subtitle",
+        "output",
+        "priority",
+        "max_size",
+        "max_bitrate",
+        "prefer_codecs",
+        "start",
+        "end",
+        "chapter",
+        "audio_only",
+        "min_audio_bitrate",
+        "copy_only",
+    )
+    # finished jobs kept for status queries
+    history = 1000
+
+    def __init__(
+        self,
+        workers: int = 4,
+        postprocess_workers: int = None,
+        disk_budget: str = None,
+        **options,
+    ):
+        """
+        Args:
+            workers (int, optional): Number of concurrent jobs. Defaults to 4.
+            postprocess_workers (int, optional): Number of concurrent post-processing jobs. Defaults to half the CPU count.
+            disk_budget (str, optional): Maximum size of downloaded streams waiting for post-processing (e.g., "20G"). Defaults to no limit.
+            **options: Keyword arguments forwarded to every downloader (e.g., cookie, quality, cache).
+        """
+        import sqlite3
+        from concurrent.futures import ThreadPoolExecutor
+        from yt_dlp.utils import parse_bytes
+        from pipeline import pipeline
+        from dashboard import dashboard
+        from archive import downloads, journal
+
+        self.board = dashboard("none")
+        self.pipeline = pipeline(
+            workers=postprocess_workers,
+            budget=parse_bytes(disk_budget) if disk_budget else None,
+        )
+        # every job shares one archive and one journal connection
+        self.archive = None
+        self.journal = None
+        try:
+            if options.get("archive", True):
+                self.archive = downloads()
+            if options.get("journal", True):
+                self.journal = journal()
+        except sqlite3.Error:
+            pass
+        self.options = {
+            **options,
+            "pipeline": self.pipeline,
+            "dashboard": self.board,
+            "warm": True,
+            "archive": self.archive,
+            "journal": self.journal,
+        }
+        self.finished = None
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="job"
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, **options) -> dict:
+        """
+        Queues a download.
+
+        Args:
+            url (str): The YouTube video URL.
+            **options: Per-job options, see job_options.
+
+        Returns:
+            dict: The job status.
+
+        Raises:
+            ValueError: If the URL is not a supported video URL or an option is unknown.
+        """
+        unknown = set(options) - set(self.job_options)
+        if unknown:
+            raise ValueError(f"unknown job options: {', '.join(sorted(unknown))}")
+        match = utils.router.canonicalize(url or "")
+        if match is None or match[0] != "youtube":
+            raise ValueError(str(utils.LinkError()))
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "url": utils.router.canonical(*match),
+            "title": None,
+            "status": "queued",
+            "error": None,
+            "retryable": False,
+            "submitted": time.time(),
+            "finished": None,
+        }
+        queued = dict(job)
+        cancel = threading.Event()
+        with self._lock:
+            self._jobs[job["id"]] = [job, cancel, None]
+        future = self._pool.submit(self._run, job, cancel, options)
+        with self._lock:
+            self._jobs[job["id"]][2] = future
+        return queued
+
+    def _run(self, job: dict, cancel: threading.Event, options: dict) -> None:
+        """
+        Runs a queued job on a worker.
+
+        Args:
+            job (dict): The job status, updated in place.
+            cancel (threading.Event): The job's cancel event.
+            options (dict): The per-job options.
+        """
+        import youtube
+
+        if cancel.is_set():
+            job.update({"status": "cancelled", "finished": time.time()})
+            self._journal_cancelled(job)
+            return
+        job["status"] = "running"
+        result = youtube._job(job["url"], {**self.options, **options, "cancel": cancel})
+        job["title"] = result["title"]
+        building = result.pop("postprocessing", None)
+        if building is None:
+            self._finish(job, cancel, result)
+            return
+        # the worker moves on while the final file is built
+        job["status"] = "postprocessing"
+        self.board.phase(job["url"], "merging")
+
+        def built(future) -> None:
+            error = future.exception()
+            result["status"] = "failed" if error else "done"
+            result["error"] = (str(error) or type(error).__name__) if error else None
+            self._finish(job, cancel, result)
+
+        building.add_done_callback(built)
+
+    def _finish(self, job: dict, cancel: threading.Event, result: dict) -> None:
+        """
+        Records the result of a job and forgets the oldest finished jobs.
+
+        Args:
+            job (dict): The job status.
+            cancel (threading.Event): The job's cancel event.
+            result (dict): The result of youtube._job().
+        """
+        status = result["status"]
+        if status == "failed" and cancel.is_set():
+            status = "cancelled"
+            self._journal_cancelled(job)
+        job.update(
+            {
+                "status": status,
+                "error": result["error"],
+                "retryable": result["retryable"],
+                "finished": time.time(),
+            }
+        )
+        self.board.finish(job["url"], status)
+        with self._lock:
+            done = [key for key, (other, _, _) in self._jobs.items() if other["finished"]]
+            for key in done[: max(0, len(done) - self.history)]:
+                del self._jobs[key]
+        if self.finished:
+            self.finished(dict(job))
+
+    def status(self, job_id: str) -> dict:
+        """
+        Returns the status of a job, with its progress while it downloads.
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            dict: The job status, or None if the job is unknown.
+        """
+        with self._lock:
+            entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        job = dict(entry[0])
+        if job["status"] in ("running", "postprocessing"):
+            job["progress"] = self.board.progress(job["url"])
+        return job
+
+    def list(self) -> list[dict]:
+        """
+        Returns the status of every known job, oldest first.
+
+        Returns:
+            list[dict]: The job statuses.
+        """
+        with self._lock:
+            ids = list(self._jobs)
+        return [job for job in map(self.status, ids) if job]
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        Cancels a job. Queued jobs never start; running downloads stop at their next block.
+
+        Args:
+            job_id (str): The job ID.
+
+        Returns:
+            dict: The job status, or None if the job is unknown.
+        """
+        with self._lock:
+            entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        job, cancel, future = entry
+        cancel.set()
+        if future is not None and future.cancel():
+            job.update({"status": "cancelled", "finished": time.time()})
+            self._journal_cancelled(job)
+        return self.status(job_id)
+
+    def _journal_cancelled(self, job: dict) -> None:
+        """
+        Records a cancelled job in the job journal, so --resume does not pick it up again.
+
+        Args:
+            job (dict): The job status.
+        """
+        import sqlite3
+
+        if self.journal is None:
+            return
+        try:
+            self.journal.update(
+                "youtube",
+                utils.recognizer.video_id(job["url"]),
+                "cancelled",
+                url=job["url"],
+            )
+        except sqlite3.Error:
+            pass
+
+    def shutdown(self) -> None:
+        """
+        Cancels queued jobs, waits for running ones, including their post-processing, and closes the shared archive and journal.
+        """
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self.pipeline.shutdown()
+        for store in (self.archive, self.journal):
+            if store:
+                store.close()
+
+
+def _handler():
+    """
+    Builds the HTTP request handler of the API.
+
+    Routes:
+        GET /jobs: every job.
+        POST /jobs: queue {"url": ...} or {"urls": [...]}, with optional "options".
+        GET /jobs/<id>: one job.
+        DELETE /jobs/<id>: cancel a job.
+
+    Returns:
+        type: The BaseHTTPRequestHandler subclass.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class handler(BaseHTTPRequestHandler):
+        server_version = "keep"
+
+        def reply(self, status: int, data) -> None:
+            body = json.dumps(data, ensure_ascii=False, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def route(self, method: str) -> None:
+            service = self.server.service
+            parts = self.path.split("?")[0].strip("/").split("/")
+            try:
+                if parts == ["jobs"] and method == "GET":
+                    return self.reply(200, service.list())
+                if parts == ["jobs"] and method == "POST":
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    urls = body.get("urls") or [body.get("url")]
+                    options = body.get("options") or {}
+                    jobs = []
+                    for url in urls:
+                        try:
+                            jobs.append(service.submit(url, **options))
+                        except ValueError as e:
+                            jobs.append({"url": url, "status": "rejected", "error": str(e)})
+                    return self.reply(201, jobs)
+                if len(parts) == 2 and parts[0] == "jobs" and method in ("GET", "DELETE"):
+                    job = service.status(parts[1]) if method == "GET" else service.cancel(parts[1])
+                    if job is None:
+                        return self.reply(404, {"error": f"unknown job: {parts[1]}"})
+                    return self.reply(200, job)
+                self.reply(404, {"error": f"unknown route: {method} {self.path}"})
+            except (ValueError, TypeError, AttributeError) as e:
+                self.reply(400, {"error": str(e)})
+
+        def do_GET(self) -> None:
+            self.route("GET")
+
+        def do_POST(self) -> None:
+            self.route("POST")
+
+        def do_DELETE(self) -> None:
+            self.route("DELETE")
+
+        def log_message(self, format: str, *args) -> None:
+            return
+
+    return handler
+
+
+def _loopback(host: str) -> bool:
+    """
+    Tells whether a host name or address only accepts connections from this machine.
+
+    Args:
+        host (str): The host name or IP address.
+
+    Returns:
+        bool: True for loopback addresses and names that resolve to one.
+    """
+    import ipaddress
+
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        pass
+    try:
+        return all(
+            ipaddress.ip_address(entry[4][0]).is_loopback
+            for entry in socket.getaddrinfo(host, None)
+        )
+    except OSError:
+        return False
+
+
+def listen(address: str = None, allow_remote: bool = False):
+    """
+    Opens the API server on a Unix socket or a TCP port.
+
+    A stale Unix socket left by a crashed daemon is replaced; a live one is not. The API has no
+    authentication, so TCP ports are only opened on loopback addresses unless remote access is
+    explicitly allowed.
+
+    Args:
+        address (str, optional): The daemon address. Defaults to default_address().
+        allow_remote (bool, optional): Whether to accept a TCP address that other machines can reach. Defaults to False.
+
+    Returns:
+        socketserver.BaseServer: The server, not yet serving.
+
+    Raises:
+        OSError: If another daemon is listening on the address.
+        ValueError: If the address is not local and remote access is not allowed.
+    """
+    import socketserver
+    from http.server import ThreadingHTTPServer
+
+    family, target = _parse(address or default_address())
+    if family == socket.AF_INET:
+        if not allow_remote and not _loopback(target[0]):
+            raise ValueError(
+                f"refusing to open the unauthenticated daemon API on {target[0]}; "
+                "listen on a loopback address or pass --allow-remote"
+            )
+        return ThreadingHTTPServer(target, _handler())
+    if os.path.exists(target):
+        try:
+            request("GET", "/jobs", address=f"unix:{target}", timeout=1.0)
+            raise OSError(f"a Keep daemon is already listening on {target}")
+        except ConnectionRefusedError:
+            os.unlink(target)
+
+    class server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    unix = server(target, _handler())
+    os.chmod(target, 0o600)
+    return unix
+
+
+def serve(address: str = None, allow_remote: bool = False, **options) -> None:
+    """
+    Runs the daemon until it is interrupted.
+
+    Args:
+        address (str, optional): The daemon address. Defaults to default_address().
+        allow_remote (bool, optional): Whether to accept a TCP address that other machines can reach, see listen(). Defaults to False.
+        **options: Keyword arguments for the daemon class.
+    """
+    from rich.console import Console
+    from rich.markup import escape
+
+    console = Console()
+    address = address or default_address()
+    service = daemon(**options)
+    # import yt-dlp and the downloader now rather than in the first job
+    import youtube  # noqa: F401
+
+    def finished(job: dict) -> None:
+        if job["status"] in ("done", "skipped"):
+            console.print(
+                f"[bold green]✓[/bold green] [dim]{job['id']}[/dim] [green]{escape(job['title'] or job['url'])}[/green]"
+            )
+        else:
+            console.print(
+                f"[bold red]❌[/bold red] [dim]{job['id']}[/dim] [yellow]{job['url']}[/yellow] [red]{escape(job['error'] or job['status'])}[/red]"
+            )
+
+    service.finished = finished
+    server = listen(address, allow_remote)
+    server.service = service
+    console.print(
+        f"\n[bold bright_blue]Keep daemon listening on {address}[/bold bright_blue] [dim](Ctrl+C to stop)[/dim]\n"
+    )
+    family, target = _parse(address)
+    if family == socket.AF_INET and not _loopback(target[0]):
+        console.print(
+            "[bold yellow]⚠ The daemon API has no authentication; anyone who can reach this address can queue and cancel jobs.[/bold yellow]\n"
+        )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print(
+            "\n[bold bright_green]Stopping...[/bold bright_green] Waiting for running jobs to finish...\n"
+        )
+    finally:
+        server.server_close()
+        if address.startswith("unix:"):
+            try:
+                os.unlink(_parse(address)[1])
+            except FileNotFoundError:
+                pass
+        service.shutdown()
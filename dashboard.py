@@ -0,0 +1,335 @@
+import sys
+import json
+import threading
+
+
+def _duration(seconds: float) -> str:
+    """
+    Formats seconds as h:mm:ss or m:ss.
+
+    Args:
+        seconds (float): The duration in seconds.
+
+    Returns:
+        str: The formatted duration, or "-" if unknown.
+    """
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+def _size(size: float) -> str:
+    """
+    Formats a byte count with a binary unit.
+
+    Args:
+        size (float): The size in bytes.
+
+    Returns:
+        str: The formatted size (e.g., "12.3MiB").
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TiB"
+
+
+class dashboard:
+    """
+    Shared progress display for any number of concurrent download jobs.
+
+    yt-dlp progress hooks only record the latest numbers of their job; nothing is drawn from
+    the hook. The display is redrawn from those numbers at a fixed rate instead: a rich live
+    table on a terminal, or a single aggregate status line (plain) or JSON object (json) every
+    few seconds when the output is redirected, so hundreds of fragment callbacks per second
+    cost one dictionary update each.
+    """
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        interval: float = None,
+        total: int = None,
+        console=None,
+    ):
+        """
+        Args:
+            mode (str, optional): "rich", "plain", "json", "none" or "auto" to pick rich on a terminal and plain otherwise. Defaults to "auto".
+            interval (float, optional): Seconds between redraws. Defaults to 0.25 for rich and 5 otherwise.
+            total (int, optional): Number of jobs expected, shown in the aggregate line. Defaults to None.
+            console (rich.console.Console, optional): Console used for the rich display. Defaults to a new Console.
+        """
+        if mode == "auto":
+            mode = "rich" if sys.stdout.isatty() else "plain"
+        self.mode = mode
+        self.interval = interval or (0.25 if mode == "rich" else 5.0)
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self._console = console
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._live = None
+        self._ticker = None
+        self._stopped = threading.Event()
+
+    @property
+    def console(self):
+        """
+        Returns:
+            rich.console.Console: The console the display draws on; print through it to keep lines above a live display.
+        """
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return self._console
+
+    def start(self, job: str, title: str = None) -> None:
+        """
+        Adds a job to the display.
+
+        Args:
+            job (str): A key identifying the job, e.g. its URL.
+            title (str, optional): The text shown for the job. Defaults to the key.
+        """
+        with self._lock:
+            self._jobs[job] = {
+                "title": title or job,
+                "phase": "downloading",
+                "streams": {},
+            }
+
+    def phase(self, job: str, phase: str) -> None:
+        """
+        Changes the phase shown for a job (e.g., "merging").
+
+        Args:
+            job (str): The job key.
+            phase (str): The new phase.
+        """
+        with self._lock:
+            if job in self._jobs:
+                self._jobs[job]["phase"] = phase
+
+    def finish(self, job: str, status: str = "done") -> None:
+        """
+        Removes a job from the display and counts it as done or failed.
+
+        Args:
+            job (str): The job key.
+            status (str, optional): "done", "skipped" or "failed". Defaults to "done".
+        """
+        with self._lock:
+            self._jobs.pop(job, None)
+            if status == "failed":
+                self.failed += 1
+            else:
+                self.done += 1
+
+    def hook(self, job: str, title: str = None):
+        """
+        Returns a yt-dlp progress hook that records the progress of a job.
+
+        Args:
+            job (str): The job key.
+            title (str, optional): The text shown for the job. Defaults to the key.
+
+        Returns:
+            Callable[[dict], None]: The progress hook.
+        """
+        if job not in self._jobs:
+            self.start(job, title)
+
+        def progress_hook(d: dict) -> None:
+            total = d.get("total_bytes") or d.get("total_bytes_estimate")
+            if d["status"] == "finished":
+                downloaded, speed = total or d.get("downloaded_bytes") or 0, 0.0
+            elif d["status"] == "downloading":
+                downloaded, speed = d.get("downloaded_bytes") or 0, d.get("speed") or 0.0
+            else:
+                return
+            with self._lock:
+                state = self._jobs.get(job)
+                if state is not None:
+                    # one entry per stream, so parallel video and audio downloads add up
+                    state["streams"][d.get("filename")] = (
+                        downloaded,
+                        total or downloaded,
+                        speed,
+                    )
+
+        return progress_hook
+
+    @staticmethod
+    def _job_progress(state: dict) -> dict:
+        """
+        Adds up the streams of one job. Call it with the lock held.
+
+        Args:
+            state (dict): The state of the job.
+
+        Returns:
+            dict: The phase, downloaded, total, speed and eta of the job.
+        """
+        streams = state["streams"].values()
+        downloaded = sum(stream[0] for stream in streams)
+        total = sum(stream[1] for stream in streams)
+        speed = sum(stream[2] for stream in streams)
+        return {
+            "phase": state["phase"],
+            "downloaded": downloaded,
+            "total": total,
+            "speed": speed,
+            "eta": (total - downloaded) / speed if speed else None,
+        }
+
+    def progress(self, job: str) -> dict:
+        """
+        Returns the current progress of one job.
+
+        Args:
+            job (str): The job key.
+
+        Returns:
+            dict: The phase, downloaded, total, speed and eta of the job, or None if it is not shown.
+        """
+        with self._lock:
+            state = self._jobs.get(job)
+            return None if state is None else self._job_progress(state)
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current progress of every job and the aggregate throughput and ETA.
+
+        Returns:
+            dict: The progress with 'jobs' (title, phase, downloaded, total, speed and eta per job) and the aggregate 'done', 'failed', 'active', 'downloaded', 'total', 'speed' and 'eta'.
+        """
+        with self._lock:
+            jobs = [
+                {"title": state["title"], **self._job_progress(state)}
+                for state in self._jobs.values()
+            ]
+            done, failed = self.done, self.failed
+        downloaded = sum(job["downloaded"] for job in jobs)
+        total = sum(job["total"] for job in jobs)
+        speed = sum(job["speed"] for job in jobs)
+        return {
+            "jobs": jobs,
+            "done": done,
+            "failed": failed,
+            "active": len(jobs),
+            "downloaded": downloaded,
+            "total": total,
+            "speed": speed,
+            "eta": (total - downloaded) / speed if speed else None,
+        }
+
+    def line(self, snapshot: dict = None) -> str:
+        """
+        Formats the aggregate progress as one plain line.
+
+        Args:
+            snapshot (dict, optional): A snapshot() result. Defaults to the current progress.
+
+        Returns:
+            str: The status line.
+        """
+        snapshot = snapshot or self.snapshot()
+        jobs = str(snapshot["done"] + snapshot["failed"])
+        if self.total:
+            jobs += f"/{self.total}"
+        return (
+            f"{jobs} jobs finished, {snapshot['active']} active, "
+            f"{_size(snapshot['downloaded'])} of {_size(snapshot['total'])} "
+            f"at {_size(snapshot['speed'])}/s, ETA {_duration(snapshot['eta'])}"
+        )
+
+    def event(self, data: dict) -> None:
+        """
+        Writes a JSON event line in json mode.
+
+        Args:
+            data (dict): The event data.
+        """
+        if self.mode == "json":
+            sys.stdout.write(json.dumps(data, ensure_ascii=False, default=str) + "\n")
+            sys.stdout.flush()
+
+    def render(self):
+        """
+        Builds the rich renderable of the current progress.
+
+        Returns:
+            rich.console.Group: The progress table with one row per active job and an aggregate footer.
+        """
+        from rich.table import Table
+        from rich.console import Group
+        from rich.markup import escape
+        from rich.progress_bar import ProgressBar
+
+        snapshot = self.snapshot()
+        table = Table.grid(padding=(0, 1))
+        for job in snapshot["jobs"][:10]:
+            table.add_row(
+                f"[cyan]{escape(job['title'][:50])}[/cyan]",
+                ProgressBar(
+                    total=job["total"] or None, completed=job["downloaded"], width=30
+                ),
+                (
+                    f"{_size(job['speed'])}/s"
+                    if job["phase"] == "downloading"
+                    else f"[dim]{job['phase']}[/dim]"
+                ),
+                f"ETA {_duration(job['eta'])}",
+            )
+        footer = []
+        if len(snapshot["jobs"]) > 10:
+            footer.append(f"[dim]... and {len(snapshot['jobs']) - 10} more[/dim]")
+        if self.total or len(snapshot["jobs"]) > 1:
+            footer.append(f"[bold]{self.line(snapshot)}[/bold]")
+        return Group(table, *footer)
+
+    def _tick(self) -> None:
+        """
+        Writes the aggregate progress every interval until the display stops.
+        """
+        while not self._stopped.wait(self.interval):
+            self._emit()
+
+    def _emit(self) -> None:
+        """
+        Writes the aggregate progress once in plain or json mode.
+        """
+        if self.mode == "plain":
+            sys.stdout.write(f"keep: {self.line()}\n")
+            sys.stdout.flush()
+        elif self.mode == "json":
+            self.event({"event": "progress", **self.snapshot()})
+
+    def __enter__(self):
+        if self.mode == "rich":
+            from rich.live import Live
+
+            self._live = Live(
+                get_renderable=self.render,
+                console=self.console,
+                refresh_per_second=1 / self.interval,
+                transient=True,
+            )
+            self._live.start()
+        elif self.mode in ("plain", "json"):
+            self._ticker = threading.Thread(target=self._tick, daemon=True)
+            self._ticker.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stopped.set()
+        if self._live is not None:
+            self._live.stop()
+        if self._ticker is not None:
+            self._ticker.join()
+            self._emit()
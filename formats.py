@@ -0,0 +1,270 @@
+from typing import Optional as optional
+
+# codec string prefixes (e.g., "avc1.640028", "vp09.00.40.08") mapped to their codec family
+families = {
+    "avc1": "h264",
+    "avc3": "h264",
+    "h264": "h264",
+    "hev1": "h265",
+    "hvc1": "h265",
+    "h265": "h265",
+    "vp09": "vp9",
+    "vp9": "vp9",
+    "vp8": "vp8",
+    "av01": "av1",
+    "av1": "av1",
+    "mp4a": "aac",
+    "aac": "aac",
+    "opus": "opus",
+    "vorbis": "vorbis",
+}
+
+# codec families each output container holds by stream copy; None holds any codec
+containers = {
+    "mkv": None,
+    "mka": None,
+    "mp4": {"h264", "h265", "av1", "vp9", "aac", "opus", "mp3", "flac"},
+    "m4a": {"aac", "mp3", "alac"},
+    "mov": {"h264", "h265", "aac", "mp3", "alac"},
+    "webm": {"vp8", "vp9", "av1", "opus", "vorbis"},
+    "ogg": {"opus", "vorbis", "flac"},
+    "opus": {"opus"},
+    "mp3": {"mp3"},
+}
+
+
+def codec(name: str) -> optional[str]:
+    """
+    Returns the codec family of a yt-dlp codec string.
+
+    Args:
+        name (str): The vcodec or acodec value (e.g., "av01.0.08M.08").
+
+    Returns:
+        str: The family (e.g., "av1"), the string itself if it is not known, or None for "none" or a missing codec.
+    """
+    if not name or name == "none":
+        return None
+    name = name.lower()
+    return families.get(name.split(".")[0], name)
+
+
+def fits(ext: str, family: str) -> bool:
+    """
+    Returns whether a container holds a codec without converting it.
+
+    Args:
+        ext (str): The container extension (e.g., "mp4").
+        family (str): The codec family (e.g., "opus").
+
+    Returns:
+        bool: True if the stream can be copied into the container; unknown containers hold nothing.
+    """
+    if ext not in containers:
+        return False
+    return containers[ext] is None or family in containers[ext]
+
+
+class stream:
+    """
+    One format of a video, reduced to the fields a selection looks at.
+    """
+
+    __slots__ = ("id", "height", "fps", "vcodec", "acodec", "tbr", "size")
+
+    def __init__(self, format: dict, duration: float = None):
+        """
+        Args:
+            format (dict): The yt-dlp format.
+            duration (float, optional): The video duration in seconds, to estimate sizes from the bitrate. Defaults to None.
+        """
+        tbr = format.get("tbr") or (
+            (format.get("vbr") or 0) + (format.get("abr") or 0) or None
+        )
+        size = format.get("filesize") or format.get("filesize_approx")
+        if not size and tbr and duration:
+            size = int(tbr * 125 * duration)
+        video = format.get("vcodec") != "none" and format.get("video_ext") != "none"
+        self.id = format.get("format_id")
+        self.height = format.get("height") if video else None
+        self.fps = format.get("fps")
+        self.vcodec = codec(format.get("vcodec")) if video else None
+        self.acodec = codec(format.get("acodec"))
+        self.tbr = tbr
+        self.size = size
+
+
+class index:
+    """
+    Index of the formats of one video, built once per information dict.
+
+    Every format is reduced to a stream with the fields a selection looks at: height, fps, codec
+    families, total bitrate (kbit/s) and size. The size is the exact or approximate file size,
+    or estimated from the bitrate and duration, so "720p" can be told apart by the bytes it
+    costs instead of by its height alone. The index keeps no reference to the information.
+    """
+
+    __slots__ = ("video", "audio", "muxed")
+
+    def __init__(self, info: dict):
+        """
+        Args:
+            info (dict): The video information.
+        """
+        self.video, self.audio, self.muxed = [], [], []
+        for format in info.get("formats") or []:
+            entry = stream(format, info.get("duration"))
+            if entry.height is not None:
+                (self.muxed if entry.acodec else self.video).append(entry)
+            elif entry.acodec:
+                self.audio.append(entry)
+
+    def heights(self, minimum: int = 180) -> list[int]:
+        """
+        Returns the offered video heights.
+
+        Args:
+            minimum (int, optional): Heights at or below this one are left out. Defaults to 180.
+
+        Returns:
+            list[int]: The heights in ascending order.
+        """
+        return sorted(
+            {
+                int(entry.height)
+                for entry in self.video + self.muxed
+                if int(entry.height) > minimum
+            }
+        )
+
+    def candidates(self) -> list[dict]:
+        """
+        Returns every downloadable combination: each video stream with each audio stream, and each muxed format.
+
+        Returns:
+            list[dict]: The format selector (e.g., "137+140"), height, fps, codecs, total bitrate and size of every combination. Bitrate and size are None when a stream does not report them.
+        """
+        combinations = []
+        for video in self.video:
+            for audio in self.audio or [None]:
+                streams = [video] if audio is None else [video, audio]
+                combinations.append(
+                    {
+                        "format": "+".join(str(entry.id) for entry in streams),
+                        "height": video.height,
+                        "fps": video.fps,
+                        "vcodec": video.vcodec,
+                        "acodec": audio and audio.acodec,
+                        "tbr": (
+                            sum(entry.tbr for entry in streams)
+                            if all(entry.tbr for entry in streams)
+                            else None
+                        ),
+                        "size": (
+                            sum(entry.size for entry in streams)
+                            if all(entry.size for entry in streams)
+                            else None
+                        ),
+                    }
+                )
+        for muxed in self.muxed:
+            combinations.append(
+                {
+                    "format": str(muxed.id),
+                    "height": muxed.height,
+                    "fps": muxed.fps,
+                    "vcodec": muxed.vcodec,
+                    "acodec": muxed.acodec,
+                    "tbr": muxed.tbr,
+                    "size": muxed.size,
+                }
+            )
+        return combinations
+
+    def select(
+        self,
+        height: int = None,
+        max_size: int = None,
+        max_bitrate: float = None,
+        prefer: list[str] = None,
+    ) -> optional[dict]:
+        """
+        Selects the best combination that satisfies a policy.
+
+        Combinations are ranked by height, then by the position of their video codec in
+        `prefer`, then by fps and bitrate, so preferring AV1 or VP9 picks the smaller encode of
+        the same height over the larger H.264 one. Combinations of unknown size never pass a
+        size limit, and those of unknown bitrate never pass a bitrate limit.
+
+        Args:
+            height (int, optional): Maximum height. Defaults to no limit.
+            max_size (int, optional): Maximum estimated size in bytes. Defaults to no limit.
+            max_bitrate (float, optional): Maximum total bitrate in kbit/s. Defaults to no limit.
+            prefer (list[str], optional): Video codec families in order of preference (e.g., ["av1", "vp9"]). Defaults to None.
+
+        Returns:
+            dict: The selected combination (see candidates()), or None if no combination satisfies the policy.
+        """
+        prefer = [codec(name) for name in prefer or []]
+
+        def rank(candidate: dict) -> tuple:
+            vcodec = candidate["vcodec"]
+            return (
+                candidate["height"] or 0,
+                -(prefer.index(vcodec) if vcodec in prefer else len(prefer)),
+                candidate["fps"] or 0,
+                candidate["tbr"] or 0,
+            )
+
+        allowed = [
+            candidate
+            for candidate in self.candidates()
+            if (not height or (candidate["height"] or 0) <= int(height))
+            and (not max_size or (candidate["size"] or max_size + 1) <= max_size)
+            and (not max_bitrate or (candidate["tbr"] or max_bitrate + 1) <= max_bitrate)
+        ]
+        return max(allowed, key=rank, default=None)
+
+    def select_audio(
+        self,
+        min_bitrate: float = None,
+        max_size: int = None,
+        max_bitrate: float = None,
+    ) -> optional[dict]:
+        """
+        Selects the smallest audio-only stream that is good enough.
+
+        Streams are ranked by size, then by bitrate; streams of unknown size count as the
+        largest. Streams of unknown bitrate never pass a bitrate floor or limit.
+
+        Args:
+            min_bitrate (float, optional): Minimum bitrate in kbit/s. Defaults to no minimum.
+            max_size (int, optional): Maximum estimated size in bytes. Defaults to no limit.
+            max_bitrate (float, optional): Maximum bitrate in kbit/s. Defaults to no limit.
+
+        Returns:
+            dict: The selected stream, like a combination of candidates(), or None if no audio-only stream qualifies.
+        """
+        allowed = [
+            entry
+            for entry in self.audio
+            if (not min_bitrate or (entry.tbr or 0) >= min_bitrate)
+            and (not max_size or (entry.size or max_size + 1) <= max_size)
+            and (not max_bitrate or (entry.tbr or max_bitrate + 1) <= max_bitrate)
+        ]
+        chosen = min(
+            allowed,
+            key=lambda entry: (entry.size or float("inf"), entry.tbr or float("inf")),
+            default=None,
+        )
+        if chosen is None:
+            return None
+        return {
+            "format": str(chosen.id),
+            "height": None,
+            "fps": None,
+            "vcodec": None,
+            "acodec": chosen.acodec,
+            "tbr": chosen.tbr,
+            "size": chosen.size,
+        }
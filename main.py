@@ -1,19 +1,22 @@
-from rich.prompt import Prompt
-from rich.console import Console
-from rich.align import Align
-import youtube
 import sys
 import os
 import argparse
 import utils
 
+# rich, yt-dlp and pycountry are imported where they are first needed, so --help,
+# argument errors and URL validation never pay for loading them.
+
 intp = int()
 sources = ["youtube"]
 quality = ["144p", "240p", "360p", "480p", "720p", "1080p", "1440p", "2160p"]
 
 
 def handler(
-    url: str = None, quality: str = None, subtitle: list[str] = None, output: str = None
+    url: str = None,
+    quality: str = None,
+    subtitle: list[str] = None,
+    output: str = None,
+    **options,
 ) -> None:
     """
     Handles user input and calls the appropriate downloader based on the input.
@@ -23,11 +26,22 @@ def handler(
         quality (str, optional): The desired video quality. Defaults to None.
         subtitle (list[str], optional): List of subtitle languages. Defaults to None.
         output (str, optional): The output directory. Defaults to None.
+        **options: Extra keyword arguments forwarded to the downloader (e.g., cache, refresh, archive).
     """
+    from rich.console import Console
+
     try:
         match intp:
             case 1:
-                youtube.main(url=url, quality=quality, subtitle=subtitle, output=output)
+                import youtube
+
+                youtube.main(
+                    url=url,
+                    quality=quality,
+                    subtitle=subtitle,
+                    output=output,
+                    **options,
+                )
             case 0:
                 console = Console()
                 console.print("\n[red]Exiting...[/red]\n")
@@ -46,6 +60,9 @@ def end() -> None:
     """
     Handles end of a process
     """
+    from rich.prompt import Prompt
+    from rich.console import Console
+
     try:
         console = Console()
         choice = Prompt.ask(
@@ -64,6 +81,146 @@ def end() -> None:
         sys.exit(0)
 
 
+def normalize(path: str) -> None:
+    """
+    Writes the canonical URL of every unique video listed in a file to stdout and exits.
+
+    Unsupported lines are reported on stderr, and the exit status is 1 if there were any.
+
+    Args:
+        path (str): The file path, or - to read from stdin.
+    """
+    invalid = 0
+
+    def unsupported(line: str) -> None:
+        nonlocal invalid
+        invalid += 1
+        sys.stderr.write(f"unsupported URL: {line}\n")
+
+    with sys.stdin if path == "-" else open(path, encoding="utf-8") as lines:
+        sys.stdout.writelines(
+            utils.router.canonical(site, video_id) + "\n"
+            for site, video_id in utils.router.bulk(lines, unsupported)
+        )
+    sys.exit(1 if invalid else 0)
+
+
+def instrument(events: str = None, textfile: str = None, listen: str = None) -> None:
+    """
+    Sets up the exporters of the per-phase timing spans and counters of this run.
+
+    Args:
+        events (str, optional): File the span and job events are appended to as JSON lines, or - for stdout. Defaults to None.
+        textfile (str, optional): File the Prometheus text format is written to when Keep exits. Defaults to None.
+        listen (str, optional): host:port to serve the Prometheus text format on /metrics. Defaults to None.
+
+    Raises:
+        OSError: If the events file can not be opened or the address can not be bound.
+        ValueError: If the address is not host:port.
+    """
+    import atexit
+    from metrics import metrics
+
+    registry = metrics.shared()
+    if events:
+        registry.hook(metrics.jsonl(events))
+    if textfile:
+        atexit.register(registry.write, textfile)
+    if listen:
+        registry.listen(listen)
+
+
+def remote(
+    address: str, urls: list[str] = None, cancel: str = None, **options
+) -> None:
+    """
+    Acts as a thin client of a running daemon and exits: queues URLs, cancels a job or lists the jobs.
+
+    Args:
+        address (str): The daemon address, or None for the default one.
+        urls (list[str], optional): The URLs to queue. Defaults to None.
+        cancel (str, optional): The ID of a job to cancel. Defaults to None.
+        **options: Per-job options sent with the URLs (e.g., quality, output).
+    """
+    import daemon
+    from rich.console import Console
+
+    console = Console()
+    try:
+        if urls:
+            status, jobs = daemon.request(
+                "POST",
+                "/jobs",
+                {"urls": urls, "options": {k: v for k, v in options.items() if v}},
+                address,
+            )
+            for job in jobs:
+                if job["status"] == "rejected":
+                    console.print(
+                        f"[bold red]❌[/bold red] [yellow]{job['url']}[/yellow] [red]{job['error']}[/red]"
+                    )
+                else:
+                    console.print(
+                        f"[bold green]✓[/bold green] [dim]{job['id']}[/dim] [green]Queued {job['url']}[/green]"
+                    )
+            sys.exit(0 if all(job["status"] != "rejected" for job in jobs) else 1)
+        if cancel:
+            status, job = daemon.request("DELETE", f"/jobs/{cancel}", address=address)
+            if status != 200:
+                console.print(f"\n[bold red]❌ {job['error']}[/bold red]\n")
+                sys.exit(1)
+            console.print(
+                f"[bold green]✓[/bold green] [green]Cancelling {job['url']} ({job['status']})[/green]"
+            )
+            sys.exit(0)
+        from rich.table import Table
+
+        status, jobs = daemon.request("GET", "/jobs", address=address)
+        table = Table(title="Keep daemon jobs")
+        for column in ("ID", "Status", "Progress", "Title", "Error"):
+            table.add_column(column)
+        for job in jobs:
+            progress = job.get("progress")
+            table.add_row(
+                job["id"],
+                job["status"],
+                (
+                    f"{progress['downloaded'] * 100 // progress['total']}%"
+                    if progress and progress["total"]
+                    else ""
+                ),
+                job["title"] or job["url"],
+                job["error"] or "",
+            )
+        console.print(table)
+        sys.exit(0)
+    except OSError:
+        console.print(
+            f"\n[bold red]❌ No Keep daemon is listening on {address or daemon.default_address()}![/bold red] [yellow]Start one with --daemon.[/yellow]\n"
+        )
+        sys.exit(1)
+
+
+def refresh_components() -> None:
+    """
+    Replaces the cached remote components with freshly downloaded and verified ones, and exits.
+    """
+    from rich.console import Console
+    from cache import components_dir, refresh_components as refresh
+
+    console = Console()
+    try:
+        with console.status("[cyan]Downloading remote components..."):
+            stored = refresh()
+    except Exception as e:
+        console.print(f"\n[bold red]❌ Refreshing the components failed![/bold red] [yellow]{e}[/yellow]\n")
+        sys.exit(1)
+    for name, size in stored.items():
+        console.print(f"[bold green]✓[/bold green] [green]{name}[/green] [dim]({size} bytes)[/dim]")
+    console.print(f"\n[dim]Stored in {components_dir()}[/dim]\n")
+    sys.exit(0)
+
+
 def main():
     global intp
     try:
@@ -86,6 +243,58 @@ def main():
             help="Specify the video quality (e.g., 720p)",
             choices=quality,
         )
+        parser.add_argument(
+            "--max-size",
+            type=str,
+            metavar="size",
+            help="Download the best format whose estimated size fits (e.g., 500M)",
+        )
+        parser.add_argument(
+            "--max-bitrate",
+            type=str,
+            metavar="rate",
+            help="Download the best format whose total bitrate fits, in bytes (e.g., 500K) or bits (e.g., 4Mbit) per second",
+        )
+        parser.add_argument(
+            "--prefer-codec",
+            type=str,
+            metavar="codecs",
+            help="Video codecs preferred at the same quality, in order, to save bytes (e.g., av1,vp9)",
+        )
+        parser.add_argument(
+            "--audio-only",
+            action="store_true",
+            help="Download only the smallest audio stream, kept as downloaded without merging or embedding",
+        )
+        parser.add_argument(
+            "--min-audio-bitrate",
+            type=str,
+            metavar="rate",
+            help="Lowest acceptable bitrate of --audio-only, in bytes (e.g., 8K) or bits (e.g., 64Kbit) per second",
+        )
+        parser.add_argument(
+            "--no-reencode",
+            action="store_true",
+            help="Never re-encode or convert a stream; fail before downloading if a conversion would be needed",
+        )
+        parser.add_argument(
+            "--start",
+            type=str,
+            metavar="time",
+            help="Download only from this time on, in seconds or [HH:]MM:SS (e.g., 1:02:30)",
+        )
+        parser.add_argument(
+            "--end",
+            type=str,
+            metavar="time",
+            help="Download only up to this time, in seconds or [HH:]MM:SS",
+        )
+        parser.add_argument(
+            "--chapter",
+            type=str,
+            metavar="name",
+            help="Download only the chapter with this title, or a part of it",
+        )
         parser.add_argument(
             "--subtitle",
             "-s",
@@ -100,8 +309,270 @@ def main():
             metavar="output",
             help="Specify the output directory",
         )
+        parser.add_argument(
+            "--batch",
+            "-b",
+            type=str,
+            metavar="file",
+            help="Download every URL listed in a file, one per line (use - to read from stdin)",
+        )
+        parser.add_argument(
+            "--normalize",
+            type=str,
+            metavar="file",
+            help="Print the canonical URL of every unique video listed in a file (use - to read from stdin) and report unsupported lines",
+        )
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="Run as a long-running download service that accepts jobs from --remote clients and its local API",
+        )
+        parser.add_argument(
+            "--listen",
+            type=str,
+            metavar="address",
+            help="Daemon address: unix:/path/to/socket or host:port (default: a Unix socket in the data directory)",
+        )
+        parser.add_argument(
+            "--allow-remote",
+            action="store_true",
+            help="Let the daemon listen on a TCP address other machines can reach (its API has no authentication)",
+        )
+        parser.add_argument(
+            "--remote",
+            action="store_true",
+            help="Queue the URL or every URL of --batch on the running daemon instead of downloading it here",
+        )
+        parser.add_argument(
+            "--jobs",
+            action="store_true",
+            help="List the jobs of the running daemon",
+        )
+        parser.add_argument(
+            "--cancel",
+            type=str,
+            metavar="job",
+            help="Cancel a job of the running daemon",
+        )
+        parser.add_argument(
+            "--workers",
+            "-w",
+            type=int,
+            default=4,
+            metavar="count",
+            help="Number of concurrent downloads in batch mode (default: 4)",
+        )
+        parser.add_argument(
+            "--executor",
+            type=str,
+            default="thread",
+            choices=["thread", "process"],
+            help="Worker pool used in batch mode (default: thread)",
+        )
+        parser.add_argument(
+            "--postprocess-workers",
+            type=int,
+            metavar="count",
+            help="Number of concurrent ffmpeg post-processing jobs in batch mode (default: half the CPU count)",
+        )
+        parser.add_argument(
+            "--disk-budget",
+            type=str,
+            metavar="size",
+            help="Maximum size of downloaded streams waiting for post-processing in batch mode (e.g., 20G)",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Do not read or write the persistent video information cache",
+        )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Extract the video information again even if it is cached",
+        )
+        parser.add_argument(
+            "--refresh-components",
+            action="store_true",
+            help="Download the challenge solver scripts and the current player script again, verify them and replace the cached ones",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Download even if the video is recorded in the download archive, and do not record it",
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Hash the kept file of every archived video and download it again if it changed",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Download every job that was interrupted before it finished, continuing partial downloads",
+        )
+        parser.add_argument(
+            "--no-journal",
+            action="store_true",
+            help="Do not record jobs in the job journal, so interrupted downloads can not be resumed with --resume",
+        )
+        parser.add_argument(
+            "--concurrent-fragments",
+            "-N",
+            type=str,
+            metavar="count|auto",
+            help="Number of DASH/HLS fragments to download concurrently, or auto to tune it from measured throughput",
+        )
+        parser.add_argument(
+            "--parallel-streams",
+            action="store_true",
+            help="Download the video and audio streams at the same time",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=str,
+            metavar="size",
+            help="HTTP chunk size for direct downloads (e.g., 10M)",
+        )
+        parser.add_argument(
+            "--no-single-pass",
+            action="store_true",
+            help="Embed thumbnail, metadata and subtitles with separate ffmpeg runs after merging, as yt-dlp does",
+        )
+        parser.add_argument(
+            "--limit-rate",
+            type=str,
+            metavar="rate",
+            help="Total bandwidth shared fairly by all downloads, in bytes (e.g., 5M) or bits (e.g., 20Mbit) per second",
+        )
+        parser.add_argument(
+            "--limit-window",
+            type=str,
+            action="append",
+            metavar="HH:MM-HH:MM=rate",
+            help="Bandwidth limit during a time of day, overriding --limit-rate (e.g., 09:00-18:00=20Mbit); repeat for more windows",
+        )
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=3,
+            metavar="count",
+            help="Retries of a download that failed transiently, e.g. rate limited or timed out (default: 3)",
+        )
+        parser.add_argument(
+            "--retry-wait",
+            type=float,
+            default=2.0,
+            metavar="seconds",
+            help="Backoff before the first retry, doubled on every further one (default: 2)",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Only download playlist and channel videos newer than the last sync, and remember the newest one",
+        )
+        parser.add_argument(
+            "--metrics",
+            type=str,
+            metavar="file",
+            help="Append timing spans of every job phase and per-job bytes, throughput and retries to a file as JSON lines (use - for stdout)",
+        )
+        parser.add_argument(
+            "--metrics-textfile",
+            type=str,
+            metavar="file",
+            help="Write phase timings and counters in the Prometheus text format to a file on exit",
+        )
+        parser.add_argument(
+            "--metrics-listen",
+            type=str,
+            metavar="host:port",
+            help="Serve phase timings and counters in the Prometheus text format on http://host:port/metrics",
+        )
+        parser.add_argument(
+            "--progress",
+            type=str,
+            default="auto",
+            choices=["auto", "rich", "plain", "json", "none"],
+            help="Progress display; auto uses rich on a terminal and a plain status line otherwise (default: auto)",
+        )
         parser.add_argument("url", nargs="?", help="Video URL")
         args = parser.parse_args()
+        if args.concurrent_fragments and not (
+            args.concurrent_fragments == "auto" or args.concurrent_fragments.isdigit()
+        ):
+            parser.error("argument --concurrent-fragments/-N: expected a number or auto")
+        if args.sync and not (
+            args.batch or (args.url and utils.recognizer.playlist(args.url))
+        ):
+            parser.error("argument --sync: expected --batch or a playlist or channel URL")
+        if args.resume and (args.batch or args.url):
+            parser.error("argument --resume: not allowed with --batch or a URL")
+        if args.normalize:
+            normalize(args.normalize)
+        if args.remote and not (args.url or args.batch):
+            parser.error("argument --remote: expected a URL or --batch")
+        if args.max_size:
+            from yt_dlp.utils import parse_bytes
+
+            if not parse_bytes(args.max_size):
+                parser.error(f"argument --max-size: invalid size: {args.max_size}")
+        for name in ("start", "end"):
+            if getattr(args, name) is not None:
+                from model import seconds
+
+                try:
+                    seconds(getattr(args, name))
+                except ValueError as e:
+                    parser.error(f"argument --{name}: {e}")
+        if args.max_bitrate:
+            try:
+                utils.throttle.rate(args.max_bitrate)
+            except ValueError as e:
+                parser.error(f"argument --max-bitrate: {e}")
+        if args.min_audio_bitrate:
+            if not args.audio_only:
+                parser.error("argument --min-audio-bitrate: expected --audio-only")
+            try:
+                utils.throttle.rate(args.min_audio_bitrate)
+            except ValueError as e:
+                parser.error(f"argument --min-audio-bitrate: {e}")
+        if args.limit_rate or args.limit_window:
+            try:
+                utils.throttle.shared().configure(args.limit_rate, args.limit_window)
+            except ValueError as e:
+                parser.error(f"argument --limit-rate/--limit-window: {e}")
+        if args.metrics or args.metrics_textfile or args.metrics_listen:
+            try:
+                instrument(args.metrics, args.metrics_textfile, args.metrics_listen)
+            except (OSError, ValueError) as e:
+                parser.error(f"argument --metrics: {e}")
+        from rich.console import Console
+
+        options = {
+            "cache": not args.no_cache,
+            "refresh": args.refresh,
+            "archive": not args.no_archive,
+            "verify": args.verify,
+            "fragments": args.concurrent_fragments,
+            "parallel_streams": args.parallel_streams,
+            "chunk_size": args.chunk_size,
+            "single_pass": not args.no_single_pass,
+            "progress": args.progress,
+            "retries": args.retries,
+            "retry_wait": args.retry_wait,
+            "journal": not args.no_journal,
+            "max_size": args.max_size,
+            "max_bitrate": args.max_bitrate,
+            "prefer_codecs": args.prefer_codec
+            and [codec.strip() for codec in args.prefer_codec.split(",") if codec.strip()],
+            "start": args.start,
+            "end": args.end,
+            "chapter": args.chapter,
+            "audio_only": args.audio_only,
+            "min_audio_bitrate": args.min_audio_bitrate,
+            "copy_only": args.no_reencode,
+        }
         if args.quality:
             args.quality = args.quality.replace("p", "")
         if args.subtitle:
@@ -112,7 +583,98 @@ def main():
             console = Console()
             console.print(f"\n[red]{args.output} is not a valid directory.[/red]\n")
             sys.exit(0)
-        if not args.platform and args.url:
+        if args.refresh_components:
+            refresh_components()
+        if args.remote or args.jobs or args.cancel:
+            urls = [args.url] if args.url else []
+            if args.remote and args.batch:
+                with (
+                    sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+                ) as lines:
+                    urls += [line.strip() for line in lines if line.strip()]
+            remote(
+                args.listen,
+                [url for url in urls if not url.startswith("#")] if args.remote else None,
+                args.cancel,
+                quality=args.quality,
+                subtitle=args.subtitle,
+                output=args.output and os.path.abspath(args.output),
+                max_size=args.max_size,
+                max_bitrate=args.max_bitrate,
+                prefer_codecs=options["prefer_codecs"],
+                start=args.start,
+                end=args.end,
+                chapter=args.chapter,
+                audio_only=args.audio_only,
+                min_audio_bitrate=args.min_audio_bitrate,
+                copy_only=args.no_reencode,
+            )
+        if args.daemon:
+            import daemon
+
+            try:
+                daemon.serve(
+                    args.listen,
+                    allow_remote=args.allow_remote,
+                    workers=args.workers,
+                    postprocess_workers=args.postprocess_workers,
+                    disk_budget=args.disk_budget,
+                    quality=args.quality,
+                    subtitle=args.subtitle,
+                    output=args.output,
+                    **options,
+                )
+            except (OSError, ValueError) as e:
+                Console().print(f"\n[bold red]❌ {e}[/bold red]\n")
+                sys.exit(1)
+            sys.exit(0)
+        if args.resume:
+            from archive import journal
+
+            store = journal()
+            resumed = [job["url"] for job in store.unfinished() if job["url"]]
+            store.close()
+            if not resumed:
+                Console().print("\n[green]No interrupted downloads to resume.[/green]\n")
+                sys.exit(0)
+        if (
+            args.resume
+            or args.batch
+            or (args.url and utils.recognizer.playlist(args.url))
+        ):
+            if args.batch and args.batch != "-" and os.path.isfile(args.batch) is False:
+                console = Console()
+                console.print(f"\n[red]{args.batch} is not a valid file.[/red]\n")
+                sys.exit(0)
+            import youtube
+            from contextlib import nullcontext
+
+            # playlists and channels are downloaded like a batch of their videos
+            with (
+                nullcontext(resumed)
+                if args.resume
+                else nullcontext([args.url])
+                if not args.batch
+                else sys.stdin
+                if args.batch == "-"
+                else open(args.batch, encoding="utf-8")
+            ) as urls:
+                results = youtube.batch(
+                    urls,
+                    quality=args.quality,
+                    subtitle=args.subtitle,
+                    output=args.output,
+                    workers=args.workers,
+                    executor=args.executor,
+                    postprocess_workers=args.postprocess_workers,
+                    disk_budget=args.disk_budget,
+                    sync=args.sync,
+                    **options,
+                )
+            sys.exit(
+                0 if all(r["status"] in ("done", "skipped") for r in results) else 1
+            )
+        elif not args.platform and args.url:
             site = utils.recognizer.url(args.url)
             if site in sources:
                 intp = sources.index(site) + 1
@@ -121,6 +683,7 @@ def main():
                     quality=args.quality,
                     subtitle=args.subtitle,
                     output=args.output,
+                    **options,
                 )
             else:
                 console = Console()
@@ -136,8 +699,12 @@ def main():
                 quality=args.quality,
                 subtitle=args.subtitle,
                 output=args.output,
+                **options,
             )
         else:
+            from rich.prompt import Prompt
+            from rich.align import Align
+
             console = Console()
             console.print(
                 Align.center(
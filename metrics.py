@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+class metrics:
+    """
+    Process-wide timing spans, counters and their exporters.
+
+    Every job phase (cookies, cache lookup, extraction, selection, transfer of every stream and
+    every postprocessor) is timed as a span. Spans are summed per phase and counters such as
+    downloaded bytes, retries and finished jobs are kept for the Prometheus text format, and
+    every span is passed to the registered hooks as an event dict, e.g. to write JSON lines or
+    to start and stop a profiler around a phase.
+
+    Events:
+        start: {"event": "start", "job", "phase", "time"} when a span is entered.
+        span: {"event": "span", "job", "phase", "time", "seconds", "error", ...fields} when it ends.
+        job: {"event": "job", "job", "status", "seconds", "bytes", "throughput", "retries"} when a download ends.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+    # help texts of the exported counters
+    counters = {
+        "downloaded_bytes": "Bytes downloaded (media streams and subtitles).",
+        "retries": "Retries of transiently failed extractions and downloads.",
+        "jobs": "Finished download jobs by status.",
+    }
+
+    def __init__(self):
+        self._hooks = []
+        self._phases = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared() -> "metrics":
+        """
+        Returns the process-wide registry every downloader reports to.
+        """
+        with metrics._shared_lock:
+            if metrics._shared is None:
+                metrics._shared = metrics()
+            return metrics._shared
+
+    def hook(self, fn):
+        """
+        Registers a hook that receives every event.
+
+        Hooks run on the thread of the job, so they should be quick; exceptions they raise abort the phase.
+
+        Args:
+            fn (Callable[[dict], None]): The hook.
+
+        Returns:
+            Callable[[dict], None]: The hook, so this can be used as a decorator.
+        """
+        with self._lock:
+            self._hooks.append(fn)
+        return fn
+
+    def unhook(self, fn) -> None:
+        """
+        Removes a hook.
+
+        Args:
+            fn (Callable[[dict], None]): The hook.
+        """
+        with self._lock:
+            if fn in self._hooks:
+                self._hooks.remove(fn)
+
+    def emit(self, event: dict) -> None:
+        """
+        Passes an event to every hook.
+
+        Args:
+            event (dict): The event.
+        """
+        for hook in list(self._hooks):
+            hook(event)
+
+    def record(self, job: str, phase: str, seconds: float, error: str = None, **fields) -> None:
+        """
+        Records a finished span, e.g. one measured by yt-dlp.
+
+        Args:
+            job (str): The job key, e.g. the video ID.
+            phase (str): The phase (e.g., "transfer").
+            seconds (float): Its duration.
+            error (str, optional): The name of the exception that ended it. Defaults to None.
+            **fields: Extra event fields (e.g., bytes, postprocessor).
+        """
+        with self._lock:
+            total = self._phases.setdefault(phase, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+        if self._hooks:
+            self.emit(
+                {
+                    "event": "span",
+                    "job": job,
+                    "phase": phase,
+                    "time": time.time() - seconds,
+                    "seconds": seconds,
+                    "error": error,
+                    **fields,
+                }
+            )
+
+    @contextmanager
+    def span(self, job: str, phase: str, **fields):
+        """
+        Times the code inside the context as a span of a job.
+
+        Args:
+            job (str): The job key, e.g. the video ID.
+            phase (str): The phase (e.g., "extract").
+            **fields: Extra event fields.
+
+        Yields:
+            dict: The extra fields, so the code can add some (e.g., bytes) before the span ends.
+        """
+        if self._hooks:
+            self.emit({"event": "start", "job": job, "phase": phase, "time": time.time()})
+        error = None
+        started = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(job, phase, time.perf_counter() - started, error, **fields)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Adds to a counter.
+
+        Args:
+            name (str): The counter (e.g., "downloaded_bytes").
+            value (float, optional): The amount. Defaults to 1.
+            **labels: Labels of the counter (e.g., status="done").
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + value
+
+    def prometheus(self) -> str:
+        """
+        Formats the phase totals and counters in the Prometheus text format.
+
+        Returns:
+            str: The metrics, with keep_phase_seconds as a summary per phase and keep_<name>_total counters.
+        """
+        with self._lock:
+            phases = {phase: list(total) for phase, total in self._phases.items()}
+            counts = dict(self._counts)
+        lines = [
+            "# HELP keep_phase_seconds Time spent in each job phase.",
+            "# TYPE keep_phase_seconds summary",
+        ]
+        for phase, (count, seconds) in sorted(phases.items()):
+            lines.append(f'keep_phase_seconds_sum{{phase="{phase}"}} {seconds}')
+            lines.append(f'keep_phase_seconds_count{{phase="{phase}"}} {count}')
+        for name in sorted({name for name, _ in counts}):
+            lines.append(f"# HELP keep_{name}_total {self.counters.get(name, name)}")
+            lines.append(f"# TYPE keep_{name}_total counter")
+            for (counter, labels), value in sorted(counts.items()):
+                if counter == name:
+                    text = ",".join(f'{key}="{label}"' for key, label in labels)
+                    series = f"keep_{name}_total{{{text}}}" if text else f"keep_{name}_total"
+                    lines.append(f"{series} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Writes the Prometheus text format to a file, e.g. for node_exporter's textfile collector.
+
+        Args:
+            path (str): The file path.
+        """
+        # written next to the final name and renamed, so a scrape never reads a partial file
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(path + ".part", path)
+
+    def listen(self, address: str = "127.0.0.1:9464"):
+        """
+        Serves the Prometheus text format on /metrics in a background thread.
+
+        Args:
+            address (str, optional): The host and port to listen on. Defaults to "127.0.0.1:9464".
+
+        Returns:
+            http.server.ThreadingHTTPServer: The running server; call shutdown() to stop it.
+
+        Raises:
+            ValueError: If the address is not host:port.
+            OSError: If the address can not be bound.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        host, _, port = address.rpartition(":")
+        if not port.isdigit():
+            raise ValueError(f"invalid metrics address: {address}")
+        registry = self
+
+        class handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                data = registry.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    @staticmethod
+    def jsonl(path: str):
+        """
+        Returns a hook that appends every event to a file as a JSON line.
+
+        Args:
+            path (str): The file path, or - for stdout.
+
+        Returns:
+            Callable[[dict], None]: The hook.
+        """
+        file = sys.stdout if path == "-" else open(path, "a", encoding="utf-8", buffering=1)
+        lock = threading.Lock()
+
+        def write(event: dict) -> None:
+            line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+            with lock:
+                file.write(line)
+
+        return write
@@ -0,0 +1,140 @@
+import re
+from formats import index as format_index
+
+
+def seconds(value) -> float:
+    """
+    Parses a time of a video.
+
+    Args:
+        value (float | str): Seconds, or [[HH:]MM:]SS[.fff] (e.g., "90", "1:30", "1:02:03.5").
+
+    Returns:
+        float: The time in seconds.
+
+    Raises:
+        ValueError: If the value is not a time.
+    """
+    if isinstance(value, (int, float)):
+        total = float(value)
+    else:
+        parts = str(value).strip().split(":")
+        if len(parts) > 3 or not all(
+            re.fullmatch(r"\d+(\.\d+)?", part) for part in parts
+        ):
+            raise ValueError(f"invalid time: {value}")
+        total = 0.0
+        for part in parts:
+            total = total * 60 + float(part)
+    if total < 0:
+        raise ValueError(f"invalid time: {value}")
+    return total
+
+
+class chapter:
+    """
+    One chapter of a video.
+    """
+
+    __slots__ = ("title", "start", "end")
+
+    def __init__(self, title: str, start: float, end: float):
+        """
+        Args:
+            title (str): The chapter title.
+            start (float): Its start time in seconds.
+            end (float): Its end time in seconds.
+        """
+        self.title = title
+        self.start = start
+        self.end = end
+
+
+class video:
+    """
+    Compact view of the information of one video, holding only the fields Keep reads.
+
+    The full yt-dlp information carries every format with its URLs and fragments and every
+    automatic caption language; this view keeps the title, duration, subtitle and caption
+    languages, chapters, the best thumbnail and the format index, so the raw dict can be pruned
+    once the formats are selected.
+    """
+
+    __slots__ = (
+        "id",
+        "title",
+        "duration",
+        "subtitles",
+        "captions",
+        "chapters",
+        "thumbnail",
+        "formats",
+    )
+
+    def __init__(self, info: dict):
+        """
+        Args:
+            info (dict): The video information.
+        """
+        self.id = info.get("id")
+        self.title = info.get("title")
+        self.duration = info.get("duration")
+        self.subtitles = tuple(info.get("subtitles") or ())
+        self.captions = tuple(info.get("automatic_captions") or ())
+        self.chapters = tuple(
+            chapter(entry.get("title"), entry.get("start_time"), entry.get("end_time"))
+            for entry in info.get("chapters") or []
+        )
+        thumbnails = info.get("thumbnails") or []
+        # yt-dlp sorts the thumbnails from worst to best
+        self.thumbnail = (
+            thumbnails[-1].get("url") if thumbnails else info.get("thumbnail")
+        )
+        self.formats = format_index(info)
+
+    def languages(self) -> list[str]:
+        """
+        Returns the languages of the subtitles and automatic captions.
+
+        Returns:
+            list[str]: The language codes, sorted and without duplicates.
+        """
+        return sorted(set(self.subtitles) | set(self.captions))
+
+    def section(self, start=None, end=None, chapter: str = None) -> tuple:
+        """
+        Resolves a clip of the video from times or a chapter name.
+
+        Args:
+            start (float | str, optional): Start time, see seconds(). Defaults to the start of the chapter or video.
+            end (float | str, optional): End time, see seconds(). Defaults to the end of the chapter or video.
+            chapter (str, optional): Chapter title, or a case-insensitive part of it. Defaults to None.
+
+        Returns:
+            tuple: The start and end in seconds, and the title of the chapter or None.
+
+        Raises:
+            ValueError: If a time is invalid, no chapter matches, or the clip is empty.
+        """
+        title = None
+        first, last = 0.0, self.duration
+        if chapter:
+            found = next(
+                (c for c in self.chapters if (c.title or "").lower() == chapter.lower()),
+                None,
+            ) or next(
+                (c for c in self.chapters if chapter.lower() in (c.title or "").lower()),
+                None,
+            )
+            if found is None:
+                raise ValueError(f"no chapter matches {chapter!r}")
+            title, first, last = found.title, found.start or 0.0, found.end or self.duration
+        if start is not None:
+            first = seconds(start)
+        if end is not None:
+            last = seconds(end)
+        if last is not None and self.duration:
+            last = min(last, self.duration)
+        if last is not None and last <= first:
+            raise ValueError("the clip ends before it starts")
+        return first, last, title
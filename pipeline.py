@@ -0,0 +1,90 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class pipeline:
+    """
+    Post-processing worker pool that runs beside the download workers.
+
+    Download workers hand finished downloads over with submit() and move on to the next video
+    while ffmpeg works on the previous one. Before downloading, a worker reserves the expected
+    size of its temporary files; reserve() blocks while the files waiting for post-processing
+    would exceed the disk budget, so a slow disk throttles the downloads instead of filling up.
+    """
+
+    def __init__(self, workers: int = None, budget: int = None):
+        """
+        Args:
+            workers (int, optional): Number of concurrent post-processing jobs. Defaults to half the CPU count.
+            budget (int, optional): Maximum bytes of temporary files waiting for post-processing. Defaults to no limit.
+        """
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.budget = budget
+        self.pending = 0
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="postprocess"
+        )
+        self._space = threading.Condition()
+
+    def reserve(self, size: int) -> None:
+        """
+        Reserves disk budget for temporary files, waiting until enough is free.
+
+        A reservation larger than the whole budget is granted once nothing else is pending,
+        so a single big video can never dead-lock the pipeline.
+
+        Args:
+            size (int): Expected size of the temporary files in bytes.
+        """
+        with self._space:
+            while (
+                self.budget
+                and self.pending
+                and self.pending + size > self.budget
+            ):
+                self._space.wait()
+            self.pending += size
+
+    def release(self, size: int) -> None:
+        """
+        Returns reserved disk budget.
+
+        Args:
+            size (int): The size passed to reserve().
+        """
+        with self._space:
+            self.pending = max(0, self.pending - size)
+            self._space.notify_all()
+
+    def submit(self, fn, *args, size: int = 0, **kwargs) -> Future:
+        """
+        Schedules a post-processing job. The reserved size is released once it finishes.
+
+        Args:
+            fn (Callable): The post-processing function.
+            *args: Positional arguments for fn.
+            size (int, optional): The size reserved for this job's temporary files. Defaults to 0.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            Future: The future of the post-processing job.
+        """
+
+        def run():
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.release(size)
+
+        return self._pool.submit(run)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        Stops the worker pool.
+
+        Args:
+            wait (bool, optional): Whether to wait for running jobs. Defaults to True.
+            cancel_futures (bool, optional): Whether to cancel jobs that have not started. Defaults to False.
+        """
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -0,0 +1,188 @@
+import os
+import re
+import itertools
+from yt_dlp.postprocessor import FFmpegMetadataPP
+from yt_dlp.utils import ISO639Utils, prepend_extension, replace_extension
+
+
+class FFmpegSinglePassPP(FFmpegMetadataPP):
+    """
+    yt-dlp postprocessor that builds the final file with a single ffmpeg invocation.
+
+    It merges the separately downloaded streams and embeds subtitles, the thumbnail, metadata and
+    chapters at the same time, instead of yt-dlp's merger followed by EmbedThumbnail,
+    FFmpegMetadata and FFmpegEmbedSubtitle, each of which rewrites the whole file again.
+
+    The info dict must contain the output path in 'filepath' and the downloaded stream files, in
+    the order of 'requested_formats', in '__files_to_mux'. Subtitles and the thumbnail are taken
+    from the 'filepath' of 'requested_subtitles' and 'thumbnails' entries. When the streams are
+    a clip from 'section_start' to 'section_end', the subtitles are cut to it first.
+    """
+
+    def __init__(
+        self,
+        downloader=None,
+        add_metadata: bool = True,
+        add_chapters: bool = True,
+        embed_subtitles: bool = True,
+        embed_thumbnail: bool = True,
+    ):
+        """
+        Args:
+            downloader (yt_dlp.YoutubeDL, optional): The YoutubeDL instance. Defaults to None.
+            add_metadata (bool, optional): Whether to write title, uploader, date and similar tags. Defaults to True.
+            add_chapters (bool, optional): Whether to write chapters. Defaults to True.
+            embed_subtitles (bool, optional): Whether to embed the downloaded subtitles. Defaults to True.
+            embed_thumbnail (bool, optional): Whether to embed the downloaded thumbnail. Defaults to True.
+        """
+        super().__init__(downloader, add_metadata, add_chapters, add_infojson=False)
+        self._embed_subtitles = embed_subtitles
+        self._embed_thumbnail = embed_thumbnail
+
+    def run(self, info):
+        self._fixup_chapters(info)
+        filename, ext = info["filepath"], info["ext"]
+        inputs = list(info["__files_to_mux"])
+        files_to_delete = list(inputs)
+        options = ["-dn", "-ignore_unknown"]
+
+        # streams, mapped like yt-dlp's merger does
+        videos = audios = 0
+        for i, fmt in enumerate(info.get("requested_formats") or [info]):
+            if fmt.get("acodec") != "none":
+                options.extend(["-map", f"{i}:a:0?"])
+                if (fmt.get("protocol") or "").startswith("m3u8") and (
+                    fmt.get("acodec") or ""
+                ).startswith("mp4a"):
+                    options.extend([f"-bsf:a:{audios}", "aac_adtstoasc"])
+                audios += 1
+            if fmt.get("vcodec") != "none":
+                options.extend(["-map", f"{i}:v:0?"])
+                videos += 1
+
+        # subtitles
+        subtitles = []
+        if self._embed_subtitles:
+            for lang, sub in (info.get("requested_subtitles") or {}).items():
+                if sub.get("ext") == "json" or not os.path.exists(sub.get("filepath") or ""):
+                    continue
+                if ext == "webm" and sub.get("ext") != "vtt":
+                    continue
+                subtitles.append((lang, sub))
+        for n, (lang, sub) in enumerate(subtitles):
+            options.extend(["-map", f"{len(inputs)}:0"])
+            options.extend([f"-metadata:s:s:{n}", f"language={ISO639Utils.short2long(lang) or lang}"])
+            if sub.get("name"):
+                options.extend([f"-metadata:s:s:{n}", f"title={sub['name']}"])
+            if info.get("section_start") or info.get("section_end"):
+                clip_subtitles(sub["filepath"], info.get("section_start") or 0, info.get("section_end"))
+            inputs.append(sub["filepath"])
+            files_to_delete.append(sub["filepath"])
+
+        # chapters, through an ffmetadata input
+        if self._add_chapters and info.get("chapters"):
+            metadata_filename = replace_extension(filename, "meta")
+            # only write the ffmetadata file; its input index differs from the one it yields
+            list(self._get_chapter_opts(info["chapters"], metadata_filename))
+            options.extend(["-map_metadata", str(len(inputs)), "-map_chapters", str(len(inputs))])
+            inputs.append(metadata_filename)
+            files_to_delete.append(metadata_filename)
+
+        # thumbnail
+        thumbnail = next(
+            (
+                t["filepath"]
+                for t in reversed(info.get("thumbnails") or [])
+                if t.get("filepath") and os.path.exists(t["filepath"])
+            ),
+            None,
+        )
+        if thumbnail and self._embed_thumbnail:
+            thumbnail_ext = os.path.splitext(thumbnail)[1][1:]
+            if ext in ("mkv", "mka"):
+                options.extend(
+                    [
+                        "-attach",
+                        self._ffmpeg_filename_argument(thumbnail),
+                        "-metadata:s:t:0",
+                        f"mimetype=image/{thumbnail_ext.replace('jpg', 'jpeg')}",
+                        "-metadata:s:t:0",
+                        f"filename=cover.{thumbnail_ext}",
+                    ]
+                )
+                files_to_delete.append(thumbnail)
+            elif ext in ("mp4", "m4v", "mov", "m4a") and thumbnail_ext in ("jpg", "jpeg", "png"):
+                options.extend(["-map", f"{len(inputs)}:0", f"-disposition:v:{videos}", "attached_pic"])
+                inputs.append(thumbnail)
+                files_to_delete.append(thumbnail)
+            else:
+                self.report_warning(f"The thumbnail can not be embedded in {ext} files in a single pass")
+
+        options.extend(["-c", "copy"])
+        if ext in ("mp4", "mov", "m4a"):
+            options.extend(["-c:s", "mov_text"])
+        if self._add_metadata:
+            options.extend(itertools.chain.from_iterable(self._get_metadata_opts(info)))
+
+        temp_filename = prepend_extension(filename, "temp")
+        self.to_screen(f'Merging formats and embedding metadata into "{filename}"')
+        self.run_ffmpeg_multiple_files(inputs, temp_filename, options)
+        os.replace(temp_filename, filename)
+        return files_to_delete, info
+
+
+def clip_subtitles(path: str, start: float, end: float = None) -> None:
+    """
+    Cuts an SRT or WebVTT subtitle file to a clip, in place.
+
+    Cues outside the clip are dropped and the others are timed from its start, so they line up
+    with streams that were cut at the same times.
+
+    Args:
+        path (str): The subtitle file.
+        start (float): Start of the clip in seconds.
+        end (float, optional): End of the clip in seconds. Defaults to the end of the video.
+    """
+    timing = re.compile(
+        r"((?:\d+:)?\d{2}:\d{2}[,.]\d{3})\s*-->\s*((?:\d+:)?\d{2}:\d{2}[,.]\d{3})(.*)"
+    )
+
+    def parse(stamp: str) -> float:
+        total = 0.0
+        for part in stamp.replace(",", ".").split(":"):
+            total = total * 60 + float(part)
+        return total
+
+    def format(seconds: float, separator: str) -> str:
+        millis = round(seconds * 1000)
+        return "%02d:%02d:%02d%s%03d" % (
+            millis // 3600000,
+            millis // 60000 % 60,
+            millis // 1000 % 60,
+            separator,
+            millis % 1000,
+        )
+
+    with open(path, encoding="utf-8-sig") as f:
+        blocks = re.split(r"\n\s*\n", f.read().replace("\r\n", "\n").strip())
+    kept = []
+    for block in blocks:
+        lines = block.split("\n")
+        index = next((i for i, line in enumerate(lines) if timing.search(line)), None)
+        if index is None:
+            # WebVTT header, style and note blocks
+            kept.append(block)
+            continue
+        first, last, settings = timing.search(lines[index]).groups()
+        cue_start, cue_end = parse(first), parse(last)
+        if cue_end <= start or (end is not None and cue_start >= end):
+            continue
+        cue_end = min(cue_end, end) if end is not None else cue_end
+        separator = "," if "," in first else "."
+        lines[index] = (
+            f"{format(max(cue_start - start, 0), separator)} --> "
+            f"{format(cue_end - start, separator)}{settings}"
+        )
+        kept.append("\n".join(lines))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(kept) + "\n")
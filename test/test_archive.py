@@ -0,0 +1,70 @@
+# import archive module from parent directory
+import sys
+import os
+import hashlib
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import archive
+
+
+def test_downloads(tmp_path):
+    kept = tmp_path / "video.mkv"
+    kept.write_bytes(b"video")
+    index = archive.downloads(path=str(tmp_path / "archive.sqlite"))
+    assert index.get("youtube", "_9TgVAYP3XA") is None
+    index.add("youtube", "_9TgVAYP3XA", str(kept), format="137+140")
+    record = index.get("youtube", "_9TgVAYP3XA")
+    assert record["path"] == str(kept)
+    assert record["format"] == "137+140"
+    # the file is only hashed when it is verified
+    assert record["sha256"] is None
+    assert index.verify("youtube", "_9TgVAYP3XA") is True
+    record = index.get("youtube", "_9TgVAYP3XA")
+    assert record["sha256"] == hashlib.sha256(b"video").hexdigest()
+    kept.write_bytes(b"other")
+    assert index.verify("youtube", "_9TgVAYP3XA") is False
+    kept.unlink()
+    assert index.get("youtube", "_9TgVAYP3XA") is None
+
+
+def test_file_hash(tmp_path):
+    data = os.urandom(3000)
+    (tmp_path / "data").write_bytes(data)
+    assert archive.file_hash(str(tmp_path / "data"), chunk_size=1024) == hashlib.sha256(data).hexdigest()
+
+
+def test_marks(tmp_path):
+    marks = archive.marks(str(tmp_path / "archive.sqlite"))
+    assert marks.get("https://www.youtube.com/@channel") is None
+    marks.put("https://www.youtube.com/@channel", "_9TgVAYP3XA", "20260101")
+    mark = marks.get("https://www.youtube.com/@channel")
+    assert (mark["video_id"], mark["upload_date"]) == ("_9TgVAYP3XA", "20260101")
+    marks.delete("https://www.youtube.com/@channel")
+    assert marks.get("https://www.youtube.com/@channel") is None
+    marks.close()
+
+
+def test_journal(tmp_path):
+    import pytest
+
+    jobs = archive.journal(path=str(tmp_path / "journal.sqlite"))
+    assert jobs.get("youtube", "_9TgVAYP3XA") is None
+    jobs.update("youtube", "_9TgVAYP3XA", "queued", url="https://www.youtube.com/watch?v=_9TgVAYP3XA")
+    jobs.update("youtube", "_9TgVAYP3XA", "downloading", format="137+140", temp=["title.f137.mp4.part"], downloaded=1024)
+    jobs.close()
+    # a new connection, as after a restart, sees every committed change
+    jobs = archive.journal(path=str(tmp_path / "journal.sqlite"))
+    jobs.update("youtube", "_9TgVAYP3XA", "extracting")
+    record = jobs.get("youtube", "_9TgVAYP3XA")
+    assert record["state"] == "extracting"
+    assert record["format"] == "137+140"
+    assert record["temp"] == ["title.f137.mp4.part"]
+    assert record["downloaded"] == 1024
+    jobs.update("youtube", "jNQXAC9IVRw", "done")
+    assert [job["video_id"] for job in jobs.unfinished()] == ["_9TgVAYP3XA"]
+    with pytest.raises(ValueError):
+        jobs.update("youtube", "_9TgVAYP3XA", "paused")
+    with pytest.raises(ValueError):
+        jobs.update("youtube", "_9TgVAYP3XA", "done", path="x")
@@ -0,0 +1,109 @@
+# import benchmark module from parent directory
+import sys
+import os
+import json
+import urllib.request
+from shutil import which
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import benchmark
+import youtube
+
+pytestmark = pytest.mark.skipif(which("ffmpeg") is None, reason="ffmpeg is required")
+
+
+@pytest.fixture(scope="module")
+def service(tmp_path_factory):
+    files = benchmark.media(str(tmp_path_factory.mktemp("media")), seconds=2, height=144)
+    with benchmark.server(files, seconds=2, height=144, fragments=4) as service:
+        yield service
+
+
+@pytest.fixture
+def offline(service, tmp_path, monkeypatch):
+    # keeps the data and caches in the test directory and serves YouTube from the local server;
+    # yields the options every offline download shares
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("KEEP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    with benchmark.offline(service.url):
+        yield {
+            "cookie": benchmark.cookies(str(tmp_path)),
+            "output": str(tmp_path),
+            "cache": False,
+            "journal": False,
+        }
+
+
+def test_server(service):
+    with urllib.request.urlopen(f"{service.url}/api/keep0000000") as response:
+        info = json.load(response)
+    assert info["id"] == "keep0000000" and len(info["formats"][1]["fragments"]) == 4
+    request = urllib.request.Request(
+        f"{service.url}/media/audio.m4a", headers={"Range": "bytes=10-19"}
+    )
+    with urllib.request.urlopen(request) as response:
+        assert response.status == 206
+        assert response.read() == service.files["audio.m4a"][10:20]
+    video = b""
+    for n in range(4):
+        with urllib.request.urlopen(f"{service.url}/fragments/video.mp4/{n}") as response:
+            video += response.read()
+    assert video == service.files["video.mp4"]
+
+
+def test_offline_download(offline, tmp_path):
+    dd = youtube.downloader(
+        url=benchmark.watch(0), interactive=False, subtitle=["en"], **offline
+    )
+    dd.download()
+    assert os.path.isfile(tmp_path / "Keep benchmark keep0000000.mkv")
+
+
+def test_offline_clip(offline, tmp_path):
+    import subprocess
+
+    dd = youtube.downloader(
+        url=benchmark.watch(1), interactive=False, chapter="second", **offline
+    )
+    assert dd.clip == (1, 2, "Second half")
+    dd.download()
+    path = tmp_path / "Keep benchmark keep0000001 [Second half].mkv"
+    probe = subprocess.run([which("ffmpeg"), "-i", str(path)], capture_output=True, text=True)
+    assert "Duration: 00:00:01." in probe.stderr
+
+
+def test_offline_audio_only(offline, service, tmp_path):
+    dd = youtube.downloader(
+        url=benchmark.watch(2),
+        interactive=False,
+        audio_only=True,
+        copy_only=True,
+        **offline,
+    )
+    dd.download()
+    # the audio stream is kept as downloaded, without a video stream or any rewrite
+    path = tmp_path / "Keep benchmark keep0000002.m4a"
+    assert path.read_bytes() == service.files["audio.m4a"]
+
+
+def test_offline_batch_json(offline, capfd):
+    results = youtube.batch(
+        [benchmark.watch(3)], workers=1, archive=False, progress="json", **offline
+    )
+    assert [result["status"] for result in results] == ["done"]
+    # yt-dlp must not draw its own progress bar between the JSON lines
+    lines = [line for line in capfd.readouterr().out.splitlines() if line.strip()]
+    assert lines and all(isinstance(json.loads(line), dict) for line in lines)
+
+
+def test_compare():
+    baseline = {"results": {"single": {"seconds": 1.0, "bytes_per_second": 100.0}}}
+    current = {"results": {"single": {"seconds": 1.05, "bytes_per_second": 80.0}}}
+    rows = {row["metric"]: row for row in benchmark.compare(baseline, current, 0.1)}
+    assert rows["seconds"]["regressed"] is False
+    assert rows["bytes_per_second"]["regressed"] is True
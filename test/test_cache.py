@@ -0,0 +1,130 @@
+# import cache module from parent directory
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import cache
+
+
+def test_metadata_roundtrip(tmp_path):
+    store = cache.metadata(path=str(tmp_path / "metadata.sqlite"))
+    assert store.get("_9TgVAYP3XA") is None
+    store.put("_9TgVAYP3XA", {"title": "title", "formats": []})
+    assert store.get("_9TgVAYP3XA") == {"title": "title", "formats": []}
+    store.delete("_9TgVAYP3XA")
+    assert store.get("_9TgVAYP3XA") is None
+
+
+def test_metadata_expiry(tmp_path):
+    store = cache.metadata(path=str(tmp_path / "metadata.sqlite"), margin=60)
+    expire = int(time.time()) + 600
+    info = {
+        "formats": [
+            {"url": f"https://rr1.googlevideo.com/videoplayback?expire={expire}&id=1"},
+            {"manifest_url": f"https://manifest.googlevideo.com/api/expire/{expire + 60}/id/1"},
+        ]
+    }
+    assert store.expiry(info) == expire - 60
+    info["formats"][0]["url"] = "https://rr1.googlevideo.com/videoplayback?expire=1"
+    store.put("_9TgVAYP3XA", info)
+    assert store.get("_9TgVAYP3XA") is None
+
+
+def test_metadata_lru_eviction(tmp_path):
+    store = cache.metadata(path=str(tmp_path / "metadata.sqlite"))
+    store.put("aaaaaaaaaaa", {"title": "a"})
+    store.max_bytes = 2 * store._db.execute("SELECT size FROM info").fetchone()[0]
+    store.put("bbbbbbbbbbb", {"title": "b"})
+    assert store.get("aaaaaaaaaaa") == {"title": "a"}
+    store.put("ccccccccccc", {"title": "c"})
+    assert store.get("bbbbbbbbbbb") is None
+    assert store.get("aaaaaaaaaaa") == {"title": "a"}
+    assert store.get("ccccccccccc") == {"title": "c"}
+
+
+def test_players(tmp_path):
+    store = cache.players(path=str(tmp_path), keep=2)
+    store["1b1f0ad8-main"] = "var player = 1;"
+    cache.players._loaded.clear()
+    # a new process finds the script on disk
+    assert cache.players(path=str(tmp_path)).get("1b1f0ad8-main") == "var player = 1;"
+    for key in ("2c2f0ad8-main", "3d3f0ad8-main"):
+        time.sleep(0.01)
+        store[key] = "var player = 2;"
+    assert "1b1f0ad8-main" not in store
+    assert sorted(key for key, _ in store.items()) == ["2c2f0ad8-main", "3d3f0ad8-main"]
+    # a tampered script fails its integrity check and is removed
+    cache.players._loaded.clear()
+    file = store._file("3d3f0ad8-main")
+    with open(file, encoding="utf-8") as f:
+        tampered = f.read().replace("player = 2", "player = 3")
+    with open(file, "w", encoding="utf-8") as f:
+        f.write(tampered)
+    assert store.get("3d3f0ad8-main") is None
+    assert not os.path.exists(file)
+
+
+def test_players_install(tmp_path, monkeypatch):
+    import yt_dlp
+
+    monkeypatch.setenv("KEEP_CACHE_DIR", str(tmp_path))
+    with yt_dlp.YoutubeDL({"quiet": True, "cachedir": cache.components_dir()}) as ydl:
+        extractor = ydl.get_info_extractor("Youtube")
+        extractor._code_cache["1b1f0ad8-main"] = "var player = 1;"
+        store = cache.players.install(ydl)
+        assert extractor._code_cache is store
+        assert cache.players.install(ydl) is store
+    assert os.path.exists(os.path.join(str(tmp_path), "components", "youtube-player", "1b1f0ad8-main.json"))
+
+
+def test_refresh_components_verifies(tmp_path, monkeypatch):
+    import io
+    import pytest
+    from unittest.mock import patch
+
+    monkeypatch.setenv("KEEP_CACHE_DIR", str(tmp_path))
+    seeded = os.path.join(cache.components_dir(), "challenge-solver")
+    os.makedirs(seeded)
+    with patch("yt_dlp.YoutubeDL.YoutubeDL.urlopen", return_value=io.BytesIO(b"tampered")):
+        with pytest.raises(ValueError):
+            cache.refresh_components()
+    # the cache is left alone when a download fails its check
+    assert os.path.isdir(seeded)
+
+
+def test_players_install_fallback():
+    import pytest
+    from unittest.mock import MagicMock
+
+    ydl = MagicMock()
+    ydl.get_info_extractor.return_value = object()
+    # a yt-dlp release without the private player cache keeps its stock behaviour
+    with pytest.warns(RuntimeWarning):
+        assert cache.players.install(ydl) is None
+
+
+def test_refresh_components_keeps_foreign_entries(tmp_path, monkeypatch):
+    import io
+    import hashlib
+    from unittest.mock import patch
+    from yt_dlp.extractor.youtube import YoutubeIE
+    from yt_dlp.extractor.youtube.jsc._builtin import vendor
+
+    monkeypatch.setenv("KEEP_CACHE_DIR", str(tmp_path))
+    root = cache.components_dir()
+    os.makedirs(os.path.join(root, "youtube-sigfuncs"))
+    cache.players()["0a0a0a0a-main"] = "var player = 0;"
+    for name in ("yt.solver.lib.min.js", "yt.solver.core.min.js"):
+        monkeypatch.setitem(vendor.HASHES, name, hashlib.sha3_512(b"solver").hexdigest())
+    url = "https://www.youtube.com/s/player/1b1f0ad8/player_ias.vflset/en_US/base.js"
+    with patch("yt_dlp.YoutubeDL.YoutubeDL.urlopen", side_effect=lambda url: io.BytesIO(b"solver")), patch.object(
+        YoutubeIE, "_download_player_url", return_value=url
+    ), patch.object(YoutubeIE, "_load_player", return_value="var player = 1;"):
+        stored = cache.refresh_components()
+    assert stored["player 1b1f0ad8-main"] == len("var player = 1;")
+    # only the solver and player scripts are replaced, yt-dlp's own entries stay
+    assert os.path.isdir(os.path.join(root, "youtube-sigfuncs"))
+    assert cache.players().get("0a0a0a0a-main") is None
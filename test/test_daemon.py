@@ -0,0 +1,112 @@
+# import daemon module from parent directory
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import daemon
+
+
+def test_jobs(tmp_path, monkeypatch):
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    release = threading.Event()
+    calls = []
+
+    def fake_job(url, options):
+        calls.append((url, options))
+        release.wait(5)
+        return {"url": url, "title": "title", "status": "done", "error": None, "retryable": False}
+
+    service = daemon.daemon(workers=1, cache=False)
+    with patch("youtube._job", fake_job):
+        first = service.submit("https://youtu.be/_9TgVAYP3XA", quality="720")
+        second = service.submit("https://www.youtube.com/shorts/jNQXAC9IVRw")
+        assert second["url"] == "https://www.youtube.com/watch?v=jNQXAC9IVRw"
+        # the second job is still queued behind the only worker
+        assert service.cancel(second["id"])["status"] == "cancelled"
+        release.set()
+        service.shutdown()
+    assert service.status(first["id"])["status"] == "done"
+    assert [job["status"] for job in service.list()] == ["done", "cancelled"]
+    url, options = calls[0]
+    assert options["quality"] == "720" and options["warm"] is True and options["cache"] is False
+    assert service.status("unknown") is None
+
+
+def test_submit_rejects(tmp_path, monkeypatch):
+    import pytest
+
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    service = daemon.daemon(workers=1)
+    with pytest.raises(ValueError):
+        service.submit("https://vimeo.com/347119375")
+    with pytest.raises(ValueError):
+        service.submit("https://youtu.be/_9TgVAYP3XA", cookie="/etc/passwd")
+    service.shutdown()
+
+
+def test_api(tmp_path, monkeypatch):
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    address = f"unix:{tmp_path / 'keep.sock'}"
+    server = daemon.listen(address)
+    server.service = daemon.daemon(workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def fake_job(url, options):
+        return {"url": url, "title": "title", "status": "failed", "error": "Private video", "retryable": False}
+
+    try:
+        with patch("youtube._job", fake_job):
+            status, jobs = daemon.request(
+                "POST", "/jobs", {"urls": ["https://youtu.be/_9TgVAYP3XA", "bad"]}, address
+            )
+            assert status == 201
+            assert [job["status"] for job in jobs] == ["queued", "rejected"]
+            server.service.shutdown()
+        status, job = daemon.request("GET", f"/jobs/{jobs[0]['id']}", address=address)
+        assert (status, job["status"], job["error"]) == (200, "failed", "Private video")
+        status, listed = daemon.request("GET", "/jobs", address=address)
+        assert [job["id"] for job in listed] == [jobs[0]["id"]]
+        assert daemon.request("DELETE", "/jobs/unknown", address=address)[0] == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_listen_refuses_remote():
+    import pytest
+
+    with pytest.raises(ValueError):
+        daemon.listen("0.0.0.0:0")
+    server = daemon.listen("127.0.0.1:0")
+    server.server_close()
+    server = daemon.listen("0.0.0.0:0", allow_remote=True)
+    server.server_close()
+
+
+def test_cancel_journaled(tmp_path, monkeypatch):
+    import archive
+
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    release = threading.Event()
+
+    def fake_job(url, options):
+        release.wait(5)
+        return {"url": url, "title": "title", "status": "failed", "error": "Download cancelled", "retryable": False}
+
+    service = daemon.daemon(workers=1)
+    with patch("youtube._job", fake_job):
+        running = service.submit("https://youtu.be/_9TgVAYP3XA")
+        queued = service.submit("https://youtu.be/jNQXAC9IVRw")
+        service.cancel(queued["id"])
+        service.cancel(running["id"])
+        release.set()
+        service.shutdown()
+    jobs = archive.journal()
+    assert jobs.get("youtube", "jNQXAC9IVRw")["state"] == "cancelled"
+    assert jobs.get("youtube", "_9TgVAYP3XA")["state"] == "cancelled"
+    assert jobs.unfinished() == []
@@ -0,0 +1,46 @@
+# import dashboard module from parent directory
+import sys
+import os
+import json
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+from dashboard import dashboard
+
+
+def test_hook_aggregates_streams():
+    board = dashboard("plain", total=3)
+    hook = board.hook("a", "first")
+    hook({"status": "downloading", "filename": "v", "downloaded_bytes": 50, "total_bytes": 100, "speed": 10.0})
+    hook({"status": "downloading", "filename": "a", "downloaded_bytes": 10, "total_bytes_estimate": 20, "speed": 5.0})
+    board.hook("b")({"status": "finished", "filename": "b", "total_bytes": 30})
+    snapshot = board.snapshot()
+    first = snapshot["jobs"][0]
+    assert (first["title"], first["downloaded"], first["total"], first["speed"]) == ("first", 60, 120, 15.0)
+    assert first["eta"] == 4.0
+    assert (snapshot["downloaded"], snapshot["total"], snapshot["active"]) == (90, 150, 2)
+    board.finish("b")
+    assert board.snapshot()["active"] == 1
+    assert board.line().startswith("1/3 jobs finished, 1 active")
+
+
+def test_hook_does_not_render():
+    board = dashboard("rich")
+    hook = board.hook("a")
+    with patch.object(dashboard, "render") as render:
+        for i in range(10000):
+            hook({"status": "downloading", "filename": "v", "downloaded_bytes": i, "total_bytes": 10000, "speed": 1.0})
+    render.assert_not_called()
+    assert board.snapshot()["downloaded"] == 9999
+
+
+def test_json_events(capsys):
+    with dashboard("json", interval=60, total=1) as board:
+        board.hook("a")({"status": "finished", "filename": "v", "total_bytes": 10})
+        board.finish("a")
+        board.event({"event": "job", "url": "a", "status": "done"})
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert lines[0] == {"event": "job", "url": "a", "status": "done"}
+    assert lines[-1]["event"] == "progress" and lines[-1]["done"] == 1
@@ -0,0 +1,53 @@
+# import formats module from parent directory
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import formats
+
+info = {
+    "duration": 100,
+    "formats": [
+        {"format_id": "sb0", "vcodec": "none", "acodec": "none", "height": 90},
+        {"format_id": "140", "vcodec": "none", "acodec": "mp4a.40.2", "video_ext": "none", "tbr": 128},
+        {"format_id": "251", "vcodec": "none", "acodec": "opus", "video_ext": "none", "tbr": 64, "filesize": 800_000},
+        {"format_id": "136", "vcodec": "avc1.4d401f", "acodec": "none", "height": 720, "fps": 30, "tbr": 2600},
+        {"format_id": "247", "vcodec": "vp09.00.31.08", "acodec": "none", "height": 720, "fps": 30, "tbr": 1500},
+        {"format_id": "398", "vcodec": "av01.0.05M.08", "acodec": "none", "height": 720, "fps": 30, "tbr": 1100},
+        {"format_id": "137", "vcodec": "avc1.640028", "acodec": "none", "height": 1080, "fps": 30, "filesize_approx": 60_000_000},
+        {"format_id": "18", "vcodec": "avc1.42001E", "acodec": "mp4a.40.2", "height": 360, "fps": 30, "tbr": 500},
+    ],
+}
+
+
+def test_index():
+    index = formats.index(info)
+    assert formats.codec("av01.0.05M.08") == "av1" and formats.codec("none") is None
+    assert index.heights() == [360, 720, 1080]
+    assert [entry.id for entry in index.audio] == ["140", "251"]
+    assert [entry.id for entry in index.muxed] == ["18"]
+    # sizes are estimated from the bitrate and duration when not reported
+    assert index.audio[0].size == 1_600_000
+
+
+def test_select_policies():
+    index = formats.index(info)
+    assert index.select()["format"] == "137+140"
+    assert index.select(height=720)["format"] == "136+140"
+    assert index.select(height=720, prefer=["av1", "vp9"])["format"] == "398+140"
+    # the best combination within the budget, down to a lower height if needed
+    assert index.select(max_size=20_000_000)["format"] == "247+251"
+    assert index.select(max_size=7_000_000)["format"] == "18"
+    assert index.select(max_bitrate=1200)["format"] == "398+251"
+    assert index.select(max_size=1_000_000) is None
+
+
+def test_select_audio():
+    index = formats.index(info)
+    assert index.select_audio()["format"] == "251"
+    assert index.select_audio(min_bitrate=100)["format"] == "140"
+    assert index.select_audio(min_bitrate=100, max_size=1_000_000) is None
+    assert formats.fits("mkv", "vp9") and formats.fits("webm", "opus")
+    assert not formats.fits("m4a", "opus") and not formats.fits("avi", "h264")
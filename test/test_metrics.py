@@ -0,0 +1,61 @@
+# import metrics module from parent directory
+import sys
+import os
+import json
+import urllib.request
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import metrics
+
+
+def test_spans_and_hooks(tmp_path):
+    registry = metrics.metrics()
+    events = []
+    registry.hook(events.append)
+    registry.hook(metrics.metrics.jsonl(str(tmp_path / "events.jsonl")))
+    with registry.span("_9TgVAYP3XA", "extract") as span:
+        span["shared"] = False
+    with pytest.raises(KeyError):
+        with registry.span("_9TgVAYP3XA", "select"):
+            raise KeyError("height")
+    registry.record("_9TgVAYP3XA", "transfer", 2.0, bytes=1000)
+    assert [(event["event"], event["phase"]) for event in events] == [
+        ("start", "extract"),
+        ("span", "extract"),
+        ("start", "select"),
+        ("span", "select"),
+        ("span", "transfer"),
+    ]
+    assert events[1]["shared"] is False and events[3]["error"] == "KeyError"
+    with open(tmp_path / "events.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["phase"] for line in f] == ["extract", "extract", "select", "select", "transfer"]
+    registry.unhook(events.append)
+    registry.record("_9TgVAYP3XA", "transfer", 1.0)
+    assert len(events) == 5
+
+
+def test_prometheus(tmp_path):
+    registry = metrics.metrics()
+    registry.record("_9TgVAYP3XA", "transfer", 2.0)
+    registry.record("_9TgVAYP3XA", "transfer", 1.5)
+    registry.count("jobs", status="done")
+    registry.count("downloaded_bytes", 1000)
+    text = registry.prometheus()
+    assert 'keep_phase_seconds_sum{phase="transfer"} 3.5' in text
+    assert 'keep_phase_seconds_count{phase="transfer"} 2' in text
+    assert 'keep_jobs_total{status="done"} 1' in text
+    assert "keep_downloaded_bytes_total 1000" in text
+    registry.write(str(tmp_path / "keep.prom"))
+    assert (tmp_path / "keep.prom").read_text() == text
+    server = registry.listen("127.0.0.1:0")
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            assert response.read().decode() == text
+    finally:
+        server.shutdown()
+        server.server_close()
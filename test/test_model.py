@@ -0,0 +1,53 @@
+# import model module from parent directory
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import model
+
+
+def test_video():
+    video = model.video(
+        {
+            "id": "_9TgVAYP3XA",
+            "title": "title",
+            "duration": 100,
+            "subtitles": {"en": [{"ext": "vtt"}]},
+            "automatic_captions": {"en": [], "de": []},
+            "chapters": [{"title": "Intro", "start_time": 0, "end_time": 10.5}],
+            "thumbnails": [{"url": "low.jpg"}, {"url": "high.jpg"}],
+            "formats": [{"format_id": "18", "vcodec": "avc1", "acodec": "mp4a", "height": 360}],
+        }
+    )
+    assert (video.id, video.title, video.duration) == ("_9TgVAYP3XA", "title", 100)
+    assert video.languages() == ["de", "en"]
+    assert [(c.title, c.start, c.end) for c in video.chapters] == [("Intro", 0, 10.5)]
+    assert video.thumbnail == "high.jpg"
+    assert video.formats.heights() == [360]
+    # slotted, so no per-instance dict is kept
+    assert not hasattr(video, "__dict__")
+
+
+def test_section():
+    video = model.video(
+        {
+            "duration": 100,
+            "chapters": [
+                {"title": "Intro", "start_time": 0, "end_time": 10},
+                {"title": "Main part", "start_time": 10, "end_time": 100},
+            ],
+        }
+    )
+    assert model.seconds("1:02:03.5") == 3723.5 and model.seconds(90) == 90
+    assert video.section(chapter="main") == (10, 100, "Main part")
+    assert video.section(start="1:30", end=200) == (90, 100, None)
+    with pytest.raises(ValueError):
+        model.seconds("1:xx")
+    with pytest.raises(ValueError):
+        video.section(chapter="credits")
+    with pytest.raises(ValueError):
+        video.section(start=50, end=40)
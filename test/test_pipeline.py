@@ -0,0 +1,48 @@
+# import pipeline module from parent directory
+import sys
+import os
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+from pipeline import pipeline
+
+
+def test_reserve_waits_for_budget():
+    post = pipeline(workers=1, budget=100)
+    post.reserve(80)
+    reserved = threading.Event()
+
+    def download():
+        post.reserve(50)
+        reserved.set()
+
+    thread = threading.Thread(target=download)
+    thread.start()
+    assert not reserved.wait(0.2)
+    post.submit(lambda: None, size=80).result(timeout=5)
+    assert reserved.wait(5)
+    thread.join()
+    assert post.pending == 50
+    post.shutdown()
+
+
+def test_reserve_oversized():
+    post = pipeline(workers=1, budget=10)
+    post.reserve(1000)
+    assert post.pending == 1000
+    post.release(1000)
+    assert post.pending == 0
+    post.shutdown()
+
+
+def test_submit_overlaps_downloads():
+    post = pipeline(workers=2)
+    release = threading.Event()
+    futures = [post.submit(release.wait, 5) for _ in range(2)]
+    # both jobs run while the caller is free to keep downloading
+    assert not any(future.done() for future in futures)
+    release.set()
+    assert all(future.result(timeout=5) for future in futures)
+    post.shutdown()
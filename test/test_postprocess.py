@@ -0,0 +1,121 @@
+# import postprocess module from parent directory
+import sys
+import os
+import shutil
+import subprocess
+import pytest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import yt_dlp
+from yt_dlp.postprocessor import (
+    FFmpegEmbedSubtitlePP,
+    FFmpegMergerPP,
+    FFmpegMetadataPP,
+    FFmpegPostProcessor,
+)
+import postprocess
+
+ffmpeg = shutil.which("ffmpeg")
+pytestmark = pytest.mark.skipif(ffmpeg is None, reason="ffmpeg not found")
+
+
+def media(tmp_path) -> dict:
+    """
+    Creates synthetic video, audio, subtitle and thumbnail files and an info dict describing them.
+    """
+
+    def run(*args):
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", *args], check=True)
+
+    video, audio = str(tmp_path / "title.f1.mp4"), str(tmp_path / "title.f2.m4a")
+    subtitle, thumbnail = str(tmp_path / "title.en.srt"), str(tmp_path / "title.jpg")
+    run("-f", "lavfi", "-i", "testsrc=size=640x360:rate=25:duration=4", "-c:v", "mpeg4", "-q:v", "2", video)
+    run("-f", "lavfi", "-i", "sine=frequency=440:duration=4", "-c:a", "aac", audio)
+    run("-f", "lavfi", "-i", "color=red:size=64x64", "-frames:v", "1", thumbnail)
+    with open(subtitle, "w", encoding="utf-8") as f:
+        f.write("1\n00:00:00,000 --> 00:00:02,000\nHello\n")
+    return {
+        "id": "_9TgVAYP3XA",
+        "title": "title",
+        "ext": "mkv",
+        "duration": 4,
+        "filepath": str(tmp_path / "title.mkv"),
+        "requested_formats": [
+            {"format_id": "1", "ext": "mp4", "vcodec": "mpeg4", "acodec": "none", "protocol": "https"},
+            {"format_id": "2", "ext": "m4a", "vcodec": "none", "acodec": "mp4a.40.2", "protocol": "https"},
+        ],
+        "requested_subtitles": {"en": {"ext": "srt", "filepath": subtitle}},
+        "thumbnails": [{"id": "0", "filepath": thumbnail}],
+        "chapters": [
+            {"start_time": 0, "end_time": 2, "title": "One"},
+            {"start_time": 2, "end_time": 4, "title": "Two"},
+        ],
+        "__files_to_mux": [video, audio],
+        "__files_to_merge": [video, audio],
+    }
+
+
+def written(pps: list, info: dict) -> int:
+    """
+    Runs postprocessors in order and returns the number of bytes every ffmpeg invocation wrote.
+    """
+    total = 0
+    run_ffmpeg = FFmpegPostProcessor.real_run_ffmpeg
+
+    def counting(self, input_path_opts, output_path_opts, **kwargs):
+        nonlocal total
+        result = run_ffmpeg(self, input_path_opts, output_path_opts, **kwargs)
+        total += sum(os.path.getsize(path) for path, _ in output_path_opts)
+        return result
+
+    with patch.object(FFmpegPostProcessor, "real_run_ffmpeg", counting):
+        for pp in pps:
+            pp.run(info)
+    return total
+
+
+def test_single_pass(tmp_path):
+    info = media(tmp_path)
+    with yt_dlp.YoutubeDL({"quiet": True}) as ydl:
+        files_to_delete, info = postprocess.FFmpegSinglePassPP(ydl).run(info)
+    probe = subprocess.run([ffmpeg, "-i", info["filepath"]], capture_output=True, text=True).stderr
+    assert "Video:" in probe and "Audio:" in probe and "Subtitle:" in probe
+    assert "Attachment:" in probe or "(attached pic)" in probe
+    assert "Chapter #0:1" in probe
+    assert "title.en.srt" in " ".join(files_to_delete)
+
+
+def test_bytes_written_per_final_byte(tmp_path):
+    """
+    Benchmark: yt-dlp's merger plus separate metadata and subtitle rewrites against a single pass.
+    """
+    (tmp_path / "legacy").mkdir()
+    (tmp_path / "single").mkdir()
+    legacy_info, single_info = media(tmp_path / "legacy"), media(tmp_path / "single")
+    with yt_dlp.YoutubeDL({"quiet": True}) as ydl:
+        legacy = written(
+            [FFmpegMergerPP(ydl), FFmpegMetadataPP(ydl, add_infojson=False), FFmpegEmbedSubtitlePP(ydl)],
+            legacy_info,
+        )
+        single = written([postprocess.FFmpegSinglePassPP(ydl, embed_thumbnail=False)], single_info)
+    legacy_ratio = legacy / os.path.getsize(legacy_info["filepath"])
+    single_ratio = single / os.path.getsize(single_info["filepath"])
+    assert single_ratio < 1.05
+    assert legacy_ratio > 2.5
+
+
+def test_clip_subtitles(tmp_path):
+    path = tmp_path / "title.en.vtt"
+    path.write_text(
+        "WEBVTT\n\n00:00.000 --> 00:02.000\nOne\n\n00:02.000 --> 00:04.000 align:start\nTwo\n\n"
+        "00:04.000 --> 00:06.000\nThree\n",
+        encoding="utf-8",
+    )
+    postprocess.clip_subtitles(str(path), 3, 5)
+    assert path.read_text(encoding="utf-8") == (
+        "WEBVTT\n\n00:00:00.000 --> 00:00:01.000 align:start\nTwo\n\n"
+        "00:00:01.000 --> 00:00:02.000\nThree\n"
+    )
@@ -0,0 +1,71 @@
+# import utils module from parent directory
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# test file
+import utils
+
+
+def test_canonicalize():
+    for link in (
+        "https://www.youtube.com/watch?v=_9TgVAYP3XA",
+        "www.youtube.com/watch?feature=share&v=_9TgVAYP3XA&t=42s",
+        "https://m.youtube.com/watch?v=_9TgVAYP3XA",
+        "https://music.youtube.com/watch?v=_9TgVAYP3XA&list=RDAMVM_9TgVAYP3XA",
+        "https://youtube.com/shorts/_9TgVAYP3XA?si=abc",
+        "https://www.youtube.com/embed/_9TgVAYP3XA",
+        "https://www.youtube-nocookie.com/embed/_9TgVAYP3XA?start=10",
+        "https://youtu.be/_9TgVAYP3XA?t=3",
+        "  HTTPS://WWW.YOUTUBE.COM/live/_9TgVAYP3XA  ",
+    ):
+        assert utils.router.canonicalize(link) == ("youtube", "_9TgVAYP3XA"), link
+    for link in (
+        "https://www.youtube.com/watch?v=_9TgVAYP3XAx",
+        "https://www.youtube.com/watch?v=_9TgVAYP3XA and more",
+        "https://vimeo.com/347119375",
+        "https://www.youtube.com/@channel",
+        "",
+        None,
+    ):
+        assert utils.router.canonicalize(link) is None, link
+    assert utils.router.canonical("youtube", "_9TgVAYP3XA") == "https://www.youtube.com/watch?v=_9TgVAYP3XA"
+
+
+def test_register():
+    try:
+        utils.router.register("example", "https://example.com/v/{id}", r"^https://example\.com/v/(\d+)$")
+        assert utils.router.canonicalize("https://example.com/v/42") == ("example", "42")
+        assert utils.recognizer.url("https://example.com/v/42") == "example"
+    finally:
+        del utils.router._sites["example"]
+        utils.router._compiled = None
+
+
+def test_bulk():
+    invalid = []
+    lines = [
+        "https://youtu.be/_9TgVAYP3XA\n",
+        "# comment\n",
+        "\n",
+        "https://www.youtube.com/shorts/_9TgVAYP3XA\n",
+        "https://m.youtube.com/watch?v=ZVN9LVqAyyo\n",
+        "not a url\n",
+    ]
+    assert list(utils.router.bulk(lines, invalid.append)) == [
+        ("youtube", "_9TgVAYP3XA"),
+        ("youtube", "ZVN9LVqAyyo"),
+    ]
+    assert invalid == ["not a url"]
+
+
+def test_bulk_deduplicates_forms():
+    forms = (
+        "https://www.youtube.com/watch?v={}&t=1s\n",
+        "https://youtu.be/{}\n",
+        "https://m.youtube.com/shorts/{}\n",
+        "https://music.youtube.com/watch?v={}\n",
+    )
+    lines = [forms[i % 4].format(f"{i // 2:011d}") for i in range(200000)]
+    assert sum(1 for _ in utils.router.bulk(lines)) == 100000
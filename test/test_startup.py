@@ -0,0 +1,49 @@
+# import-time benchmark of the CLI entry point, run in a fresh interpreter
+import sys
+import os
+import subprocess
+
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cold-start budget for `import main` in milliseconds, only checked when KEEP_IMPORT_BUDGET_MS
+# is set (e.g. to 100): wall-clock budgets depend on the machine, benchmark.py reports the time
+budget_ms = os.environ.get("KEEP_IMPORT_BUDGET_MS")
+heavy = ["yt_dlp", "pycountry", "rich", "urllib3", "sqlite3"]
+
+
+def importtime(*args: str) -> dict:
+    """
+    Runs python -X importtime with the given arguments and returns the cumulative import time of every top-level module in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name[1:].rstrip()] = int(cumulative)
+    return modules
+
+
+def test_import_skips_heavy_imports():
+    modules = importtime("-c", "import main")
+    assert not [name for name in modules if name.strip().split(".")[0] in heavy]
+
+
+@pytest.mark.skipif(budget_ms is None, reason="KEEP_IMPORT_BUDGET_MS is not set")
+def test_import_budget():
+    modules = importtime("-c", "import main")
+    assert modules["main"] / 1000 < float(budget_ms)
+
+
+def test_help_skips_heavy_imports():
+    modules = importtime("main.py", "--help")
+    assert not [name for name in modules if name.strip().split(".")[0] in heavy]
@@ -1,9 +1,11 @@
 # import youtube module from parent directory
 import sys
+import threading
+import time
 import os
 from pathlib import Path
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -13,6 +15,75 @@ import youtube
 import main as project
 
 
+def bare_downloader(**attributes):
+    # a downloader that skipped __init__, and with it cookies, extraction and selection; the
+    # attributes __init__ sets before the archived early return get their defaults
+    ytd = youtube.downloader.__new__(youtube.downloader)
+    defaults = {
+        "_cache": False,
+        "_owned": [],
+        "_downloading": None,
+        "_json": None,
+        "_video": None,
+        "_clip": None,
+        "copy_only": False,
+    }
+    for name, value in {**defaults, **attributes}.items():
+        setattr(ytd, name, value)
+    return ytd
+
+
+def offline_downloader(tmp_path, monkeypatch, **options):
+    # a downloader of canned information instead of an extraction, keeping its data in tmp_path
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("KEEP_CACHE_DIR", str(tmp_path / "cache"))
+    cookie = tmp_path / "cookies.txt"
+    cookie.write_text("# Netscape HTTP Cookie File\n")
+    stream = {"url": "https://127.0.0.1/stream", "protocol": "https", "ext": "mp4"}
+    info = {
+        "id": "_9TgVAYP3XA",
+        "title": "title",
+        "extractor": "youtube",
+        "extractor_key": "Youtube",
+        "webpage_url": "https://www.youtube.com/watch?v=_9TgVAYP3XA",
+        "duration": 10,
+        "formats": [
+            {**stream, "format_id": "18", "vcodec": "avc1.42001E", "acodec": "mp4a.40.2", "height": 360, "tbr": 500},
+            {**stream, "format_id": "137", "vcodec": "avc1.640028", "acodec": "none", "height": 1080, "tbr": 4000},
+            {**stream, "format_id": "140", "ext": "m4a", "vcodec": "none", "acodec": "mp4a.40.2", "abr": 128, "tbr": 128},
+        ],
+    }
+    with patch.object(youtube.downloader, "extract_info", return_value=info):
+        return youtube.downloader(
+            url="https://youtu.be/_9TgVAYP3XA",
+            cookie=str(cookie),
+            output=str(tmp_path),
+            interactive=False,
+            cache=False,
+            **options,
+        )
+
+
+class fake_downloader:
+    # stands in for youtube.downloader in batch tests: URLs containing a key of `fails` raise
+    # its error, every other job is done at once
+    fails = {}
+
+    def __init__(self, url, interactive, **options):
+        assert interactive is False
+        for part, error in self.fails.items():
+            if part in url:
+                raise error
+        self.archived = None
+        self.postprocessing = None
+        self._info = {"title": url}
+        self._url = url
+        self.options = options
+
+    def download(self):
+        return
+
+
 def test_downloader_bypass():
     ytd = youtube.downloader(
         r"https://www.youtube.com/watch?v=_9TgVAYP3XA", bypass=True
@@ -91,3 +162,853 @@ def test_recognizer_url():
         utils.recognizer.url("https://www.youtube.com/watch?v=ZVN9LVqAyyo") == "youtube"
     )
     assert utils.recognizer.url("https://vimeo.com/347119375") == "none"
+
+
+def test_batch(tmp_path, monkeypatch):
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+
+    class failing(fake_downloader):
+        fails = {"bad": utils.LinkError()}
+
+    with patch("youtube.downloader", failing):
+        results = youtube.batch(
+            ["https://youtu.be/_9TgVAYP3XA", "", "# comment", "https://youtu.be/_9TgVAYP3XA", "bad"],
+            workers=2,
+        )
+    assert len(results) == 2
+    assert sorted(result["status"] for result in results) == ["done", "failed"]
+
+
+def test_quality_non_interactive():
+    ytd = bare_downloader(
+        interactive=False,
+        ydl_opts={},
+        policy=None,
+        _info={
+            "formats": [
+                {"video_ext": "mp4", "height": 360},
+                {"video_ext": "mp4", "height": 720},
+                {"video_ext": "none", "height": None},
+            ]
+        },
+    )
+    ytd.quality = "1080"
+    assert ytd.quality == 720
+    ytd.quality = None
+    assert ytd.quality == 720
+    ytd.quality = "240"
+    assert ytd.quality == 360
+
+
+def test_quality_policy():
+    ytd = bare_downloader(
+        interactive=False,
+        ydl_opts={},
+        policy={"max_size": 30_000_000, "max_bitrate": None, "prefer": ["vp9"]},
+        _info={
+            "duration": 100,
+            "formats": [
+                {"format_id": "140", "vcodec": "none", "acodec": "mp4a.40.2", "tbr": 128},
+                {"format_id": "136", "vcodec": "avc1.4d401f", "acodec": "none", "height": 720, "tbr": 2600},
+                {"format_id": "247", "vcodec": "vp09.00.31.08", "acodec": "none", "height": 720, "tbr": 1500},
+                {"format_id": "137", "vcodec": "avc1.640028", "acodec": "none", "height": 1080, "tbr": 4500},
+            ],
+        },
+    )
+    ytd.quality = None
+    assert ytd.quality == 1080
+    assert ytd.ydl_opts["format"] == "247+140"
+    assert ytd.estimate == 20_350_000
+    ytd.policy["max_size"] = 1_000_000
+    with pytest.raises(utils.JobError):
+        ytd.quality = "720"
+
+
+def test_metrics_hooks():
+    import metrics
+
+    events = []
+    registry = metrics.metrics.shared()
+    registry.hook(events.append)
+    ytd = bare_downloader(video_id="_9TgVAYP3XA", _transferred=0, _postprocessors={})
+    try:
+        ytd._metrics_hook({"status": "downloading", "downloaded_bytes": 10, "filename": "a.f137.mp4"})
+        # a stream found complete on disk was not transferred
+        ytd._metrics_hook({"status": "finished", "total_bytes": 500, "filename": "a.f140.m4a"})
+        ytd._metrics_hook(
+            {"status": "finished", "total_bytes": 1000, "elapsed": 2.0, "filename": "/tmp/a.f137.mp4"}
+        )
+        ytd._metrics_postprocessor_hook({"status": "started", "postprocessor": "Merger"})
+        ytd._metrics_postprocessor_hook({"status": "finished", "postprocessor": "Merger"})
+    finally:
+        registry.unhook(events.append)
+    assert ytd._transferred == 1000
+    assert [event["phase"] for event in events] == ["transfer", "postprocess"]
+    assert events[0]["stream"] == "a.f137.mp4" and events[0]["throughput"] == 500
+    assert events[1]["postprocessor"] == "Merger"
+
+
+def test_download_hides_progress_bar(tmp_path, monkeypatch):
+    dd = offline_downloader(tmp_path, monkeypatch, bypass=True)
+    params = []
+    with patch.object(youtube.downloader, "_process", lambda self, ydl: params.append(ydl.params)):
+        dd.download()
+    # yt-dlp must not draw its own progress bar between the lines of a non-interactive job
+    assert params[0]["noprogress"] is True
+
+
+def test_download_reuses_info():
+    import yt_dlp
+
+    ytd = bare_downloader(
+        _url=r"https://www.youtube.com/watch?v=_9TgVAYP3XA",
+        _info={"id": "_9TgVAYP3XA", "title": "title"},
+        parallel_streams=False,
+        single_pass=False,
+        _journal=None,
+    )
+    ydl = MagicMock()
+    ydl.sanitize_info.side_effect = lambda info, remove_private_keys: info
+    ytd._process(ydl)
+    ydl.process_ie_result.assert_called_once_with(ytd._info, download=True)
+    ydl.extract_info.assert_not_called()
+
+    fresh = {"id": "_9TgVAYP3XA", "title": "fresh"}
+    ydl.extract_info.return_value = fresh
+    ydl.process_ie_result.side_effect = [yt_dlp.utils.ReExtractInfo("expired"), fresh]
+    assert ytd._process(ydl) == fresh
+    ydl.extract_info.assert_called_once_with(ytd.url, download=False)
+
+
+def test_download_reextracts_only_stale_info():
+    import yt_dlp
+
+    ytd = bare_downloader(
+        _url=r"https://www.youtube.com/watch?v=_9TgVAYP3XA",
+        _info={"id": "_9TgVAYP3XA", "title": "title"},
+        parallel_streams=False,
+        single_pass=False,
+        _journal=None,
+        _cache=True,
+        video_id="_9TgVAYP3XA",
+    )
+    ydl = MagicMock()
+    ydl.sanitize_info.side_effect = lambda info, remove_private_keys: info
+    ydl.process_ie_result.side_effect = yt_dlp.utils.DownloadError(
+        "ERROR: unable to download video data: HTTP Error 429: Too Many Requests"
+    )
+    with pytest.raises(yt_dlp.utils.DownloadError):
+        ytd._process(ydl)
+    ydl.extract_info.assert_not_called()
+
+    ydl.extract_info.return_value = {"id": "_9TgVAYP3XA", "title": "fresh: a/b"}
+    ydl.process_ie_result.side_effect = [
+        yt_dlp.utils.DownloadError("ERROR: unable to download video data: HTTP Error 403: Forbidden"),
+        {"id": "_9TgVAYP3XA"},
+    ]
+    with patch("youtube.metadata_cache") as store:
+        ytd._process(ydl)
+    assert ytd._info["title"] == "fresh- a-b"
+    store.return_value.put.assert_called_once_with("_9TgVAYP3XA", ytd._info)
+
+
+def test_prune_info():
+    ytd = bare_downloader(parallel_streams=False, single_pass=False, _journal=None)
+    info = {
+        "title": "title",
+        "heatmap": [{"value": 1}] * 100,
+        "formats": [
+            {"format_id": "18", "vcodec": "avc1", "acodec": "mp4a", "height": 360},
+            {"format_id": "137", "vcodec": "avc1", "acodec": "none", "height": 1080},
+            {"format_id": "140", "vcodec": "none", "acodec": "mp4a"},
+        ],
+        "subtitles": {"en": [{"ext": "vtt"}], "de": [{"ext": "vtt"}]},
+        "automatic_captions": {"fr": [{"ext": "vtt"}]},
+    }
+    ytd.info = info
+    assert ytd.info is ytd.info
+    ydl = MagicMock()
+    ydl.process_ie_result.return_value = {
+        "requested_formats": [{"format_id": "137"}, {"format_id": "140"}],
+        "requested_subtitles": {"en": {}},
+    }
+    ytd._download_info(ydl, info)
+    assert [format["format_id"] for format in ytd._info["formats"]] == ["137", "140"]
+    assert ytd._info["subtitles"] == {"en": [{"ext": "vtt"}]}
+    assert ytd._info["automatic_captions"] == {} and "heatmap" not in ytd._info
+    # the shared information is left alone, and the model still lists every offer
+    assert len(info["formats"]) == 3 and "heatmap" in info
+    assert ytd.video.formats.heights() == [360, 1080]
+    assert ytd.video.languages() == ["de", "en", "fr"]
+    assert '"heatmap"' not in ytd.info
+
+
+def test_preselect_prunes_info(tmp_path, monkeypatch):
+    dd = offline_downloader(tmp_path, monkeypatch, quality="1080", archive=False, journal=False)
+    # the information is pruned to the selection before the download starts
+    assert [format["format_id"] for format in dd._info["formats"]] == ["137", "140"]
+    assert dd.video.formats.heights() == [360, 1080]
+
+
+def test_check_copy():
+    ytd = bare_downloader(
+        interactive=False,
+        ydl_opts={"postprocessors": [{"key": "FFmpegMetadata"}]},
+    )
+    merged = {
+        "ext": "mkv",
+        "requested_formats": [{"vcodec": "vp09.00.31.08", "acodec": "none"}, {"acodec": "opus"}],
+        "requested_subtitles": {"en": {}},
+    }
+    ytd._check_copy(merged)
+    with pytest.raises(utils.JobError, match="opus can not be copied into m4a"):
+        ytd._check_copy({"ext": "m4a", "vcodec": "none", "acodec": "opus"})
+    with pytest.raises(utils.JobError, match="mov_text"):
+        ytd._check_copy({**merged, "ext": "mp4"})
+    webm = {**merged, "ext": "webm", "requested_subtitles": {"en": {"ext": "vtt"}}}
+    ytd._check_copy(webm)
+    with pytest.raises(utils.JobError, match="srt subtitles would be converted to WebVTT"):
+        ytd._check_copy({**webm, "requested_subtitles": {"en": {"ext": "srt"}}})
+    ytd.ydl_opts["postprocessors"].append({"key": "FFmpegExtractAudio"})
+    with pytest.raises(utils.JobError, match="FFmpegExtractAudio"):
+        ytd._check_copy(merged)
+
+
+def test_audio_only(tmp_path, monkeypatch):
+    dd = offline_downloader(
+        tmp_path, monkeypatch, audio_only=True, copy_only=True, archive=False, journal=False
+    )
+    assert dd.ydl_opts["format"] == "140"
+    assert [format["format_id"] for format in dd._info["formats"]] == ["140"]
+    # the audio stream is kept as downloaded, without a merge or any rewrite
+    assert dd.ydl_opts["postprocessors"] == [] and "merge_output_format" not in dd.ydl_opts
+
+
+def test_check_internet_conn_cached():
+    import urllib3
+
+    pool = MagicMock()
+    pool.request.return_value.status = 204
+    with patch.object(utils.test, "_pool", pool), patch.object(
+        utils.test, "_checked", (0.0, None)
+    ):
+        assert utils.test.check_internet_conn() is True
+        assert utils.test.check_internet_conn() is True
+        assert pool.request.call_count == 1
+        pool.request.side_effect = urllib3.exceptions.MaxRetryError(None, "")
+        assert utils.test.check_internet_conn(ttl=0) is False
+        assert pool.request.call_count == 2
+
+
+def test_batch_skips_archived(tmp_path, monkeypatch):
+    import archive
+
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    kept = tmp_path / "kept.mkv"
+    kept.write_bytes(b"video")
+    archive.downloads().add("youtube", "_9TgVAYP3XA", str(kept))
+    with patch("youtube.downloader") as mock_downloader:
+        results = youtube.batch(["https://www.youtube.com/watch?v=_9TgVAYP3XA"])
+    mock_downloader.assert_not_called()
+    assert results[0]["status"] == "skipped"
+    assert results[0]["title"] == "kept.mkv"
+
+
+def test_download_closes_owned_connections():
+    store = MagicMock()
+    ytd = bare_downloader(
+        archived=None, interactive=False, video_id="_9TgVAYP3XA", ydl_opts={}, _owned=[store]
+    )
+    with patch.object(
+        youtube.downloader, "_download", side_effect=utils.JobError("disk full")
+    ), pytest.raises(utils.JobError):
+        ytd.download()
+    store.close.assert_called_once()
+    assert ytd._owned == []
+
+
+def test_batch_shares_connections(tmp_path, monkeypatch):
+    import archive
+
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    jobs = []
+
+    class recording(fake_downloader):
+        def __init__(self, url, interactive, **options):
+            super().__init__(url, interactive, **options)
+            jobs.append(self)
+
+    with patch("youtube.downloader", recording):
+        youtube.batch(["https://youtu.be/_9TgVAYP3XA", "https://youtu.be/jNQXAC9IVRw"], progress="none")
+    first, second = (job.options for job in jobs)
+    assert isinstance(first["archive"], archive.downloads) and first["archive"] is second["archive"]
+    assert isinstance(first["journal"], archive.journal) and first["journal"] is second["journal"]
+
+
+def test_autotune():
+    tuner = utils.autotune(start=2, maximum=16)
+    for speed in (10.0, 20.0, 21.0, 30.0):
+        tuner.hook({"status": "downloading", "speed": speed})
+        tuner.hook({"status": "finished"})
+    assert tuner.concurrency == 4
+    assert tuner.settled is True
+    assert tuner.best == (30.0, 4)
+
+
+def test_batch_clips_not_journaled(tmp_path, monkeypatch):
+    import archive
+
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    kept = tmp_path / "kept.mkv"
+    kept.write_bytes(b"video")
+    archive.downloads().add("youtube", "_9TgVAYP3XA", str(kept))
+    with patch("youtube.downloader", fake_downloader):
+        results = youtube.batch(["https://youtu.be/_9TgVAYP3XA"], progress="none", chapter="intro")
+    # the whole video is kept, but not the clip
+    assert results[0]["status"] == "done"
+    assert archive.journal().get("youtube", "_9TgVAYP3XA") is None
+
+
+def test_fetch_streams():
+    ytd = bare_downloader()
+    ydl = MagicMock()
+    ydl.process_ie_result.return_value = {
+        "ext": "mkv",
+        "requested_formats": [
+            {"format_id": "137", "ext": "mp4", "url": "video"},
+            {"format_id": "140", "ext": "m4a", "url": "audio"},
+        ],
+    }
+    ydl.prepare_filename.return_value = os.path.join("out", "title.mkv")
+    ytd._fetch_streams(ydl, {})
+    names = sorted(call.args[0] for call in ydl.dl.call_args_list)
+    assert names == [
+        os.path.join("out", "title.f137.mp4"),
+        os.path.join("out", "title.f140.m4a"),
+    ]
+
+
+def test_single_pass_downloads_separate_streams():
+    hooked = []
+    ytd = bare_downloader(ydl_opts={"post_hooks": [hooked.append]}, pipeline=None)
+    ydl = MagicMock()
+    ydl.process_ie_result.return_value = {
+        "ext": "mkv",
+        "format_id": "137+140",
+        "requested_formats": [{"format_id": "137"}, {"format_id": "140"}],
+    }
+    ydl.prepare_filename.return_value = os.path.join("out", "100% title.mkv")
+    with patch("yt_dlp.YoutubeDL") as mock_ydl:
+        streams_ydl = mock_ydl.return_value.__enter__.return_value
+        streams_ydl.process_ie_result.return_value = {
+            "requested_downloads": [{"filepath": "video"}, {"filepath": "audio"}]
+        }
+        streams_ydl.run_pp.side_effect = lambda pp, info: info
+        info = ytd._single_pass(ydl, {})
+    opts = mock_ydl.call_args.args[0]
+    assert opts["format"] == "137,140"
+    assert opts["outtmpl"]["default"] == os.path.join("out", "100%% title") + ".f%(format_id)s.%(ext)s"
+    assert opts["post_hooks"] == []
+    assert info["__files_to_mux"] == ["video", "audio"]
+    assert hooked == [os.path.join("out", "100% title.mkv")]
+
+
+def test_single_pass_tunes_streams():
+    ydl = MagicMock()
+    ydl.params = {}
+    ytd = bare_downloader(
+        _tuner=utils.autotune(start=2, maximum=16), pipeline=None, _downloading=ydl
+    )
+    ytd.ydl_opts = {"progress_hooks": [ytd._tune_hook], "post_hooks": []}
+    ydl.process_ie_result.return_value = {
+        "ext": "mkv",
+        "requested_formats": [{"format_id": "137"}, {"format_id": "140"}],
+    }
+    ydl.prepare_filename.return_value = os.path.join("out", "title.mkv")
+
+    def download(info, download):
+        for speed in (10.0, 20.0):
+            for hook in mock_ydl.call_args.args[0]["progress_hooks"]:
+                hook({"status": "downloading", "speed": speed})
+                hook({"status": "finished"})
+        return {"requested_downloads": [{"filepath": "video"}, {"filepath": "audio"}]}
+
+    with patch("yt_dlp.YoutubeDL") as mock_ydl:
+        streams_ydl = mock_ydl.return_value.__enter__.return_value
+        streams_ydl.params = {}
+        streams_ydl.process_ie_result.side_effect = download
+        streams_ydl.run_pp.side_effect = lambda pp, info: info
+        ytd._single_pass(ydl, {})
+    # the instance fetching the streams gets the tuned concurrency, not the outer one
+    assert streams_ydl.params["concurrent_fragment_downloads"] == ytd._tuner.concurrency > 2
+    assert "concurrent_fragment_downloads" not in ydl.params
+    assert ytd._downloading is ydl
+
+
+def test_single_pass_pipelined():
+    from pipeline import pipeline
+
+    hooked = []
+    ytd = bare_downloader(ydl_opts={"post_hooks": [hooked.append]}, pipeline=pipeline(workers=1, budget=100))
+    ydl = MagicMock()
+    ydl.process_ie_result.return_value = {
+        "ext": "mkv",
+        "requested_formats": [
+            {"format_id": "137", "filesize": 60},
+            {"format_id": "140", "filesize_approx": 20},
+        ],
+    }
+    ydl.prepare_filename.return_value = os.path.join("out", "title.mkv")
+    building = threading.Event()
+    with patch("yt_dlp.YoutubeDL") as mock_ydl:
+        streams_ydl = mock_ydl.return_value.__enter__.return_value
+        streams_ydl.process_ie_result.return_value = {
+            "requested_downloads": [{"filepath": "video"}, {"filepath": "audio"}]
+        }
+        streams_ydl.run_pp.side_effect = lambda pp, info: building.wait(5) and info
+        ytd._single_pass(ydl, {})
+        # the download returned while the merge still holds its share of the disk budget
+        assert ytd.pipeline.pending == 80
+        assert hooked == []
+        building.set()
+        ytd.postprocessing.result(timeout=5)
+    ytd.pipeline.shutdown()
+    assert ytd.pipeline.pending == 0
+    assert hooked == [os.path.join("out", "title.mkv")]
+
+
+def test_batch_pipelined(tmp_path, monkeypatch):
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+
+    class pipelined(fake_downloader):
+        def download(self):
+            def build():
+                if "broken" in self._url:
+                    raise RuntimeError("ffmpeg failed")
+
+            self.postprocessing = self.options["pipeline"].submit(build)
+
+    with patch("youtube.downloader", pipelined):
+        results = youtube.batch(
+            ["https://youtu.be/_9TgVAYP3XA", "https://youtu.be/broken00000"],
+            workers=2,
+            disk_budget="1M",
+        )
+    assert sorted(result["status"] for result in results) == ["done", "failed"]
+    assert all("postprocessing" not in result for result in results)
+    assert [r["error"] for r in results if r["status"] == "failed"] == ["ffmpeg failed"]
+
+
+def test_format_hook(tmp_path):
+    import archive
+
+    kept = tmp_path / "kept.mkv"
+    kept.write_bytes(b"video")
+    ytd = bare_downloader(
+        _format=None,
+        _archive=archive.downloads(str(tmp_path / "archive.sqlite")),
+        _journal=None,
+        video_id="_9TgVAYP3XA",
+    )
+    # the merge sees the whole selection, later postprocessors must not replace it
+    ytd._format_hook({"status": "started", "info_dict": {"format_id": "137+140"}})
+    ytd._format_hook({"status": "started", "info_dict": {"format_id": "140"}})
+    assert ytd._format == "137+140"
+    ytd._keep(str(kept))
+    # the archive holds the downloaded formats rather than the selector, and no hash yet
+    record = ytd._archive.get("youtube", "_9TgVAYP3XA")
+    assert (record["format"], record["sha256"]) == ("137+140", None)
+
+
+def test_recognizer_playlist():
+    assert utils.recognizer.playlist("https://www.youtube.com/playlist?list=PLx0sYbCqOb8TBPRdmBHs5Iftvv9TPboYG")
+    assert utils.recognizer.playlist("https://www.youtube.com/@mkbhd/videos")
+    assert utils.recognizer.playlist("youtube.com/channel/UCBJycsmduvYEL83R_U4JriQ")
+    assert utils.recognizer.url("https://www.youtube.com/@mkbhd") == "youtube"
+    assert not utils.recognizer.playlist("https://www.youtube.com/watch?v=_9TgVAYP3XA")
+    assert not utils.recognizer.playlist("https://www.youtube.com/@mkbhd/community")
+
+
+def test_entries_lazy():
+    pulled = []
+
+    def videos():
+        for i in range(5000):
+            pulled.append(i)
+            yield {"_type": "url", "ie_key": "Youtube", "id": f"video{i:06}", "url": f"https://www.youtube.com/watch?v=video{i:06}"}
+
+    listings = {
+        "https://www.youtube.com/@channel": {"_type": "url", "ie_key": "YoutubeTab", "url": "tabs"},
+        "tabs": {"_type": "playlist", "entries": iter([{"_type": "url", "ie_key": "YoutubeTab", "url": "videos"}])},
+        "videos": {"_type": "playlist", "entries": videos()},
+    }
+    ydl = MagicMock()
+    ydl.extract_info.side_effect = lambda url, **kwargs: listings[url]
+    found = youtube._entries(ydl, "https://www.youtube.com/@channel")
+    assert next(found)["id"] == "video000000"
+    assert next(found)["id"] == "video000001"
+    assert len(pulled) == 2
+    assert all(call.kwargs["process"] is False for call in ydl.extract_info.call_args_list)
+
+
+def test_batch_streams_playlist(tmp_path, monkeypatch):
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    pulled = []
+    started = []
+
+    def entries(url, cookie=None, since=None):
+        for i in range(100):
+            pulled.append(i)
+            yield {"id": f"video{i:06}"}
+
+    class counting(fake_downloader):
+        def __init__(self, url, interactive, **options):
+            started.append(len(pulled))
+            super().__init__(url, interactive, **options)
+
+    with patch("youtube.entries", entries), patch("youtube.downloader", counting):
+        results = youtube.batch(["https://www.youtube.com/playlist?list=PLtest"], workers=2)
+    assert len(results) == 100
+    assert all(result["status"] == "done" for result in results)
+    # the first job started long before the listing was enumerated
+    assert started[0] <= 4
+
+
+def test_entries_since():
+    listing = [
+        {"id": "new00000002", "upload_date": "20260103"},
+        {"id": "new00000001", "timestamp": 1767312000},
+        {"id": "marked00000", "upload_date": "20260101"},
+        {"id": "old00000000", "upload_date": "20251231"},
+    ]
+    with patch("yt_dlp.YoutubeDL"), patch("youtube._entries", lambda ydl, url: iter(listing)):
+        found = list(youtube.entries("https://www.youtube.com/@channel", since={"video_id": "marked00000", "upload_date": "20260101"}))
+        assert [entry["id"] for entry in found] == ["new00000002", "new00000001"]
+        # a deleted marked video still stops at the first older upload
+        found = list(youtube.entries("https://www.youtube.com/@channel", since={"video_id": "deleted0000", "upload_date": "20260101"}))
+        assert [entry["id"] for entry in found] == ["new00000002", "new00000001", "marked00000"]
+
+
+def test_batch_sync(tmp_path, monkeypatch):
+    import archive
+
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+    channel = "https://www.youtube.com/@channel/videos"
+    uploads = [{"id": f"video{i:06}", "upload_date": f"202601{30 - i:02}"} for i in range(5)]
+    calls = []
+
+    def entries(url, cookie=None, since=None):
+        calls.append(since)
+        for entry in uploads:
+            if since and entry["id"] == since["video_id"]:
+                return
+            yield entry
+
+    class failing(fake_downloader):
+        fails = {"video000007": utils.LinkError()}
+
+    with patch("youtube.entries", entries), patch("youtube.downloader", failing):
+        assert len(youtube.batch([channel], sync=True)) == 5
+        assert archive.marks().get(channel)["video_id"] == "video000000"
+        assert youtube.batch([channel], sync=True) == []
+        assert calls[-1]["upload_date"] == "20260130"
+
+        # a failed new video keeps the old mark, so the next sync retries it
+        uploads[:0] = [{"id": "video000008"}, {"id": "video000007"}]
+        results = youtube.batch([channel], sync=True)
+    assert sorted(result["status"] for result in results) == ["done", "failed"]
+    assert archive.marks().get(channel)["video_id"] == "video000000"
+
+
+def test_singleflight():
+    from concurrent.futures import ThreadPoolExecutor
+
+    flights = utils.singleflight()
+    release = threading.Event()
+    calls = []
+
+    def extract(video_id):
+        calls.append(video_id)
+        release.wait(5)
+        return {"id": video_id}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flights.do, "_9TgVAYP3XA", extract, "_9TgVAYP3XA") for _ in range(4)]
+        while not flights._calls:
+            pass
+        # let the other callers reach the in-flight call before it finishes
+        time.sleep(0.2)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+    assert calls == ["_9TgVAYP3XA"]
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(result is results[0][0] for result, _ in results)
+    # the key is forgotten once the call finished
+    assert flights.do("_9TgVAYP3XA", lambda: "again") == ("again", False)
+
+    def broken():
+        raise utils.LinkError()
+
+    with pytest.raises(utils.LinkError):
+        flights.do("broken", broken)
+    assert not flights._calls
+
+
+def test_download_single_flight():
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+    release = threading.Event()
+    downloads = []
+    building = Future()
+
+    def fake_download(self):
+        downloads.append(self)
+        release.wait(5)
+        return building
+
+    def job():
+        ytd = bare_downloader(
+            archived=None,
+            interactive=False,
+            video_id="_9TgVAYP3XA",
+            ydl_opts={"format": "bestvideo+bestaudio", "outtmpl": "out/%(title)s.%(ext)s"},
+        )
+        ytd.download()
+        return ytd
+
+    with patch.object(youtube.downloader, "_download", fake_download):
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(job) for _ in range(3)]
+            while not downloads:
+                pass
+            time.sleep(0.2)
+            release.set()
+            jobs = [future.result(timeout=5) for future in futures]
+    assert len(downloads) == 1
+    assert all(ytd.postprocessing is building for ytd in jobs)
+
+
+def test_retry_classification():
+    import yt_dlp
+    from yt_dlp.networking.exceptions import HTTPError, TransportError
+
+    def wrapped(error):
+        try:
+            raise error
+        except Exception as e:
+            return yt_dlp.utils.DownloadError(f"ERROR: {e}", sys.exc_info())
+
+    response = MagicMock(status=429, reason="Too Many Requests", headers={})
+    assert utils.retry.retryable(wrapped(HTTPError(response)))
+    response.status = 503
+    assert utils.retry.retryable(wrapped(HTTPError(response)))
+    response.status = 404
+    assert not utils.retry.retryable(wrapped(HTTPError(response)))
+    assert utils.retry.retryable(wrapped(TransportError("Read timed out")))
+    assert utils.retry.retryable(yt_dlp.utils.DownloadError("ERROR: unable to download video data: HTTP Error 403: Forbidden"))
+    assert not utils.retry.retryable(yt_dlp.utils.DownloadError("ERROR: [youtube] _9TgVAYP3XA: Private video"))
+    # only stale information is extracted again
+    response.status = 403
+    assert utils.retry.expired(wrapped(HTTPError(response)))
+    response.status = 429
+    assert not utils.retry.expired(wrapped(HTTPError(response)))
+    assert utils.retry.expired(yt_dlp.utils.ReExtractInfo("expired"))
+    assert not utils.retry.expired(wrapped(TransportError("Read timed out")))
+
+
+def test_retry_backoff():
+    policy = utils.retry(attempts=3, base=1.0, cap=3.0)
+    assert all(0 <= policy.delay(attempt) <= min(3.0, 2**attempt) for attempt in range(6) for _ in range(20))
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TimeoutError("timed out")
+        return "ok"
+
+    with patch("time.sleep") as sleep:
+        assert policy.call(flaky) == "ok"
+        assert sleep.call_count == 2
+        with pytest.raises(ValueError):
+            policy.call(MagicMock(side_effect=ValueError("Private video")))
+        assert sleep.call_count == 2
+        with pytest.raises(TimeoutError):
+            policy.call(MagicMock(side_effect=TimeoutError("timed out")))
+        assert sleep.call_count == 5
+
+
+def test_breaker():
+    pause = utils.breaker(threshold=2, cooldown=30.0)
+    pause.failure("googlevideo.com")
+    assert pause.paused("googlevideo.com") == 0
+    pause.failure("googlevideo.com")
+    assert 29 < pause.paused("googlevideo.com") <= 30
+    assert pause.paused("youtube.com") == 0
+    pause.success("googlevideo.com")
+    assert pause.paused("googlevideo.com") == 0
+    assert utils.retry.host("https://rr3---sn-abc.googlevideo.com/videoplayback?expire=1") == "googlevideo.com"
+    assert utils.retry.host("www.youtube.com/watch?v=_9TgVAYP3XA") == "youtube.com"
+
+
+def test_job_structured_failure(monkeypatch, tmp_path):
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+
+    class failing(fake_downloader):
+        fails = {
+            "_9TgVAYP3XA": utils.JobError(
+                "HTTP Error 429: Too Many Requests", retryable=True, host="youtube.com"
+            )
+        }
+
+    with patch("youtube.downloader", failing):
+        result = youtube._job("https://youtu.be/_9TgVAYP3XA", {})
+    assert result["status"] == "failed"
+    assert result["retryable"] is True
+    assert "429" in result["error"]
+
+
+def test_resume_format():
+    ytd = bare_downloader(
+        ydl_opts={"format": "bestvideo[height<=720]+bestaudio/best[height<=720]/best"},
+        _info={"formats": [{"format_id": "136"}, {"format_id": "140"}, {"format_id": "22"}]},
+    )
+    ytd.resumed = {"format": "136+140", "selector": ytd.ydl_opts["format"]}
+    assert ytd._resume_format() == "136+140"
+    # another quality, or a format that is no longer offered, selects again
+    ytd.resumed["format"] = "137+140"
+    assert ytd._resume_format() is None
+    ytd.resumed = {"format": "136+140", "selector": "bestvideo+bestaudio/best"}
+    assert ytd._resume_format() is None
+
+
+def test_journal_hooks(tmp_path):
+    import archive
+
+    ytd = bare_downloader(
+        video_id="_9TgVAYP3XA",
+        _journal=archive.journal(path=str(tmp_path / "journal.sqlite")),
+        _streams={},
+        _journaled=0.0,
+        _postprocessing_started=False,
+    )
+    for name, size in (("title.f137.mp4", 300), ("title.f140.m4a", 100)):
+        ytd._journal_hook(
+            {"status": "downloading", "filename": name, "tmpfilename": name + ".part", "downloaded_bytes": size, "total_bytes": 1000}
+        )
+    record = ytd._journal.get("youtube", "_9TgVAYP3XA")
+    # the second stream was within the write interval
+    assert record["temp"] == ["title.f137.mp4.part"]
+    ytd._journal_hook({"status": "finished", "filename": "title.f140.m4a", "downloaded_bytes": 1000, "total_bytes": 1000})
+    record = ytd._journal.get("youtube", "_9TgVAYP3XA")
+    assert record["state"] == "downloading"
+    assert record["temp"] == ["title.f137.mp4.part", "title.f140.m4a"]
+    assert (record["downloaded"], record["total"]) == (1300, 2000)
+    ytd._postprocessor_hook({"status": "started"})
+    assert ytd._journal.get("youtube", "_9TgVAYP3XA")["state"] == "post-processing"
+
+
+def test_download_journals_cancelled(tmp_path, monkeypatch):
+    import archive
+    import yt_dlp
+
+    dd = offline_downloader(tmp_path, monkeypatch, bypass=True, archive=False)
+    with patch.object(
+        youtube.downloader, "_process", side_effect=yt_dlp.utils.DownloadCancelled("Download cancelled")
+    ), pytest.raises(yt_dlp.utils.DownloadCancelled):
+        dd.download()
+    jobs = archive.journal()
+    assert jobs.get("youtube", "_9TgVAYP3XA")["state"] == "cancelled"
+    assert jobs.unfinished() == []
+
+
+def test_download_journals_failed(tmp_path, monkeypatch):
+    import archive
+
+    dd = offline_downloader(tmp_path, monkeypatch, bypass=True, archive=False)
+    with patch.object(
+        youtube.downloader, "_process", side_effect=utils.JobError("disk full")
+    ), pytest.raises(utils.JobError):
+        dd.download()
+    record = archive.journal().get("youtube", "_9TgVAYP3XA")
+    assert (record["state"], record["error"]) == ("failed", "disk full")
+
+
+def test_batch_journal(tmp_path, monkeypatch):
+    import archive
+
+    monkeypatch.setenv("KEEP_DATA_DIR", str(tmp_path))
+
+    class failing(fake_downloader):
+        fails = {"jNQXAC9IVRw": utils.JobError("Private video")}
+
+    with patch("youtube.downloader", failing):
+        youtube.batch(["https://youtu.be/_9TgVAYP3XA", "https://youtu.be/jNQXAC9IVRw"], progress="none")
+    jobs = archive.journal()
+    # the fake never reports done, so the first job looks interrupted
+    assert [job["url"] for job in jobs.unfinished()] == ["https://www.youtube.com/watch?v=_9TgVAYP3XA"]
+    failed = jobs.get("youtube", "jNQXAC9IVRw")
+    assert (failed["state"], failed["error"]) == ("failed", "Private video")
+
+
+def test_throttle_rates():
+    assert utils.throttle.rate("20Mbit") == 2_500_000
+    assert utils.throttle.rate("5M") == 5 * 1024 * 1024
+    assert utils.throttle.rate("100kbps") == 12_500
+    assert utils.throttle.rate("unlimited") is None
+    assert utils.throttle.window("18:00-09:00=none") == (18 * 60, 9 * 60, None)
+    with pytest.raises(ValueError):
+        utils.throttle.rate("fast")
+    limiter = utils.throttle("1M", ["09:00-18:00=20Mbit", "22:00-06:00=0"])
+    day = lambda hour: time.mktime((2026, 3, 2, hour, 30, 0, 0, 0, -1))
+    assert limiter.limit(day(10)) == 2_500_000
+    assert limiter.limit(day(23)) is None
+    assert limiter.limit(day(3)) is None
+    assert limiter.limit(day(20)) == 1024 * 1024
+
+
+def test_throttle_shares():
+    sleep = MagicMock()
+    limiter = utils.throttle(4000, clock=lambda: 100.0, sleep=sleep)
+    limiter.join("a")
+    limiter.join("b", weight=3)
+    limiter.consume("a", 2000)
+    limiter.consume("b", 3000)
+    # a share of 1000 and 3000 bytes per second
+    assert [call.args[0] for call in sleep.call_args_list] == [2.0, 1.0]
+    limiter.leave("b")
+    limiter.configure(None)
+    limiter.consume("a", 10**9)
+    assert sleep.call_count == 2
+
+
+def test_throttle_hook():
+    # a virtual clock that only moves while a job sleeps
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    limiter = utils.throttle("8M", clock=lambda: now[0], sleep=sleep)
+    hooks = [limiter.hook(job) for job in ("a", "b")]
+    for block in range(1, 65):
+        for hook in hooks:
+            hook({"status": "downloading", "filename": "f", "downloaded_bytes": block * 16384})
+            # a repeated running total is not counted again
+            hook({"status": "downloading", "filename": "f", "downloaded_bytes": block * 16384})
+    # 2 MiB at 8 MiB/s
+    assert now[0] == pytest.approx(0.25, rel=0.01)
+
+
+def test_warm_extractor():
+    with patch("yt_dlp.YoutubeDL") as mock_ydl, patch.dict(youtube._warm, clear=True):
+        mock_ydl.side_effect = lambda opts: MagicMock()
+        with youtube._extractor({"quiet": True}) as first:
+            # an instance is never lent twice at once
+            with youtube._extractor({"quiet": True}) as second:
+                assert second is not first
+        with youtube._extractor({"quiet": True}) as again:
+            assert again in (first, second)
+        with youtube._extractor({"quiet": False}) as other:
+            assert other not in (first, second)
+    assert mock_ydl.call_count == 3
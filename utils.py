@@ -1,4 +1,6 @@
-import urllib3
+import re
+import time
+import threading
 
 
 class LinkError(Exception):
@@ -22,26 +24,808 @@ class FileError(Exception):
         super().__init__(f"{path} is not supported file or doesn't exist.")
 
 
+class JobError(Exception):
+    """
+    Exception raised when a download job fails, telling whether retrying it can help.
+    """
+
+    def __init__(self, msg: str, retryable: bool = False, host: str = None):
+        super().__init__(msg)
+        self.retryable = retryable
+        self.host = host
+
+
 class test:
+    # the probe result is shared by every downloader in the process for a short window
+    _pool = None
+    _checked = (0.0, None)
+    _lock = threading.Lock()
+
     @staticmethod
-    def check_internet_conn():
+    def check_internet_conn(ttl: float = 30.0) -> bool:
         """
         Checks if there is an active internet connection.
 
+        The result is cached process-wide for `ttl` seconds and the probe reuses a shared
+        connection pool, so concurrent or repeated callers pay for at most one request.
+
+        Args:
+            ttl (float, optional): Seconds a previous result stays valid. Use 0 to force a new probe. Defaults to 30.
+
         Returns:
             bool: True if there is an internet connection, False otherwise.
         """
+        import urllib3
+
+        with test._lock:
+            checked, online = test._checked
+            if online is not None and time.monotonic() - checked < ttl:
+                return online
+            if test._pool is None:
+                test._pool = urllib3.PoolManager(
+                    timeout=urllib3.Timeout(connect=3.0, read=3.0), retries=False
+                )
+            try:
+                r = test._pool.request(
+                    "HEAD",
+                    "https://www.youtube.com/generate_204",
+                    redirect=False,
+                    preload_content=False,
+                )
+                online = r.status in (200, 204)
+                r.release_conn()
+            except urllib3.exceptions.HTTPError:
+                online = False
+            test._checked = (time.monotonic(), online)
+            return online
+
+
+class autotune:
+    """
+    Hill-climbing tuner for yt-dlp's concurrent fragment downloads.
+
+    Throughput is sampled from progress hooks. After every finished stream the concurrency is
+    doubled while the median throughput keeps improving by at least `gain`, then settles back on
+    the best level seen once doubling stops paying off.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, start: int = 4, maximum: int = 32, gain: float = 0.1):
+        """
+        Args:
+            start (int, optional): Initial number of concurrent fragments. Defaults to 4.
+            maximum (int, optional): Upper bound of concurrent fragments. Defaults to 32.
+            gain (float, optional): Minimum relative throughput gain to keep ramping up. Defaults to 0.1.
+        """
+        self.concurrency = start
+        self.maximum = maximum
+        self.gain = gain
+        self.best = (0.0, start)
+        self.settled = False
+        self._samples = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared() -> "autotune":
+        """
+        Returns the process-wide tuner, so measurements carry over between downloads.
+        """
+        with autotune._shared_lock:
+            if autotune._shared is None:
+                autotune._shared = autotune()
+            return autotune._shared
+
+    def hook(self, d: dict) -> None:
+        """
+        yt-dlp progress hook that records throughput and adjusts the concurrency when a stream finishes.
+
+        Args:
+            d (dict): The progress information passed by yt-dlp.
+        """
+        with self._lock:
+            if d.get("status") == "downloading" and d.get("speed"):
+                self._samples.append(d["speed"])
+            elif d.get("status") == "finished" and self._samples:
+                samples = sorted(self._samples)
+                self._samples = []
+                throughput = samples[len(samples) // 2]
+                best, level = self.best
+                if throughput > best * (1 + self.gain):
+                    self.best = (throughput, self.concurrency)
+                    if not self.settled:
+                        self.concurrency = min(self.maximum, self.concurrency * 2)
+                else:
+                    self.concurrency = level
+                    self.settled = True
+
+
+class throttle:
+    """
+    Process-wide token-bucket bandwidth limiter shared by all download jobs.
+
+    The limit is split between the active jobs by weight: every job has its own bucket that
+    fills at its share of the current limit, so a job never takes bandwidth from another one
+    and a job with priority 2 gets twice the bandwidth of a job with priority 1. Time-of-day
+    windows override the default limit (e.g. 20 Mbit/s during business hours), and the limit
+    can be changed at any time with configure().
+
+    Throttling happens in yt-dlp progress hooks: a hook is called in the downloading thread
+    after every block it read, and sleeps there while its job is over budget, which slows the
+    reads of that connection down.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rate=None, windows=None, clock=None, sleep=None):
+        """
+        Args:
+            rate (float | str, optional): Default limit in bytes per second, or a rate such as "5M" (bytes) or "20Mbit" (bits). Defaults to no limit.
+            windows (list, optional): Time windows as "HH:MM-HH:MM=rate" strings or (start minute, end minute, rate) tuples. Defaults to none.
+            clock (Callable[[], float], optional): Monotonic clock in seconds. Defaults to time.monotonic.
+            sleep (Callable[[float], None], optional): Sleeps for a number of seconds. Defaults to time.sleep.
+        """
+        self._clock = clock or time.monotonic
+        self._sleep = sleep or time.sleep
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._checked = (None, None)
+        self.configure(rate, windows)
+
+    @staticmethod
+    def shared() -> "throttle":
+        """
+        Returns the process-wide limiter, so every downloader shares one bandwidth budget.
+        """
+        with throttle._shared_lock:
+            if throttle._shared is None:
+                throttle._shared = throttle()
+            return throttle._shared
+
+    @staticmethod
+    def rate(text) -> float:
+        """
+        Parses a rate.
+
+        Byte rates use binary units like yt-dlp's --limit-rate ("500K", "5M"); bit rates use
+        decimal units like network links ("20Mbit", "100kbps").
+
+        Args:
+            text (float | str): The rate, or 0, "none" or "unlimited" for no limit.
+
+        Returns:
+            float: The rate in bytes per second, or None for no limit.
+
+        Raises:
+            ValueError: If the rate can not be parsed.
+        """
+        if isinstance(text, (int, float)):
+            return float(text) or None
+        value = str(text).strip().lower().removesuffix("/s")
+        if value in ("", "0", "none", "unlimited"):
+            return None
+        bits = value.endswith(("bit", "bps"))
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?", value[:-3] if bits else value)
+        if match is None:
+            raise ValueError(f"invalid rate: {text}")
+        number, unit = match.groups()
+        scale = (1000 if bits else 1024) ** " kmgt".index(unit or " ")
+        return float(number) * scale / (8 if bits else 1) or None
+
+    @staticmethod
+    def window(text) -> tuple:
+        """
+        Parses a time window.
+
+        Args:
+            text (str): The window as "HH:MM-HH:MM=rate", e.g. "09:00-18:00=20Mbit". Windows may wrap around midnight.
+
+        Returns:
+            tuple: The start and end minute of the day and the rate in bytes per second (None for no limit).
+
+        Raises:
+            ValueError: If the window can not be parsed.
+        """
+        if not isinstance(text, str):
+            return tuple(text)
+        match = re.fullmatch(r"\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(.+)", text)
+        if match is None:
+            raise ValueError(f"invalid time window: {text}")
+        start_h, start_m, end_h, end_m, rate = match.groups()
+        start, end = int(start_h) * 60 + int(start_m), int(end_h) * 60 + int(end_m)
+        if start > 24 * 60 or end > 24 * 60:
+            raise ValueError(f"invalid time window: {text}")
+        return start, end, throttle.rate(rate)
+
+    def configure(self, rate=None, windows=None) -> None:
+        """
+        Replaces the default limit and the time windows. Running jobs follow the new limit at their next block.
+
+        Args:
+            rate (float | str, optional): Default limit, see rate(). Defaults to no limit.
+            windows (list, optional): Time windows, see window(). Defaults to none.
+        """
+        rate = self.rate(rate) if rate is not None else None
+        windows = [self.window(window) for window in windows or ()]
+        with self._lock:
+            self.default = rate
+            self.windows = windows
+            self._checked = (None, None)
+
+    @property
+    def limited(self) -> bool:
+        """
+        Returns:
+            bool: Whether any limit is configured, now or in a time window.
+        """
+        return self.default is not None or any(window[2] for window in self.windows)
+
+    def limit(self, now: float = None) -> float:
+        """
+        Returns the limit in effect at a time.
+
+        Args:
+            now (float, optional): A Unix timestamp. Defaults to now.
+
+        Returns:
+            float: The limit in bytes per second, or None for no limit.
+        """
+        moment = time.localtime(now)
+        minute = moment.tm_hour * 60 + moment.tm_min
+        for start, end, rate in self.windows:
+            if start <= minute < end if start <= end else minute >= start or minute < end:
+                return rate
+        return self.default
+
+    def join(self, job, weight: float = 1) -> None:
+        """
+        Adds a job to the jobs sharing the limit.
+
+        Args:
+            job (Hashable): A key identifying the job, e.g. its URL.
+            weight (float, optional): The job's share relative to the other jobs. Defaults to 1.
+        """
+        with self._lock:
+            self._jobs[job] = [max(weight, 0.01), 0.0, self._clock()]
+
+    def leave(self, job) -> None:
+        """
+        Removes a job, handing its share to the remaining jobs.
+
+        Args:
+            job (Hashable): The job key.
+        """
+        with self._lock:
+            self._jobs.pop(job, None)
+
+    def consume(self, job, size: int) -> None:
+        """
+        Takes downloaded bytes from a job's bucket, sleeping while the job is over its share.
+
+        Args:
+            job (Hashable): The job key.
+            size (int): Bytes downloaded since the last call.
+        """
+        if not self.limited:
+            return
+        with self._lock:
+            now = self._clock()
+            checked, limit = self._checked
+            if checked is None or now - checked > 1.0:
+                # the time of day only matters by the minute
+                limit = self.limit()
+                self._checked = (now, limit)
+            bucket = self._jobs.get(job)
+            if limit is None or bucket is None:
+                return
+            weight, tokens, stamp = bucket
+            share = limit * weight / sum(other[0] for other in self._jobs.values())
+            # at most a second of unused share is saved up, so idle jobs can not burst
+            tokens = min(share, tokens + (now - stamp) * share) - size
+            bucket[1:] = [tokens, now]
+        if tokens < 0:
+            self._sleep(-tokens / share)
+
+    def hook(self, job, weight: float = 1):
+        """
+        Adds a job and returns a yt-dlp progress hook that throttles its downloads.
+
+        Args:
+            job (Hashable): The job key; call leave() with it once the job is done.
+            weight (float, optional): The job's share relative to the other jobs. Defaults to 1.
+
+        Returns:
+            Callable[[dict], None]: The progress hook.
+        """
+        self.join(job, weight)
+        seen = {}
+        lock = threading.Lock()
+
+        def throttle_hook(d: dict) -> None:
+            if d["status"] != "downloading":
+                return
+            stream, downloaded = d.get("filename"), d.get("downloaded_bytes") or 0
+            # fragment threads of one stream report the same running total
+            with lock:
+                size = downloaded - seen.get(stream, 0)
+                if size > 0:
+                    seen[stream] = downloaded
+            if size > 0:
+                self.consume(job, size)
+
+        return throttle_hook
+
+
+class singleflight:
+    """
+    Collapses concurrent calls with the same key into one.
+
+    The first caller of a key runs the function; callers arriving while it runs wait for it and
+    get the same result, or the same exception. Once the call finishes the key is forgotten, so
+    later callers run it again.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared() -> "singleflight":
+        """
+        Returns the process-wide instance, so every downloader in the process shares its calls.
+        """
+        with singleflight._shared_lock:
+            if singleflight._shared is None:
+                singleflight._shared = singleflight()
+            return singleflight._shared
+
+    def do(self, key, fn, *args, **kwargs) -> tuple:
+        """
+        Runs fn(*args, **kwargs) unless a call with the same key is in flight, then waits for it instead.
+
+        Args:
+            key (Hashable): Identifies equivalent calls.
+            fn (Callable): The function to run.
+            *args: Positional arguments for fn.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            tuple: The result and whether it was shared from another caller's call.
+
+        Raises:
+            BaseException: Whatever the call raised, in every caller waiting for it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event()}
+        if not leader:
+            call["done"].wait()
+            if "error" in call:
+                raise call["error"]
+            return call["result"], True
         try:
-            http = urllib3.PoolManager(timeout=3.0)
-            r = http.request("GET", "https://google.com", preload_content=False)
-            code = r.status
-            r.release_conn()
-            if code == 200:
+            call["result"] = fn(*args, **kwargs)
+            return call["result"], False
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+class breaker:
+    """
+    Per-host circuit breaker.
+
+    After `threshold` consecutive retryable failures against a host, every call to it waits
+    until `cooldown` seconds have passed instead of hammering a host that is rate limiting us.
+    The next failure after a pause opens it again; a success closes it.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        """
+        Args:
+            threshold (int, optional): Consecutive failures that pause a host. Defaults to 5.
+            cooldown (float, optional): Seconds a paused host is left alone. Defaults to 60.
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared() -> "breaker":
+        """
+        Returns the process-wide breaker, so every job sees the failures of the others.
+        """
+        with breaker._shared_lock:
+            if breaker._shared is None:
+                breaker._shared = breaker()
+            return breaker._shared
+
+    def paused(self, host: str) -> float:
+        """
+        Returns how long a host stays paused.
+
+        Args:
+            host (str): The host.
+
+        Returns:
+            float: Seconds until the host may be called again, 0 if it is not paused.
+        """
+        with self._lock:
+            _, until = self._hosts.get(host, (0, 0.0))
+        return max(0.0, until - time.monotonic())
+
+    def wait(self, host: str) -> None:
+        """
+        Blocks while a host is paused.
+
+        Args:
+            host (str): The host.
+        """
+        while delay := self.paused(host):
+            time.sleep(delay)
+
+    def failure(self, host: str) -> None:
+        """
+        Records a retryable failure, pausing the host once the threshold is reached.
+
+        Args:
+            host (str): The host.
+        """
+        with self._lock:
+            failures, until = self._hosts.get(host, (0, 0.0))
+            failures += 1
+            if failures >= self.threshold:
+                until = time.monotonic() + self.cooldown
+            self._hosts[host] = (failures, until)
+
+    def success(self, host: str) -> None:
+        """
+        Records a success, closing the breaker of the host.
+
+        Args:
+            host (str): The host.
+        """
+        with self._lock:
+            self._hosts.pop(host, None)
+
+
+class retry:
+    """
+    Retry policy with exponential backoff and full jitter.
+
+    Only retryable failures are retried: rate limiting (HTTP 429), server errors (5xx),
+    forbidden responses of expired format URLs (403), timeouts and dropped connections.
+    Everything else, such as private or removed videos, fails on the first attempt.
+    """
+
+    # messages of transient failures, for errors that lost their original exception
+    pattern = (
+        r"(?i)HTTP Error (?:429|403|5\d\d)|Too Many Requests|timed? ?out|temporar|"
+        r"Connection (?:reset|refused|aborted)|Remote end closed|IncompleteRead|expired"
+    )
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base: float = 2.0,
+        cap: float = 60.0,
+        breaker: "breaker" = None,
+    ):
+        """
+        Args:
+            attempts (int, optional): Retries after the first attempt. Defaults to 3.
+            base (float, optional): Backoff of the first retry in seconds, doubled on every further one. Defaults to 2.
+            cap (float, optional): Upper bound of the backoff in seconds. Defaults to 60.
+            breaker (breaker, optional): Circuit breaker consulted before every attempt. Defaults to None.
+        """
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.breaker = breaker
+        # retries made so far, across every call
+        self.retried = 0
+
+    def delay(self, attempt: int) -> float:
+        """
+        Returns the backoff before a retry, drawn uniformly up to the exponential bound.
+
+        Args:
+            attempt (int): The number of the failed attempt, starting at 0.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        import random
+
+        return random.uniform(0, min(self.cap, self.base * 2**attempt))
+
+    @staticmethod
+    def retryable(error: BaseException) -> bool:
+        """
+        Classifies a failure as transient or permanent.
+
+        Follows yt-dlp's wrapped exceptions down to the original error and looks at its HTTP
+        status, its type and finally the messages.
+
+        Args:
+            error (BaseException): The failure.
+
+        Returns:
+            bool: True if retrying can help.
+        """
+        messages = []
+        for error in retry.chain(error):
+            if isinstance(error, JobError):
+                return error.retryable
+            status = getattr(error, "status", None) or getattr(error, "code", None)
+            if isinstance(status, int) and 400 <= status < 600:
+                return status in (403, 429) or status >= 500
+            if isinstance(error, (TimeoutError, ConnectionError)) or type(
+                error
+            ).__name__ in ("ReExtractInfo", "TransportError", "IncompleteRead"):
+                return True
+            messages.append(str(error))
+        return any(re.search(retry.pattern, message) for message in messages)
+
+    @staticmethod
+    def expired(error: BaseException) -> bool:
+        """
+        Tells whether a failure comes from stale video information, which only a new extraction fixes.
+
+        That is yt-dlp asking for a new extraction or a forbidden (HTTP 403) response of an
+        expired format URL; other failures are left to the retry policy.
+
+        Args:
+            error (BaseException): The failure.
+
+        Returns:
+            bool: True if the video information has to be extracted again.
+        """
+        for error in retry.chain(error):
+            if type(error).__name__ == "ReExtractInfo":
                 return True
+            status = getattr(error, "status", None) or getattr(error, "code", None)
+            if isinstance(status, int) and 400 <= status < 600:
+                return status == 403
+            if re.search(r"(?i)HTTP Error 403|expired", str(error)):
+                return True
+        return False
+
+    @staticmethod
+    def chain(error: BaseException):
+        """
+        Follows yt-dlp's wrapped exceptions and the exception chain down to the original error.
+
+        Args:
+            error (BaseException): The failure.
+
+        Yields:
+            BaseException: The failure, then every error it wraps.
+        """
+        seen = set()
+        while error is not None and id(error) not in seen:
+            seen.add(id(error))
+            yield error
+            exc_info = getattr(error, "exc_info", None)
+            error = (
+                (exc_info[1] if exc_info else None)
+                or error.__cause__
+                or error.__context__
+            )
+
+    @staticmethod
+    def host(url: str) -> str:
+        """
+        Returns the registrable domain of a URL, which groups CDN nodes under one breaker.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            str: The domain (e.g., "googlevideo.com").
+        """
+        netloc = re.sub(r"^(?:[a-z]+:)?//", "", url or "").split("/", 1)[0]
+        return ".".join(netloc.split(":")[0].split(".")[-2:])
+
+    def call(self, fn, *args, host: str = None, **kwargs):
+        """
+        Calls fn(*args, **kwargs), retrying retryable failures with backoff.
+
+        Args:
+            fn (Callable): The function to call.
+            *args: Positional arguments for fn.
+            host (str, optional): The host fn talks to, for the circuit breaker. Defaults to None.
+            **kwargs: Keyword arguments for fn.
+
+        Returns:
+            Any: The result of fn.
+
+        Raises:
+            Exception: The last failure once it is permanent or the attempts are used up.
+        """
+        attempt = 0
+        while True:
+            if self.breaker and host:
+                self.breaker.wait(host)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                retryable = self.retryable(e)
+                if self.breaker and host and retryable:
+                    self.breaker.failure(host)
+                if not retryable or attempt >= self.attempts:
+                    raise
+                time.sleep(self.delay(attempt))
+                attempt += 1
+                self.retried += 1
+                continue
+            if self.breaker and host:
+                self.breaker.success(host)
+            return result
+
+
+class router:
+    """
+    Registry of supported sites and their precompiled URL patterns.
+
+    Every site registers patterns whose first group is the video ID and a template of its
+    canonical URL, so any supported form of a link (e.g., shorts, embeds or mobile hosts) maps
+    to one (site, video_id) pair. Patterns are compiled once, on first use, so registering
+    sites costs nothing at startup.
+    """
+
+    _sites = {}
+    _compiled = None
+
+    @classmethod
+    def register(
+        cls, site: str, canonical: str, *patterns: str, playlists: tuple = ()
+    ) -> None:
+        """
+        Adds a site, or more patterns of an already registered one.
+
+        Args:
+            site (str): The site name (e.g., "youtube").
+            canonical (str): The canonical video URL with an '{id}' placeholder.
+            *patterns (str): Regular expressions of the video URLs; the first group captures the video ID.
+            playlists (tuple, optional): Regular expressions of the playlist and channel URLs. Defaults to ().
+        """
+        entry = cls._sites.setdefault(site, {"videos": [], "playlists": []})
+        entry["canonical"] = canonical
+        entry["videos"].extend(patterns)
+        entry["playlists"].extend(playlists)
+        cls._compiled = None
+
+    @classmethod
+    def _compile(cls) -> tuple[list, list]:
+        """
+        Compiles the patterns of every registered site.
+
+        Returns:
+            tuple[list, list]: The (site, pattern) pairs of video URLs and of playlist URLs.
+        """
+        if cls._compiled is None:
+            cls._compiled = (
+                [
+                    (site, re.compile(pattern))
+                    for site, entry in cls._sites.items()
+                    for pattern in entry["videos"]
+                ],
+                [
+                    (site, re.compile(pattern))
+                    for site, entry in cls._sites.items()
+                    for pattern in entry["playlists"]
+                ],
+            )
+        return cls._compiled
+
+    @classmethod
+    def canonicalize(cls, link: str) -> tuple[str, str] | None:
+        """
+        Maps a video URL of any supported site to its site and video ID.
+
+        Args:
+            link (str): The URL to be parsed.
+
+        Returns:
+            tuple[str, str]: The site name and video ID, or None if the URL is not supported.
+        """
+        link = (link or "").strip()
+        for site, pattern in (cls._compiled or cls._compile())[0]:
+            match = pattern.match(link)
+            if match:
+                return site, match.group(1)
+        return None
+
+    @classmethod
+    def canonical(cls, site: str, video_id: str) -> str:
+        """
+        Builds the canonical URL of a video.
+
+        Args:
+            site (str): The site name.
+            video_id (str): The video ID.
+
+        Returns:
+            str: The canonical video URL.
+        """
+        return cls._sites[site]["canonical"].format(id=video_id)
+
+    @classmethod
+    def playlist(cls, link: str) -> str | None:
+        """
+        Recognizes playlist and channel URLs.
+
+        Args:
+            link (str): The URL to be checked.
+
+        Returns:
+            str: The site name if the URL is a supported playlist or channel, otherwise None.
+        """
+        link = (link or "").strip()
+        for site, pattern in (cls._compiled or cls._compile())[1]:
+            if pattern.match(link):
+                return site
+        return None
+
+    @classmethod
+    def bulk(cls, lines, invalid=None):
+        """
+        Canonicalizes and de-duplicates a stream of URLs, e.g. an open file with millions of lines.
+
+        Blank lines and lines starting with '#' are ignored. Only the IDs already seen are kept
+        in memory, and results are yielded as soon as each line is read.
+
+        Args:
+            lines (Iterable[str]): The URLs, one per item.
+            invalid (Callable[[str], None], optional): Called with every unsupported line. Defaults to None.
+
+        Yields:
+            tuple[str, str]: The site name and video ID of every unique video.
+        """
+        seen = {site: set() for site in cls._sites}
+        videos = (cls._compiled or cls._compile())[0]
+        for line in lines:
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            for site, pattern in videos:
+                match = pattern.match(line)
+                if match:
+                    break
             else:
-                return False
-        except urllib3.exceptions.HTTPError:
-            return False
+                if invalid is not None:
+                    invalid(line)
+                continue
+            video_id = match.group(1)
+            if video_id not in seen[site]:
+                seen[site].add(video_id)
+                yield site, video_id
+
+
+router.register(
+    "youtube",
+    "https://www.youtube.com/watch?v={id}",
+    r"^(?i:(?:https?://)?(?:(?:www|m|music)\.)?(?:youtube(?:-nocookie)?\.com/(?:watch/?\?(?:[^#\s]*?&)?v=|(?:shorts|embed|live|v|e)/)|youtu\.be/))([\w-]{11})(?![\w-])\S*$",
+    playlists=(
+        r"^(?i:(?:https?://)?(?:(?:www|m|music)\.)?youtube\.com/)(?:playlist\?list=[\w-]+|(?:@[\w.-]+|channel/UC[\w-]{22}|c/[\w.-]+|user/[\w.-]+)(?:/(?:videos|shorts|streams|playlists|featured))?/?)(?:[?&#]\S*)?$",
+    ),
+)
 
 
 class recognizer:
@@ -56,15 +840,40 @@ class recognizer:
         Returns:
             str: The name of the video site if recognized, otherwise 'none'.
         """
-        import re
+        match = router.canonicalize(link)
+        if match:
+            return match[0]
+        return router.playlist(link) or "none"
 
-        regex = {
-            "youtube": r"^(?:https?:\/\/)?(?:www\.)?(?:youtube\.com\/watch\?v=|youtu\.be\/)([\w-]{11})(?:&[^#\s]*)?$",
-        }
-        for site, pattern in regex.items():
-            if re.match(pattern, link):
-                return site
-        return "none"
+    @staticmethod
+    def playlist(link: str) -> bool:
+        """
+        Checks whether the URL is a YouTube playlist or channel.
+
+        Recognizes 'playlist?list=' URLs and channels given as '@handle', 'channel/UC...', 'c/name'
+        or 'user/name', optionally followed by a tab such as '/videos' or '/shorts'.
+
+        Args:
+            link (str): The URL to be checked.
+
+        Returns:
+            bool: True if the URL is a playlist or channel, otherwise False.
+        """
+        return router.playlist(link) == "youtube"
+
+    @staticmethod
+    def video_id(link: str) -> str:
+        """
+        Extracts the 11 character video ID from a YouTube URL.
+
+        Args:
+            link (str): The URL to be parsed.
+
+        Returns:
+            str: The video ID if the URL is a valid YouTube video URL, otherwise None.
+        """
+        match = router.canonicalize(link)
+        return match[1] if match and match[0] == "youtube" else None
 
 
 def main(): ...
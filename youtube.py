@@ -4,16 +4,33 @@ import sys
 import json
 import time
 import utils
-import yt_dlp
-import pycountry
+import sqlite3
+import threading
 from shutil import which
 from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from rich.prompt import Prompt
 from rich.console import Console
+from cache import metadata as metadata_cache, players as player_cache, components_dir
+from archive import (
+    downloads as download_archive,
+    marks as sync_marks,
+    journal as job_journal,
+)
+from pipeline import pipeline as postprocess_pipeline
+from dashboard import dashboard as progress_dashboard
+from formats import index as format_index, codec as codec_family, fits as container_fits
+from model import video as video_model, chapter as video_chapter
+from metrics import metrics as job_metrics
 from typing import Optional as optional
 
 invalid_chars = r'<>:"/\|?*'
 
+# idle extraction YoutubeDL instances of warm downloaders, by their options
+_warm = {}
+_warm_lock = threading.Lock()
+
 
 class downloader:
     """
@@ -28,6 +45,33 @@ class downloader:
         subtitle: list[str] = None,
         output: str = None,
         bypass: bool = False,
+        interactive: bool = True,
+        cache: bool = True,
+        refresh: bool = False,
+        archive: bool = True,
+        verify: bool = False,
+        fragments=None,
+        parallel_streams: bool = False,
+        chunk_size: str = None,
+        single_pass: bool = True,
+        pipeline: postprocess_pipeline = None,
+        progress: str = "auto",
+        dashboard: progress_dashboard = None,
+        retries: int = 3,
+        retry_wait: float = 2.0,
+        journal: bool = True,
+        priority: float = 1,
+        warm: bool = False,
+        cancel=None,
+        max_size=None,
+        max_bitrate=None,
+        prefer_codecs: list[str] = None,
+        start=None,
+        end=None,
+        chapter: str = None,
+        audio_only: bool = False,
+        min_audio_bitrate=None,
+        copy_only: bool = False,
     ):
         """
         Initialize the downloader with the provided parameters.
@@ -40,7 +84,35 @@ class downloader:
             quality (str, optional): Target video quality in pixels (e.g., "720"). Defaults to None.
             subtitle (list[str], optional): List of language codes for preferred subtitles. Defaults to None.
             output (str, optional): Output directory path for downloaded videos. Defaults to None.
+            interactive (bool, optional): Whether to prompt for missing values and show spinners and progress bars. Non-interactive downloaders pick the best available quality, skip subtitles unless requested and raise instead of prompting. Defaults to True.
+            cache (bool, optional): Whether to reuse and store video information in the persistent metadata cache. Defaults to True.
+            refresh (bool, optional): Whether to ignore a cached entry and extract the video information again. Defaults to False.
+            archive (bool or archive.downloads, optional): Whether to skip videos recorded in the download archive and record new downloads there, or an open archive shared with other downloaders. Defaults to True.
+            verify (bool, optional): Whether to hash the kept file of an archived video and download it again if it changed. Defaults to False.
+            fragments (int | str, optional): Number of DASH/HLS fragments to download concurrently, or "auto" to tune it from measured throughput. Defaults to None.
+            parallel_streams (bool, optional): Whether to download the video and audio streams at the same time before merging. Defaults to False.
+            chunk_size (str, optional): HTTP chunk size for direct downloads (e.g., "10M"), which also sets the read buffer size. Defaults to None.
+            single_pass (bool, optional): Whether to merge the streams and embed thumbnail, metadata, chapters and subtitles with a single ffmpeg invocation instead of one rewrite per step. Defaults to True.
+            pipeline (pipeline, optional): Post-processing pipeline that builds the final file in the background, so download() returns as soon as the streams are downloaded. Only used with single_pass. Defaults to None.
+            progress (str, optional): Progress display of interactive downloaders: "auto", "rich", "plain", "json" or "none". Defaults to "auto".
+            dashboard (dashboard, optional): Shared progress dashboard to report to instead of drawing one. Defaults to None.
+            retries (int, optional): Retries of a failed extraction or download when the failure is transient (rate limiting, server errors, expired URLs, timeouts). Defaults to 3.
+            retry_wait (float, optional): Backoff of the first retry in seconds, doubled on every further one and randomized. Defaults to 2.
+            priority (float, optional): Share of the bandwidth limit this download gets relative to other concurrent downloads. Defaults to 1.
+            warm (bool, optional): Whether to extract with a YoutubeDL instance kept from earlier extractions with the same options, so long-running processes keep its connections and player caches. Defaults to False.
+            cancel (threading.Event, optional): Event that aborts the download once set. Defaults to None.
+            journal (bool or archive.journal, optional): Whether to record the job's state, format and temporary files in the job journal and resume an interrupted download of the same video with the same format, or an open journal shared with other downloaders. Defaults to True.
+            max_size (int | str, optional): Largest estimated download size (e.g., "500M"); the best format combination within it is selected. Defaults to no limit.
+            max_bitrate (float | str, optional): Largest total bitrate in bytes (e.g., "500K") or bits (e.g., "4Mbit") per second. Defaults to no limit.
+            prefer_codecs (list[str], optional): Video codecs preferred at the same height, in order (e.g., ["av1", "vp9"]). Defaults to None.
+            start (float | str, optional): Start of the clip to download, in seconds or [HH:]MM:SS (e.g., "1:02:30"). Defaults to the start of the chapter or video.
+            end (float | str, optional): End of the clip to download. Defaults to the end of the chapter or video.
+            chapter (str, optional): Title, or a case-insensitive part of it, of the chapter to download. Defaults to None.
+            audio_only (bool, optional): Whether to download only the smallest audio-only stream that is good enough, kept as downloaded without merging or embedding anything. Defaults to False.
+            min_audio_bitrate (float | str, optional): Lowest acceptable bitrate of the audio-only stream, in bytes (e.g., "8K") or bits (e.g., "64Kbit") per second. Defaults to no minimum.
+            copy_only (bool, optional): Whether to guarantee that no stream is re-encoded: the download fails before it starts if the selected streams or options would need a conversion. Defaults to False.
         """
+        self.interactive = interactive
         self.ydl_opts = {
             "remote_components": ["ejs:github"],
             "merge_output_format": "mkv",
@@ -54,7 +126,21 @@ class downloader:
             "xattrs": True,
             "nodownloadarchive": True,
         }
-        if which("ffmpeg") is not None:
+        try:
+            # solver scripts and signature data persist next to Keep's other caches
+            self.ydl_opts["cachedir"] = components_dir()
+        except OSError:
+            pass
+        self.single_pass = single_pass and which("ffmpeg") is not None
+        if self.single_pass:
+            # merging and embedding happen in one ffmpeg run, see _single_pass()
+            self.ydl_opts.update(
+                {
+                    "ffmpeg_location": which("ffmpeg"),
+                    "postprocessors": [],
+                }
+            )
+        elif which("ffmpeg") is not None:
             self.ydl_opts.update(
                 {
                     "ffmpeg_location": which("ffmpeg"),
@@ -86,20 +172,155 @@ class downloader:
                 sys.exit(
                     "\n❌ Rich module not found! Please install the required dependencies.\n"
                 )
+        clipped = start is not None or end is not None or bool(chapter)
+        # a clip is cut by ffmpeg while it downloads, so its streams are never fetched whole
+        self.parallel_streams = parallel_streams and not clipped
+        self.audio_only = audio_only
+        if audio_only:
+            # the audio stream is kept as downloaded: nothing to merge and nothing embedded
+            self.single_pass = False
+            self.ydl_opts.pop("merge_output_format", None)
+            self.ydl_opts.update(
+                {
+                    "postprocessors": [],
+                    "embedthumbnail": False,
+                    "writethumbnail": False,
+                    "embedinfojson": False,
+                    "embedmetadata": False,
+                    "embedchapters": False,
+                }
+            )
+        self.copy_only = copy_only
+        self.pipeline = pipeline
+        self.postprocessing = None
+        self.progress = progress
+        self.dashboard = dashboard
+        self.priority = priority
+        self.warm = warm
+        self.cancel = cancel
+        self.policy = None
+        self.estimate = None
+        if max_size or max_bitrate or prefer_codecs:
+            from yt_dlp.utils import parse_bytes
+
+            size = parse_bytes(str(max_size)) if max_size else None
+            if max_size and not size:
+                raise ValueError(f"invalid size: {max_size}")
+            rate = utils.throttle.rate(max_bitrate) if max_bitrate else None
+            self.policy = {
+                "max_size": size,
+                "max_bitrate": rate * 8 / 1000 if rate else None,
+                "prefer": prefer_codecs,
+            }
+        floor = utils.throttle.rate(min_audio_bitrate) if min_audio_bitrate else None
+        self.min_audio_bitrate = floor * 8 / 1000 if floor else None
+        self._retry = utils.retry(
+            attempts=retries, base=retry_wait, breaker=utils.breaker.shared()
+        )
+        self._tuner = None
+        if fragments == "auto":
+            self._tuner = utils.autotune.shared()
+        elif fragments:
+            self.ydl_opts["concurrent_fragment_downloads"] = int(fragments)
+        if chunk_size:
+            from yt_dlp.utils import parse_bytes
+
+            self.ydl_opts["http_chunk_size"] = parse_bytes(str(chunk_size))
+            self.ydl_opts["buffersize"] = self.ydl_opts["http_chunk_size"]
+            self.ydl_opts["noresizebuffer"] = True
+        # set before the archived early return, so every method can rely on them
+        self._cache = cache
+        self._downloading = None
+        self._json = None
+        self._video = None
+        self._clip = None
         self.url = url
-        self.cookies = cookie
-        if utils.test.check_internet_conn() is True:
-            self.info = self.extract_info()
+        self.video_id = utils.recognizer.video_id(self.url)
+        self.archived = None
+        self._archive = None
+        # connections opened here rather than shared by the caller, closed by download()
+        self._owned = []
+        # the archive records whole videos, so clips neither skip nor count as them
+        if archive and not clipped:
+            try:
+                if isinstance(archive, download_archive):
+                    self._archive = archive
+                else:
+                    self._archive = download_archive()
+                    self._owned.append(self._archive)
+                self.archived = self._archive.get("youtube", self.video_id)
+                if (
+                    self.archived
+                    and verify
+                    and not self._archive.verify("youtube", self.video_id)
+                ):
+                    self.archived = None
+            except sqlite3.Error:
+                self._archive = None
+        if self.archived:
+            # already kept: skip cookies, extraction and the quality/subtitle prompts entirely
+            self._close()
+            if self.interactive:
+                Console().print(
+                    f"\n[bold green]✓[/bold green] [green]Already downloaded to {self.archived['path']}[/green]\n"
+                )
+            return
+        # an interrupted download of this video is continued with the format it had chosen; the
+        # journal is keyed by video, so clips stay out of it like they stay out of the archive
+        self._journal = None
+        self.resumed = None
+        if journal and not clipped:
+            try:
+                if isinstance(journal, job_journal):
+                    self._journal = journal
+                else:
+                    self._journal = job_journal()
+                    self._owned.append(self._journal)
+                record = self._journal.get("youtube", self.video_id)
+                if record and record["state"] != "done" and record["format"]:
+                    self.resumed = record
+                self._record("extracting", url=self.url)
+            except sqlite3.Error:
+                self._journal = None
+        metrics = job_metrics.shared()
+        with metrics.span(self.video_id, "cookies"):
+            self.cookies = cookie
+        store = None
+        if cache:
+            try:
+                store = metadata_cache()
+            except sqlite3.Error:
+                store = None
+        cached = None
+        if store and not refresh:
+            with metrics.span(self.video_id, "cache") as span:
+                cached = store.get(self.video_id)
+                span["hit"] = cached is not None
+        if cached:
+            self.info = cached
+            store.close()
         else:
-            console = Console()
-            console.print(
-                "\n[bold red]❌ No internet connection! Please check your connection and try again.[/bold red]\n"
-            )
-            sys.exit(1)
+            # concurrent downloaders of the same video wait for one extraction and share it;
+            # the information is only read afterwards, so one dict serves all of them
+            with metrics.span(self.video_id, "extract") as span:
+                self.info, span["shared"] = utils.singleflight.shared().do(
+                    ("extract", self.video_id), self.extract_info
+                )
+            if store:
+                store.put(self.video_id, self._info)
+                store.close()
         if not bypass:
-            self.quality = quality
-            self.subtitle = subtitle
-            self.output = output
+            with metrics.span(self.video_id, "select"):
+                self.clip = (start, end, chapter)
+                if self.audio_only:
+                    self._quality = None
+                    self._subtitle = []
+                    self._select_audio()
+                else:
+                    self.quality = quality
+                    self.subtitle = subtitle
+                self.output = output
+                self._preselect()
 
     @property
     def url(self) -> str:
@@ -122,6 +343,8 @@ class downloader:
         """
         try:
             console = Console()
+            if not url and not self.interactive:
+                raise utils.LinkError("No URL provided.")
             if not url:
                 while True:
                     url = Prompt.ask(
@@ -133,15 +356,15 @@ class downloader:
                         console.print(
                             "\n[bold red]❌ URL cannot be empty! Please enter a valid YouTube video URL.[/bold red]\n"
                         )
-            # regex pattern is adapted from https://stackoverflow.com/questions/3717115/regular-expression-for-youtube-links
-            if not re.search(
-                r"^(?:https?:\/\/)?(?:www\.)?(?:youtube\.com\/watch\?v=|youtu\.be\/)([\w-]{11})(?:&[^#\s]*)?$",
-                url,
-            ):
+            # shorts, embeds, mobile and music links are stored as the canonical watch URL
+            match = utils.router.canonicalize(url)
+            if match is None or match[0] != "youtube":
                 raise utils.LinkError()
-            self._url = url
+            self._url = utils.router.canonical(*match)
             return
         except utils.LinkError as e:
+            if not self.interactive:
+                raise
             console.print(
                 f"\n[bold red]❌ Error![/bold red] [yellow]{str(e)}[/yellow]\n"
             )
@@ -228,9 +451,12 @@ class downloader:
     def info(self) -> str:
         """
         Returns:
-            str: The video information in JSON format.
+            str: The video information in JSON format, serialized on first access and cached until the information changes.
         """
-        return json.dumps(self._info, indent=4)
+        cached = self._json
+        if cached is None or cached[0] is not self._info:
+            cached = self._json = (self._info, json.dumps(self._info, indent=4))
+        return cached[1]
 
     @info.setter
     def info(self, info: dict) -> None:
@@ -241,8 +467,33 @@ class downloader:
             info (dict): The video information to set.
         """
         self._info = info
+        self._json = None
+        self._video = None
         return
 
+    @property
+    def video(self) -> video_model:
+        """
+        Returns the compact model of the current video information, built once per information dict.
+
+        Returns:
+            model.video: The video model.
+        """
+        cached = self._video
+        if cached is None or cached[0] is not self._info:
+            cached = self._video = (self._info, video_model(self._info))
+        return cached[1]
+
+    @property
+    def formats(self) -> format_index:
+        """
+        Returns the format index of the current video information.
+
+        Returns:
+            formats.index: The format index.
+        """
+        return self.video.formats
+
     def exportInfo(self) -> None:
         """
         Exports the video information to a JSON file.
@@ -250,7 +501,7 @@ class downloader:
         from rich.spinner import Spinner
         from rich.live import Live
 
-        file = f"{self._info['title']} - info.json"
+        file = f"{self.video.title} - info.json"
         console = Console()
         with Live(
             Spinner(
@@ -283,6 +534,24 @@ class downloader:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
 
+    def _spinner(self, text: str):
+        """
+        Returns a live spinner for interactive downloaders and a no-op context otherwise.
+
+        Args:
+            text (str): The text to show next to the spinner.
+        """
+        from rich.spinner import Spinner
+        from rich.live import Live
+
+        if not self.interactive:
+            return nullcontext()
+        return Live(
+            Spinner("dots", text=text, style="bold cyan"),
+            console=Console(),
+            transient=True,
+        )
+
     def extract_info(self) -> dict:
         """
         Extracts video information without downloading the video. To use this metthod, use the 'bypass = True' parameter while initializing the downloader class.
@@ -290,8 +559,7 @@ class downloader:
         Returns:
             dict: The extracted video information.
         """
-        from rich.spinner import Spinner
-        from rich.live import Live
+        import yt_dlp
 
         try:
             console = Console()
@@ -311,27 +579,39 @@ class downloader:
                 ]
             }
             ydl_opts["format"] = "bestvideo+bestaudio/best"
-            with Live(
-                Spinner(
-                    "dots",
-                    text="[cyan]Extracting video information...",
-                    style="bold cyan",
-                ),
-                console=console,
-                transient=True,
-            ):
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    data = ydl.extract_info(self.url, download=False)
-            console.print(
-                "[bold cyan]✓[/bold cyan] [cyan]Video information extracted successfully![/cyan]"
-            )
+            with self._spinner("[cyan]Extracting video information..."):
+                extractor = (
+                    _extractor(ydl_opts) if self.warm else yt_dlp.YoutubeDL(ydl_opts)
+                )
+                with extractor as ydl:
+                    self._components(ydl)
+                    data = self._retry.call(
+                        ydl.extract_info,
+                        self.url,
+                        download=False,
+                        host=utils.retry.host(self.url),
+                    )
+            if self.interactive:
+                console.print(
+                    "[bold cyan]✓[/bold cyan] [cyan]Video information extracted successfully![/cyan]"
+                )
             for char in invalid_chars:
                 data["title"] = data["title"].replace(char, "-")
             return data
-        except yt_dlp.utils.DownloadError as e:
-            sys.exit(1)
-
-        except yt_dlp.utils.ExtractorError as e:
+        except (yt_dlp.utils.DownloadError, yt_dlp.utils.ExtractorError) as e:
+            if not self.interactive:
+                raise utils.JobError(
+                    str(e),
+                    retryable=utils.retry.retryable(e),
+                    host=utils.retry.host(self.url),
+                ) from e
+            # only probe the connection once extraction has failed, so healthy jobs never pay for it
+            with job_metrics.shared().span(self.video_id, "connectivity"):
+                connected = utils.test.check_internet_conn()
+            if connected is False:
+                console.print(
+                    "\n[bold red]❌ No internet connection! Please check your connection and try again.[/bold red]\n"
+                )
             sys.exit(1)
         except KeyboardInterrupt or UnboundLocalError:
             console.print(
@@ -351,6 +631,8 @@ class downloader:
 
     @subtitle.setter
     def subtitle(self, subtitle: list[str]) -> None:
+        import pycountry
+
         try:
             """
             Sets the list of subtitle languages.
@@ -358,7 +640,9 @@ class downloader:
             Args:
                 subtitle (list[str]): The list of subtitle languages to set.
             """
-            if not subtitle:
+            if not subtitle and not self.interactive:
+                return
+            elif not subtitle:
                 choice = Prompt.ask(
                     "\n[bold bright_blue]Do you want to download subtitles? [/bold bright_blue]",
                     choices=["y", "n"],
@@ -370,10 +654,7 @@ class downloader:
                     console.print(
                         "\n[bold bright_blue]Available subtitles for this video:[/bold bright_blue]\n"
                     )
-                    langCodes = list(self._info["subtitles"].keys()) + list(
-                        self._info["automatic_captions"].keys()
-                    )
-                    langCodes = sorted(list(set(langCodes)))
+                    langCodes = self.video.languages()
                     for i, code in enumerate(langCodes, start=1):
                         language = pycountry.languages.get(alpha_2=code.upper())
                         language_name = language.name if language else code.upper()
@@ -402,7 +683,7 @@ class downloader:
                     "\n[bold red]❌ Subtitles must be provided as a list of language codes![/bold red]\n"
                 )
                 sys.exit(1)
-            elif not self._info["subtitles"] and not self._info["automatic_captions"]:
+            elif not self.video.languages():
                 console = Console()
                 console.print(
                     "\n[bold red]❌ No subtitles found for this video![/bold red]\n"
@@ -454,15 +735,22 @@ class downloader:
                 "\n[bold red]❌ Quality must be provided as a string![/bold red]\n"
             )
             sys.exit(1)
-        qualities = []
-        for format in self._info["formats"]:
-            try:
-                if format["video_ext"] and format["height"] is not None and int(format["height"]) > 180:
-                    qualities.append(int(format["height"]))
-            except KeyError:
-                continue
-        qualities = sorted(list(set(qualities)))
-        if not quality:
+        qualities = self.formats.heights()
+        if not self.interactive:
+            # headless jobs never prompt: an empty or unavailable quality is capped
+            # to the best available height at or below the requested one.
+            capped = [q for q in qualities if not quality or q <= int(quality)]
+            self._quality = capped[-1] if capped else (qualities or [None])[0]
+            if self._quality is None:
+                self._select("bestvideo+bestaudio/best")
+            else:
+                self._select(
+                    f"bestvideo[height<={self._quality}]+bestaudio/best[height<={self._quality}]/best"
+                )
+            return
+        elif not quality:
+            from yt_dlp.utils import format_bytes
+
             wait_seconds = 2
             while True:
                 try:
@@ -471,8 +759,14 @@ class downloader:
                         "\n[bold bright_blue]Select the quality you want to download:[/bold bright_blue]\n"
                     )
                     for i, quality in enumerate(qualities, start=1):
+                        estimate = self.formats.select(height=quality, **(self.policy or {}))
                         console.print(
                             f"    [medium_turquoise]{i}.[/medium_turquoise] [white]{quality}p[/white]"
+                            + (
+                                f" [dim]~{format_bytes(estimate['size'] * self._clip_fraction())}[/dim]"
+                                if estimate and estimate["size"]
+                                else ""
+                            )
                         )
                     self._quality = qualities[
                         int(
@@ -482,7 +776,7 @@ class downloader:
                         )
                         - 1
                     ]
-                    self.ydl_opts["format"] = (
+                    self._select(
                         f"bestvideo[height={self._quality}]+bestaudio/bestvideo[height<={self._quality}]+bestaudio/best[height={self._quality}]/best"
                     )
                     console.clear()
@@ -510,9 +804,7 @@ class downloader:
         else:
             if int(quality) in qualities:
                 self._quality = int(quality)
-                self.ydl_opts["format"] = (
-                    f"bestvideo[height<={self._quality}]+bestaudio"
-                )
+                self._select(f"bestvideo[height<={self._quality}]+bestaudio")
             else:
                 console = Console()
                 console.print(
@@ -520,6 +812,184 @@ class downloader:
                 )
                 sys.exit(1)
 
+    @property
+    def clip(self) -> optional[tuple]:
+        """
+        Returns the clip to download.
+
+        Returns:
+            tuple: The start and end in seconds and the chapter title (or None), or None for the whole video.
+        """
+        return self._clip
+
+    @clip.setter
+    def clip(self, clip: tuple) -> None:
+        """
+        Sets the clip to download from times or a chapter name.
+
+        Only the clip is downloaded: ffmpeg reads the streams from the start of the clip with
+        range requests and stops at its end, copying them without a re-encode, so a cut starts
+        at the keyframe before the requested start.
+
+        Args:
+            clip (tuple): The start, end and chapter, see __init__(); all None for the whole video.
+
+        Raises:
+            utils.JobError: If a non-interactive downloader gets an invalid time or an unknown chapter.
+        """
+        from yt_dlp.utils import download_range_func
+
+        self._clip = None
+        self.ydl_opts.pop("download_ranges", None)
+        if not clip or all(value is None for value in clip):
+            return
+        try:
+            self._clip = self.video.section(*clip)
+        except ValueError as e:
+            if not self.interactive:
+                raise utils.JobError(str(e)) from e
+            Console().print(f"\n[bold red]❌ {str(e).capitalize()}![/bold red]\n")
+            sys.exit(1)
+        first, last, _ = self._clip
+        self.ydl_opts["download_ranges"] = download_range_func(
+            None, [(first, last if last is not None else float("inf"))]
+        )
+        self.ydl_opts["force_keyframes_at_cuts"] = False
+
+    def _clip_fraction(self) -> float:
+        """
+        Returns the share of the video the clip covers, to scale size estimates and limits.
+
+        Returns:
+            float: The share, 1 for the whole video or an unknown duration.
+        """
+        clip, duration = self._clip, self.video.duration
+        if not clip or not duration:
+            return 1.0
+        first, last, _ = clip
+        return min(1.0, ((last if last is not None else duration) - first) / duration)
+
+    def _clip_chapters(self, chapters: list[dict]) -> list[dict]:
+        """
+        Shifts the chapters of the video into the clip, dropping those outside it.
+
+        Args:
+            chapters (list[dict]): The chapters of the video information.
+
+        Returns:
+            list[dict]: The chapters within the clip, timed from its start.
+        """
+        first, last, _ = self._clip
+        clipped = []
+        for entry in chapters or []:
+            part = video_chapter(
+                entry.get("title"),
+                max(entry.get("start_time") or 0, first),
+                min(entry.get("end_time") or float("inf"), last or float("inf")),
+            )
+            if part.end > part.start:
+                clipped.append(
+                    {
+                        "title": part.title,
+                        "start_time": part.start - first,
+                        "end_time": part.end - first,
+                    }
+                )
+        return clipped
+
+    def _select(self, selector: str) -> None:
+        """
+        Sets the format to download for the selected quality and estimates its size.
+
+        Without a selection policy, yt-dlp picks the format with the given selector. With one,
+        the format index picks the best concrete combination at or below the selected quality
+        that fits the size and bitrate limits, preferring the given codecs.
+
+        Args:
+            selector (str): The yt-dlp format selector used without a policy.
+
+        Raises:
+            utils.JobError: If no format fits the policy of a non-interactive downloader.
+        """
+        fraction = self._clip_fraction()
+        policy = dict(self.policy or {})
+        if policy.get("max_size"):
+            # the limit applies to the bytes of the clip
+            policy["max_size"] = policy["max_size"] / fraction
+        chosen = self.formats.select(height=self._quality, **policy)
+        self.estimate = chosen and chosen["size"] and int(chosen["size"] * fraction)
+        if not self.policy:
+            self.ydl_opts["format"] = selector
+            return
+        if chosen is None:
+            message = "No format of this video fits the size and bitrate limits"
+            if not self.interactive:
+                raise utils.JobError(message)
+            Console().print(f"\n[bold red]❌ {message}![/bold red]\n")
+            sys.exit(1)
+        self.ydl_opts["format"] = chosen["format"]
+
+    def _select_audio(self) -> None:
+        """
+        Sets the smallest audio-only format that meets the minimum bitrate and the size and bitrate limits.
+
+        Raises:
+            utils.JobError: If no audio-only format qualifies for a non-interactive downloader.
+        """
+        fraction = self._clip_fraction()
+        policy = dict(self.policy or {})
+        policy.pop("prefer", None)
+        if policy.get("max_size"):
+            policy["max_size"] = policy["max_size"] / fraction
+        chosen = self.formats.select_audio(min_bitrate=self.min_audio_bitrate, **policy)
+        if chosen is None:
+            message = "No audio-only format of this video fits the bitrate and size limits"
+            if not self.interactive:
+                raise utils.JobError(message)
+            Console().print(f"\n[bold red]❌ {message}![/bold red]\n")
+            sys.exit(1)
+        self.estimate = chosen["size"] and int(chosen["size"] * fraction)
+        self.ydl_opts["format"] = chosen["format"]
+
+    def _check_copy(self, selected: dict) -> None:
+        """
+        Fails before downloading if building the file would re-encode or convert any stream.
+
+        Args:
+            selected (dict): The information processed by yt-dlp with the selected formats.
+
+        Raises:
+            utils.JobError: If a conversion would be needed, for a non-interactive downloader.
+        """
+        ext = selected.get("ext")
+        reasons = []
+        for stream in selected.get("requested_formats") or [selected]:
+            for field in ("vcodec", "acodec"):
+                family = codec_family(stream.get(field))
+                if family and not container_fits(ext, family):
+                    reasons.append(f"{family} can not be copied into {ext}")
+        subtitles = selected.get("requested_subtitles") or {}
+        if subtitles and ext in ("mp4", "mov", "m4a"):
+            reasons.append(f"subtitles would be converted to mov_text for {ext}")
+        if ext == "webm":
+            # webm only holds WebVTT, so yt-dlp converts every other subtitle format
+            for other in sorted({entry.get("ext") for entry in subtitles.values()} - {"vtt"}):
+                reasons.append(f"{other} subtitles would be converted to WebVTT for webm")
+        for postprocessor in self.ydl_opts.get("postprocessors") or []:
+            if postprocessor.get("key") in (
+                "FFmpegExtractAudio",
+                "FFmpegVideoConvertor",
+                "FFmpegSubtitlesConvertor",
+            ):
+                reasons.append(f"{postprocessor['key']} re-encodes")
+        if not reasons:
+            return
+        message = "The download would need a conversion: " + "; ".join(reasons)
+        if not self.interactive:
+            raise utils.JobError(message)
+        Console().print(f"\n[bold red]❌ {message}![/bold red]\n")
+        sys.exit(1)
+
     @property
     def output(self) -> str:
         """
@@ -542,69 +1012,1207 @@ class downloader:
             self._output = output
         else:
             self._output = str(Path.home() / "Downloads")
-        self.ydl_opts["outtmpl"] = os.path.join(self._output, "%(title)s.%(ext)s")
+        name = "%(title)s"
+        clip = self._clip
+        if clip:
+            first, last, title = clip
+            label = title or "-".join(
+                time.strftime("%H.%M.%S", time.gmtime(value))
+                for value in (first, last)
+                if value is not None
+            )
+            # output template fields are %-formatted, so escape the literal label
+            label = re.sub(r"[\\/]", "_", label).replace("%", "%%")
+            name += f" [{label}]"
+        self.ydl_opts["outtmpl"] = os.path.join(self._output, name + ".%(ext)s")
         return
 
-    def download(self) -> None:
+    def _process(self, ydl) -> dict:
         """
-        Downloads the video with a progress bar.
+        Downloads the video from the already extracted information instead of resolving the URL again.
+
+        Mirrors yt-dlp's --load-info-json path: the held information is sanitized and processed
+        with the download options, so formats, subtitles and thumbnails are selected again without
+        another extraction round trip. Extracts once more if the held information is stale (e.g.
+        expired format URLs) and caches the fresh information; other failures propagate to the
+        retry policy.
+
+        Args:
+            ydl (yt_dlp.YoutubeDL): The YoutubeDL instance configured with the download options.
+
+        Returns:
+            dict: The processed video information.
         """
-        from rich.progress import Progress, BarColumn
+        import yt_dlp
 
-        title = self._info["title"][:50]
         try:
-            console = Console()
-            with Progress(
-                "[progress.description]{task.description}",
-                BarColumn(),
-                "[progress.percentage]{task.percentage:>3.1f}%",
-                console=console,
-            ) as progress:
-                task = progress.add_task(
-                    f"[cyan]Downloading '{title}' in {self._quality}p...[/cyan]",
-                    total=100,
+            return self._download_info(ydl, ydl.sanitize_info(self._info, True))
+        except (yt_dlp.utils.DownloadError, yt_dlp.utils.ReExtractInfo) as e:
+            # anything but stale information is left to the retry policy
+            if not utils.retry.expired(e):
+                raise
+            fresh = ydl.extract_info(self.url, download=False)
+            for char in invalid_chars:
+                fresh["title"] = fresh["title"].replace(char, "-")
+            # later retries and later runs start from the fresh information
+            self.info = fresh
+            self._cache_info()
+            return self._download_info(ydl, ydl.sanitize_info(fresh, True))
+
+    def _cache_info(self) -> None:
+        """
+        Stores the video information in the metadata cache, unless caching is disabled.
+        """
+        if not self._cache:
+            return
+        try:
+            store = metadata_cache()
+            store.put(self.video_id, self._info)
+            store.close()
+        except sqlite3.Error:
+            pass
+
+    def _download_info(self, ydl, info: dict) -> dict:
+        """
+        Downloads and post-processes a video from its sanitized information.
+
+        Args:
+            ydl (yt_dlp.YoutubeDL): The YoutubeDL instance configured with the download options.
+            info (dict): The sanitized video information.
+
+        Returns:
+            dict: The processed video information.
+        """
+        if self._clip:
+            # chapters are embedded relative to the start of the clip
+            info["chapters"] = self._clip_chapters(info.get("chapters"))
+        # the plain download learns its format from the postprocessor hooks
+        self._format = None
+        if self._journal or self.parallel_streams or self.single_pass or self.copy_only:
+            import copy
+
+            selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+            self._format = selected.get("format_id")
+            if self.copy_only:
+                self._check_copy(selected)
+            # the following steps select again, from a fraction of the formats
+            info = self._prune(info, selected)
+            if self._journal:
+                self._record(
+                    "downloading",
+                    format=selected.get("format_id"),
+                    selector=self._selector,
+                )
+        if self.parallel_streams:
+            self._fetch_streams(ydl, info)
+        if self.single_pass:
+            return self._single_pass(ydl, info)
+        processed = ydl.process_ie_result(info, download=True)
+        self._prune(info, processed)
+        return processed
+
+    def _preselect(self) -> None:
+        """
+        Selects the formats and subtitles with yt-dlp once the options are known and prunes the information to them.
+
+        The raw information is released right after selection instead of being held while the
+        job waits for a worker, the disk budget or the bandwidth limit. A resumed format is
+        selected instead of the selector, so its formats survive the pruning.
+        """
+        import yt_dlp
+
+        opts = {
+            key: value
+            for key, value in self.ydl_opts.items()
+            if key not in ("cookiefile", "cookiesfrombrowser")
+        }
+        resumed = self._resume_format()
+        if resumed:
+            opts["format"] = resumed
+        try:
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                selected = ydl.process_ie_result(
+                    ydl.sanitize_info(self._info, True), download=False
                 )
+        except yt_dlp.utils.YoutubeDLError:
+            # the download selects again and reports the failure
+            return
+        self._prune(self._info, selected)
+
+    def _prune(self, info: dict, selected: dict) -> dict:
+        """
+        Drops what a selection left out from the video information and keeps the pruned copy.
+
+        Only the selected formats and the requested subtitle and caption languages are kept, so
+        the information held for the rest of the job is a fraction of the extracted one. The
+        video model is built from the full information first, so it still lists everything that
+        was offered. The given dict is never changed, as concurrent jobs may share it.
+
+        Args:
+            info (dict): The video information.
+            selected (dict): The information processed by yt-dlp with the selected formats.
 
-                def progress_hook(d):
-                    if d["status"] == "downloading":
-                        downloaded_bytes = d.get("downloaded_bytes", 0)
-                        total_bytes = d.get("total_bytes") or d.get(
-                            "total_bytes_estimate"
+        Returns:
+            dict: The pruned video information, which yields the same selection.
+        """
+        model = self.video
+        wanted = {
+            stream.get("format_id")
+            for stream in selected.get("requested_formats") or [selected]
+        }
+        languages = set(selected.get("requested_subtitles") or ())
+        pruned = {key: value for key, value in info.items() if key != "heatmap"}
+        formats = [
+            format
+            for format in info.get("formats") or []
+            if format.get("format_id") in wanted
+        ]
+        if formats:
+            pruned["formats"] = formats
+        for key in ("subtitles", "automatic_captions"):
+            if key in info:
+                pruned[key] = {
+                    language: tracks
+                    for language, tracks in (info[key] or {}).items()
+                    if language in languages
+                }
+        self._info = pruned
+        self._json = None
+        self._video = (pruned, model)
+        return pruned
+
+    def _single_pass(self, ydl, info: dict) -> dict:
+        """
+        Downloads the selected streams without merging them, then builds the final file with one ffmpeg invocation.
+
+        The streams are requested as separate formats (e.g. "137,140"), so yt-dlp downloads them
+        together with the thumbnail and subtitles but never merges or rewrites them. The
+        FFmpegSinglePassPP postprocessor then merges everything into the final file at once.
+
+        With a pipeline, the expected stream size is reserved from its disk budget before
+        downloading and the merge is handed to its worker pool; the returned information then
+        describes a file that is still being built, and self.postprocessing holds its future.
+
+        Args:
+            ydl (yt_dlp.YoutubeDL): The YoutubeDL instance configured with the download options.
+            info (dict): The sanitized video information.
+
+        Returns:
+            dict: The processed video information with the final file in 'filepath'.
+        """
+        import copy
+        import yt_dlp
+        from postprocess import FFmpegSinglePassPP
+
+        selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+        streams = selected.get("requested_formats") or [selected]
+        final = ydl.prepare_filename(selected)
+        # output template fields are %-formatted, so escape them in the literal file name
+        base = os.path.splitext(final)[0].replace("%", "%%")
+        opts = {
+            **self.ydl_opts,
+            "format": ",".join(stream["format_id"] for stream in streams),
+            "outtmpl": {
+                "default": base + ".f%(format_id)s.%(ext)s",
+                "thumbnail": base + ".%(ext)s",
+                "subtitle": base + ".%(ext)s",
+            },
+            "post_hooks": [],
+        }
+        # unknown sizes count as nothing, so they never hold a download back
+        size = sum(
+            stream.get("filesize") or stream.get("filesize_approx") or 0
+            for stream in streams
+        )
+        if self.pipeline:
+            self.pipeline.reserve(size)
+        downloading = self._downloading
+        try:
+            with yt_dlp.YoutubeDL(opts) as streams_ydl:
+                # the streams are fetched by this instance, so the tuner must update its params
+                self._downloading = streams_ydl
+                processed = streams_ydl.process_ie_result(
+                    copy.deepcopy(info), download=True
+                )
+                downloads = processed["requested_downloads"]
+        except BaseException:
+            if self.pipeline:
+                self.pipeline.release(size)
+            raise
+        finally:
+            self._downloading = downloading
+        stem = os.path.splitext(final)[0]
+
+        def moved(entry: dict) -> dict:
+            # yt-dlp writes subtitles and thumbnails next to a stream file ('title.f140.en.srt')
+            # and then moves them next to the final file ('title.en.srt')
+            path = entry.get("filepath")
+            if not path or os.path.exists(path):
+                return entry
+            suffix = os.path.basename(path)[len(os.path.basename(stem)) :]
+            return {**entry, "filepath": stem + re.sub(r"^\.f[^.]+", "", suffix)}
+
+        if self._clip:
+            # tells FFmpegSinglePassPP where the streams were cut, to align the subtitles
+            selected["section_start"], selected["section_end"] = self._clip[:2]
+        # yt-dlp drops the fields a download shares with the video from its entry
+        subtitles = downloads[0].get("requested_subtitles") or processed.get(
+            "requested_subtitles"
+        )
+        thumbnails = downloads[0].get("thumbnails") or processed.get("thumbnails")
+        selected.update(
+            {
+                "filepath": final,
+                "__files_to_mux": [download["filepath"] for download in downloads],
+                "requested_subtitles": subtitles
+                and {lang: moved(sub) for lang, sub in subtitles.items()},
+                "thumbnails": thumbnails and [moved(thumbnail) for thumbnail in thumbnails],
+            }
+        )
+
+        def build() -> dict:
+            built = streams_ydl.run_pp(FFmpegSinglePassPP(streams_ydl), selected)
+            for hook in self.ydl_opts.get("post_hooks", []):
+                hook(final)
+            return built
+
+        if self.pipeline:
+            self.postprocessing = self.pipeline.submit(build, size=size)
+            return selected
+        return build()
+
+    def _fetch_streams(self, ydl, info: dict) -> None:
+        """
+        Downloads the selected video and audio streams concurrently.
+
+        Every stream is written to the same 'title.f<format_id>.<ext>' file yt-dlp would use, so the
+        following regular download finds them already downloaded and goes straight to merging.
+
+        Args:
+            ydl (yt_dlp.YoutubeDL): The YoutubeDL instance configured with the download options.
+            info (dict): The sanitized video information.
+        """
+        import copy
+        from yt_dlp.utils import prepend_extension, replace_extension
+
+        selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+        streams = selected.get("requested_formats") or []
+        if len(streams) < 2:
+            return
+        temp = ydl.prepare_filename(selected, "temp")
+
+        def fetch(stream: dict) -> None:
+            stream_info = dict(selected)
+            del stream_info["requested_formats"]
+            stream_info.update(stream)
+            ydl.dl(
+                prepend_extension(
+                    replace_extension(temp, stream["ext"]),
+                    f"f{stream['format_id']}",
+                    stream["ext"],
+                ),
+                stream_info,
+            )
+
+        with ThreadPoolExecutor(max_workers=len(streams)) as pool:
+            list(pool.map(fetch, streams))
+
+    def _components(self, ydl) -> None:
+        """
+        Makes a YoutubeDL instance keep player scripts in the persistent component cache.
+
+        Args:
+            ydl (yt_dlp.YoutubeDL): The YoutubeDL instance.
+        """
+        if "cachedir" not in self.ydl_opts:
+            return
+        try:
+            player_cache.install(ydl)
+        except OSError:
+            pass
+
+    def _host(self) -> str:
+        """
+        Returns the host the streams are downloaded from, for the circuit breaker.
+
+        Returns:
+            str: The registrable domain of the first format URL, or of the video URL.
+        """
+        urls = [format.get("url") for format in self._info.get("formats") or []]
+        return utils.retry.host(next(filter(None, urls), self.url))
+
+    def _keep(self, path: str) -> None:
+        """
+        Records a finished file in the download archive and marks its job done.
+
+        Runs as a yt-dlp post hook, so files built later by the post-processing pipeline are only
+        recorded once they exist.
+
+        Args:
+            path (str): The final output file path.
+        """
+        if self._archive:
+            self._archive.add(
+                "youtube",
+                self.video_id,
+                os.path.abspath(path),
+                format=self._format,
+            )
+        self._record("done", temp=[], error=None)
+
+    def _format_hook(self, d: dict) -> None:
+        """
+        yt-dlp postprocessor hook that notes the downloaded format for the archive.
+
+        Post hooks only get the file path, but every download runs through yt-dlp's
+        postprocessors before them, which see the processed information with its format ID.
+
+        Args:
+            d (dict): The yt-dlp postprocessor progress information.
+        """
+        if self._format is None:
+            self._format = d["info_dict"].get("format_id")
+
+    def _record(self, state: str, **fields) -> None:
+        """
+        Records the state of this download in the job journal, if it is kept.
+
+        Args:
+            state (str): One of archive.journal.states.
+            **fields: Journal fields to update (e.g., format, temp, downloaded).
+        """
+        if self._journal:
+            self._journal.update("youtube", self.video_id, state, **fields)
+
+    def _resume_format(self) -> optional[str]:
+        """
+        Returns the format an interrupted download of this video had chosen, if it can be continued.
+
+        It is only reused for the same format selection and while all of its formats are still
+        offered, so the streams are written to the same files and yt-dlp continues their .part
+        files and skips the ones that are complete instead of starting a different format.
+
+        Returns:
+            str: The concrete format (e.g., "137+140"), or None to select one again.
+        """
+        job = self.resumed
+        if not job or job["selector"] != self.ydl_opts.get("format"):
+            return None
+        offered = {format.get("format_id") for format in self._info.get("formats") or []}
+        if all(format_id in offered for format_id in job["format"].split("+")):
+            return job["format"]
+        return None
+
+    def _journal_hook(self, d: dict) -> None:
+        """
+        yt-dlp progress hook that records the temporary files and downloaded bytes in the job journal.
+
+        Progress is written at most every two seconds per job and whenever a stream finishes.
+
+        Args:
+            d (dict): The yt-dlp progress information.
+        """
+        if d["status"] not in ("downloading", "finished"):
+            return
+        self._streams[d.get("filename")] = (
+            d.get("tmpfilename") or d.get("filename"),
+            d.get("downloaded_bytes") or 0,
+            d.get("total_bytes") or d.get("total_bytes_estimate") or 0,
+        )
+        now = time.monotonic()
+        if d["status"] == "downloading" and now - self._journaled < 2:
+            return
+        self._journaled = now
+        streams = list(self._streams.values())
+        self._record(
+            "downloading",
+            temp=[stream[0] for stream in streams],
+            downloaded=sum(stream[1] for stream in streams),
+            total=sum(stream[2] for stream in streams),
+        )
+
+    def _postprocessor_hook(self, d: dict) -> None:
+        """
+        yt-dlp postprocessor hook that moves the job to post-processing when the first postprocessor starts.
+
+        Args:
+            d (dict): The yt-dlp postprocessor progress information.
+        """
+        if d["status"] == "started" and not self._postprocessing_started:
+            self._postprocessing_started = True
+            self._record("post-processing")
+
+    def _tune_hook(self, d: dict) -> None:
+        """
+        yt-dlp progress hook that feeds the autotuner and applies its fragment concurrency.
+
+        Fragment downloaders read the live params of the YoutubeDL instance that runs them, so
+        the next stream of the running download picks up the new concurrency.
+
+        Args:
+            d (dict): The yt-dlp progress information.
+        """
+        self._tuner.hook(d)
+        self._downloading.params["concurrent_fragment_downloads"] = self._tuner.concurrency
+
+    def _metrics_hook(self, d: dict) -> None:
+        """
+        yt-dlp progress hook that records the transfer of every stream as a span with its bytes and throughput.
+
+        Args:
+            d (dict): The yt-dlp progress information.
+        """
+        # streams found complete on disk are reported finished without an elapsed time
+        if d["status"] != "finished" or "elapsed" not in d:
+            return
+        size = d.get("total_bytes") or d.get("downloaded_bytes") or 0
+        self._transferred += size
+        metrics = job_metrics.shared()
+        metrics.count("downloaded_bytes", size)
+        metrics.record(
+            self.video_id,
+            "transfer",
+            d["elapsed"],
+            stream=os.path.basename(d.get("filename") or ""),
+            bytes=size,
+            throughput=size / d["elapsed"] if d["elapsed"] else None,
+        )
+
+    def _metrics_postprocessor_hook(self, d: dict) -> None:
+        """
+        yt-dlp postprocessor hook that records every postprocessor run (merge, embedding, single pass) as a span.
+
+        Args:
+            d (dict): The yt-dlp postprocessor progress information.
+        """
+        if d["status"] == "started":
+            self._postprocessors[d["postprocessor"]] = time.perf_counter()
+        elif d["status"] == "finished" and d["postprocessor"] in self._postprocessors:
+            job_metrics.shared().record(
+                self.video_id,
+                "postprocess",
+                time.perf_counter() - self._postprocessors.pop(d["postprocessor"]),
+                postprocessor=d["postprocessor"],
+            )
+
+    def download(self) -> None:
+        """
+        Downloads the video, reporting progress to the shared dashboard or, for interactive downloaders, to a dashboard of its own.
+
+        Concurrent downloads of the same video in the same format to the same place run once:
+        later callers wait for the first one and share its result instead of racing it for the
+        same output file.
+
+        With a pipeline, returns once the streams are downloaded; wait for self.postprocessing to
+        get the final file.
+        """
+        if self.archived:
+            return
+        key = (
+            "download",
+            self.video_id,
+            self.ydl_opts.get("format"),
+            self.ydl_opts.get("outtmpl"),
+        )
+        postprocessing = None
+        try:
+            postprocessing, shared = utils.singleflight.shared().do(key, self._download)
+        finally:
+            if postprocessing is None:
+                self._close()
+            else:
+                # the pipeline records the final file, so the connections stay open until then
+                postprocessing.add_done_callback(lambda _: self._close())
+        self.postprocessing = postprocessing
+        if shared and self.interactive:
+            Console().print(
+                "\n[bold green]✓[/bold green] [green]Downloaded by a concurrent job![/green]\n"
+            )
+
+    def _close(self) -> None:
+        """
+        Closes the archive and journal connections this downloader opened itself.
+
+        Shared connections stay open for the caller that passed them in, e.g. batch().
+        """
+        for store in self._owned:
+            store.close()
+        self._owned = []
+
+    def _download(self):
+        """
+        Runs the download for download().
+
+        Returns:
+            Future: The post-processing future with a pipeline, otherwise None.
+        """
+        import yt_dlp
+        from yt_dlp.utils import format_bytes
+
+        title = (self.video.title or "")[:50]
+        metrics = job_metrics.shared()
+        started = time.perf_counter()
+        status = "failed"
+        self._transferred = 0
+        self._postprocessors = {}
+        self._selector = self.ydl_opts.get("format")
+        resumed = self._resume_format()
+        if resumed:
+            self.ydl_opts["format"] = resumed
+        board = self.dashboard
+        if board is None and self.interactive:
+            board = progress_dashboard(self.progress)
+        try:
+            console = Console()
+            # a shared dashboard is drawn by its owner, e.g. batch()
+            with board if board is not self.dashboard else nullcontext():
+                # yt-dlp draws its own bar on stdout even when quiet, which would break the
+                # dashboard and the JSON progress lines
+                self.ydl_opts["noprogress"] = board is not None or not self.interactive
+                self.ydl_opts["progress_hooks"] = []
+                if board is not None:
+                    self.ydl_opts["progress_hooks"].append(
+                        board.hook(
+                            self.url,
+                            f"{title} ({self._quality}p)" if self._quality else title,
                         )
-                        if total_bytes:
-                            percentage = downloaded_bytes / total_bytes * 100
-                            progress.update(task, completed=percentage)
-                    elif d["status"] == "finished":
-                        progress.update(task, completed=100)
+                    )
+
+                if self._tuner:
+                    self.ydl_opts["concurrent_fragment_downloads"] = self._tuner.concurrency
+                    self.ydl_opts["progress_hooks"].append(self._tune_hook)
+
+                if self.cancel is not None:
+
+                    def cancel_hook(d):
+                        if self.cancel.is_set():
+                            raise yt_dlp.utils.DownloadCancelled("Download cancelled")
 
-                self.ydl_opts["progress_hooks"] = [progress_hook]
+                    self.ydl_opts["progress_hooks"].append(cancel_hook)
 
+                # cheap while no limit is configured, and follows limits set while running
+                self.ydl_opts["progress_hooks"].append(
+                    utils.throttle.shared().hook(self.url, self.priority)
+                )
+                self.ydl_opts["progress_hooks"].append(self._metrics_hook)
+                self.ydl_opts["postprocessor_hooks"] = [
+                    self._metrics_postprocessor_hook,
+                    self._format_hook,
+                ]
+                if self._journal:
+                    self._streams = {}
+                    self._journaled = 0.0
+                    self._postprocessing_started = False
+                    self.ydl_opts["progress_hooks"].append(self._journal_hook)
+                    self.ydl_opts["postprocessor_hooks"].append(self._postprocessor_hook)
+                if resumed and self.interactive:
+                    board.console.print(
+                        f"[bold cyan]↻[/bold cyan] [cyan]Resuming the interrupted download ({resumed})...[/cyan]"
+                    )
+                elif self.interactive and self.estimate:
+                    board.console.print(
+                        f"[cyan]Estimated download size: ~{format_bytes(self.estimate)}[/cyan]"
+                    )
+
+                self.ydl_opts["post_hooks"] = [self._keep]
                 with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                    ydl.download([self.url])
+                    self._downloading = ydl
+                    # a stale fallback extraction needs the player too
+                    self._components(ydl)
+                    # unfinished .part files are resumed by the next attempt
+                    self._retry.call(self._process, ydl, host=self._host())
 
-            console.print(
-                f"\n[bold green]✓[/bold green] [green]Download completed successfully![/green]\n"
-            )
+            status = "done"
+            if self.interactive:
+                console.print(
+                    f"\n[bold green]✓[/bold green] [green]Download completed successfully![/green]\n"
+                )
+            return self.postprocessing
         except yt_dlp.utils.DownloadError as e:
+            self._record("failed", error=str(e))
+            if not self.interactive:
+                raise utils.JobError(
+                    str(e), retryable=utils.retry.retryable(e), host=self._host()
+                ) from e
             sys.exit(1)
         except KeyboardInterrupt or UnboundLocalError:
             console.print(
                 "\n\n[bold bright_green]Operation cancelled by user.[bold bright_green]Goodbye...! 👋[/bold bright_green]\n"
             )
             sys.exit(1)
+        except yt_dlp.utils.DownloadCancelled:
+            status = "cancelled"
+            self._record("cancelled")
+            raise
+        except Exception as e:
+            # e.g. a JobError of a copy-only download or a failed post-processing step
+            self._record("failed", error=str(e))
+            raise
+        finally:
+            utils.throttle.shared().leave(self.url)
+            elapsed = time.perf_counter() - started
+            metrics.count("jobs", status=status)
+            if self._retry.retried:
+                metrics.count("retries", self._retry.retried)
+            metrics.emit(
+                {
+                    "event": "job",
+                    "job": self.video_id,
+                    "status": status,
+                    "seconds": elapsed,
+                    "bytes": self._transferred,
+                    "throughput": self._transferred / elapsed if elapsed else None,
+                    "retries": self._retry.retried,
+                }
+            )
 
 
-def main(url=None, cookie=None, quality=None, subtitle=None, output=None):
+@contextmanager
+def _extractor(opts: dict):
+    """
+    Lends an idle YoutubeDL instance created with the same options, or a new one.
+
+    Instances are never shared by two extractions at once and are kept after use, so warm
+    downloaders reuse their HTTP connections and the extractors' player caches.
+
+    Args:
+        opts (dict): The YoutubeDL options.
+
+    Yields:
+        yt_dlp.YoutubeDL: The instance.
+    """
+    import yt_dlp
+
+    key = json.dumps(opts, sort_keys=True, default=str)
+    with _warm_lock:
+        idle = _warm.get(key)
+        ydl = idle.pop() if idle else None
+    if ydl is None:
+        ydl = yt_dlp.YoutubeDL(opts)
+    try:
+        yield ydl
+    finally:
+        with _warm_lock:
+            _warm.setdefault(key, []).append(ydl)
+
+
+def main(
+    url=None,
+    cookie=None,
+    quality=None,
+    subtitle=None,
+    output=None,
+    **options,
+):
     dd = downloader(
         url=url,
         cookie=cookie,
         quality=quality,
         subtitle=subtitle,
         output=output,
+        **options,
     )
     dd.download()
     return
 
 
+def entries(url: str, cookie: str = None, since: dict = None):
+    """
+    Lazily enumerates the videos of a playlist or channel.
+
+    The listing is extracted flat and unprocessed, so yt-dlp fetches one page of entries at a
+    time as the generator is consumed instead of resolving every video up front. Nested
+    listings, such as the tabs of a channel, are followed in order.
+
+    Args:
+        url (str): The playlist or channel URL.
+        cookie (str, optional): Path to a cookie file. Defaults to None.
+        since (dict, optional): A high-water mark with video_id and upload_date. Enumeration stops at the marked video or at the first older one, so only newer videos are yielded from a newest-first listing. Defaults to None.
+
+    Yields:
+        dict: The flat entry of every video, with at least its 'id', as soon as its page of the listing is fetched.
+    """
+    import yt_dlp
+
+    ydl_opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "extract_flat": "in_playlist",
+        "lazy_playlist": True,
+    }
+    if cookie and os.path.isfile(cookie):
+        ydl_opts["cookiefile"] = cookie
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        for entry in _entries(ydl, url):
+            if since:
+                upload_date = _upload_date(entry)
+                if entry["id"] == since["video_id"] or (
+                    upload_date
+                    and since.get("upload_date")
+                    and upload_date < since["upload_date"]
+                ):
+                    return
+            yield entry
+
+
+def _entries(ydl, url: str, ie_key: str = None):
+    """
+    Yields the video entries of a listing extracted with entries().
+
+    Args:
+        ydl (yt_dlp.YoutubeDL): The YoutubeDL instance configured for flat extraction.
+        url (str): The listing or video URL.
+        ie_key (str, optional): The extractor to use. Defaults to None.
+
+    Yields:
+        dict: The flat entry of every video.
+    """
+    info = ydl.extract_info(url, download=False, ie_key=ie_key, process=False)
+    # channel URLs without a tab redirect to their videos tab
+    while info.get("_type") in ("url", "url_transparent") and info.get("ie_key") != "Youtube":
+        info = ydl.extract_info(
+            info["url"], download=False, ie_key=info.get("ie_key"), process=False
+        )
+    if info.get("_type") not in ("playlist", "multi_video"):
+        if info.get("id"):
+            yield info
+        return
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        if entry.get("ie_key") == "Youtube" or (
+            entry.get("_type") != "playlist" and utils.recognizer.video_id(entry.get("url"))
+        ):
+            yield entry
+        elif entry.get("url"):
+            yield from _entries(ydl, entry["url"], entry.get("ie_key"))
+
+
+def _upload_date(entry: dict) -> optional[str]:
+    """
+    Returns the upload date of a flat entry as YYYYMMDD, if the listing provides one.
+
+    Args:
+        entry (dict): The flat entry.
+
+    Returns:
+        str: The upload date, or None if unknown.
+    """
+    if entry.get("upload_date"):
+        return entry["upload_date"]
+    timestamp = entry.get("timestamp") or entry.get("release_timestamp")
+    return time.strftime("%Y%m%d", time.gmtime(timestamp)) if timestamp else None
+
+
+def _newest_first(url: str) -> bool:
+    """
+    Checks whether a listing is ordered newest first, so a sync may stop at its mark.
+
+    Channels and their uploads playlists ('list=UU...') are; other playlists are ordered by
+    hand and new videos may appear anywhere.
+
+    Args:
+        url (str): The playlist or channel URL.
+
+    Returns:
+        bool: True if the listing is ordered newest first.
+    """
+    match = re.search(r"[?&]list=([\w-]+)", url)
+    return match is None or match.group(1).startswith("UU")
+
+
+def _expand(urls, cookie: str = None, marks=None):
+    """
+    Turns batch input lines into a stream of unique video URLs.
+
+    Blank lines and lines starting with '#' are ignored, playlists and channels are enumerated
+    lazily with entries(), and every video is yielded once under its canonical URL, so
+    shorts, embed and watch links of the same video are one job. With sync marks, newest-first
+    listings are only enumerated down to their mark.
+
+    Every video found in a playlist or channel comes with its source: a dict with the listing
+    'url', its 'newest' entry, the number of its videos still 'pending', and whether its
+    enumeration is 'complete' or any of its videos 'failed'. batch() uses it to move the mark.
+
+    Args:
+        urls (Iterable[str]): The input lines.
+        cookie (str, optional): Path to a cookie file for playlist enumeration. Defaults to None.
+        marks (archive.marks, optional): The sync marks. Defaults to None.
+
+    Yields:
+        tuple[str, str, dict]: The URL, None and its source (None for single videos), or the playlist URL, the error and None if enumerating it failed.
+    """
+    import yt_dlp
+
+    seen = set()
+    for line in urls:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if not utils.recognizer.playlist(line):
+            match = utils.router.canonicalize(line)
+            # unsupported lines still become jobs, which fail with the downloader's LinkError
+            url = utils.router.canonical(*match) if match else line
+            if url not in seen:
+                seen.add(url)
+                yield url, None, None
+            continue
+        source = {
+            "url": line,
+            "newest": None,
+            "pending": 0,
+            "complete": False,
+            "failed": False,
+        }
+        since = marks.get(line) if marks and _newest_first(line) else None
+        try:
+            for entry in entries(line, cookie, since):
+                source["newest"] = source["newest"] or entry
+                url = f"https://www.youtube.com/watch?v={entry['id']}"
+                if url not in seen:
+                    seen.add(url)
+                    source["pending"] += 1
+                    yield url, None, source
+            source["complete"] = True
+        except (yt_dlp.utils.DownloadError, yt_dlp.utils.ExtractorError) as e:
+            yield line, str(e), None
+
+
+def _limit(rate: float, windows: list) -> None:
+    """
+    Configures the bandwidth limiter of a batch worker process.
+
+    Args:
+        rate (float): The default limit in bytes per second, or None for no limit.
+        windows (list): The time windows as (start minute, end minute, rate) tuples.
+    """
+    utils.throttle.shared().configure(rate, windows)
+
+
+def _job(url: str, options: dict) -> dict:
+    """
+    Runs a single non-interactive download. This is the unit of work of batch().
+
+    Args:
+        url (str): The YouTube video URL to download.
+        options (dict): Keyword arguments forwarded to the downloader class.
+
+    Returns:
+        dict: The job status with the url, title, status ("done", "skipped", "failed" or "postprocessing"), error, whether the failure is worth retrying and elapsed seconds. Jobs handed to a pipeline also carry the future of their post-processing in 'postprocessing'.
+    """
+    started = time.monotonic()
+    result = {
+        "url": url,
+        "title": None,
+        "status": "failed",
+        "error": None,
+        "retryable": False,
+    }
+    try:
+        dd = downloader(url=url, interactive=False, **options)
+        if dd.archived:
+            result["title"] = os.path.basename(dd.archived["path"])
+            result["status"] = "skipped"
+        else:
+            result["title"] = dd._info["title"]
+            dd.download()
+            if dd.postprocessing:
+                result["status"] = "postprocessing"
+                result["postprocessing"] = dd.postprocessing
+            else:
+                result["status"] = "done"
+    except utils.JobError as e:
+        result["error"] = str(e)
+        result["retryable"] = e.retryable
+    except SystemExit as e:
+        result["error"] = f"exited with status {e.code}"
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    result["elapsed"] = time.monotonic() - started
+    return result
+
+
+def batch(
+    urls,
+    cookie: str = None,
+    quality: str = None,
+    subtitle: list[str] = None,
+    output: str = None,
+    workers: int = 4,
+    executor: str = "thread",
+    archive: bool = True,
+    postprocess_workers: int = None,
+    disk_budget: str = None,
+    progress: str = "auto",
+    sync: bool = False,
+    **options,
+) -> list[dict]:
+    """
+    Downloads many videos concurrently through a bounded worker pool.
+
+    Blank lines and lines starting with '#' are ignored, and every video is downloaded once,
+    whichever form of its URL is given. Playlist and channel URLs are enumerated lazily and their videos are queued as they are
+    discovered, so the first download starts after the first page of the listing. Every job
+    runs a non-interactive downloader, so the quality is capped to the best available height at
+    or below the requested one and subtitles are only fetched when requested.
+
+    With the thread executor, the final ffmpeg pass of every job runs on a separate
+    post-processing pipeline, so the download workers move on to the next video while the
+    previous one is merged. Workers wait before downloading while the streams waiting for
+    post-processing exceed the disk budget.
+
+    With sync, the newest video of every playlist and channel is stored as its high-water
+    mark once all of its new videos are kept, and the next sync only enumerates newest-first
+    listings down to that mark, so a channel without new uploads costs a single page request.
+
+    All workers share the process-wide bandwidth limit of utils.throttle, split evenly
+    between the running downloads (and between the worker processes of the process executor).
+
+    Every job is recorded in the job journal as it is queued, extracted, downloaded and
+    post-processed, so running the same batch again after a crash continues interrupted
+    downloads with the format they had chosen instead of starting over.
+
+    Progress of all jobs is shown on one shared dashboard: a live table with per-job and
+    aggregate throughput and ETA on a terminal, or a periodic status line or JSON events
+    when the output is redirected.
+
+    Args:
+        urls (Iterable[str]): The YouTube video, playlist or channel URLs to download, e.g. an open file or sys.stdin.
+        cookie (str, optional): Path to a cookie file or supported browser name. Defaults to None.
+        quality (str, optional): Maximum video quality in pixels (e.g., "720"). Defaults to None.
+        subtitle (list[str], optional): List of language codes for preferred subtitles. Defaults to None.
+        output (str, optional): Output directory path for downloaded videos. Defaults to None.
+        workers (int, optional): Number of concurrent jobs. Defaults to 4.
+        executor (str, optional): "thread" or "process" worker pool. Defaults to "thread".
+        archive (bool, optional): Whether to skip videos recorded in the download archive without starting a job. Defaults to True.
+        postprocess_workers (int, optional): Number of concurrent post-processing jobs. Defaults to half the CPU count.
+        disk_budget (str, optional): Maximum size of downloaded streams waiting for post-processing (e.g., "20G"). Defaults to no limit.
+        progress (str, optional): "auto", "rich", "plain", "json" or "none". Defaults to "auto".
+        sync (bool, optional): Whether to enumerate playlists and channels only down to their high-water mark and move it after a successful run. Defaults to False.
+        **options: Extra keyword arguments forwarded to every downloader (e.g., cache, refresh, journal).
+
+    Returns:
+        list[dict]: The status of every job in completion order.
+    """
+    from rich.table import Table
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    marks = None
+    if sync:
+        try:
+            marks = sync_marks()
+        except sqlite3.Error:
+            marks = None
+    queue = _expand(urls, cookie, marks)
+    # sources of the videos found in playlists and channels, by video and by listing URL
+    origin, sources = {}, {}
+    results = []
+    # one indexed lookup per URL, so already kept videos never reach the worker pool
+    # clips are neither skipped as kept videos nor journaled, see downloader
+    clipped = (
+        options.get("start") is not None
+        or options.get("end") is not None
+        or bool(options.get("chapter"))
+    )
+    kept = None
+    if archive and not clipped:
+        try:
+            kept = download_archive()
+        except sqlite3.Error:
+            kept = None
+    # queued and failed jobs are journaled here, every other state by the downloader
+    journal = None
+    if options.get("journal", True) and not clipped:
+        try:
+            journal = job_journal()
+        except sqlite3.Error:
+            journal = None
+    options = {
+        "cookie": cookie,
+        "quality": quality,
+        "subtitle": subtitle,
+        "output": output,
+        "archive": archive,
+        **options,
+    }
+    post = None
+    if executor != "process":
+        # futures can not cross process boundaries, so process workers post-process inline
+        from yt_dlp.utils import parse_bytes
+
+        post = postprocess_pipeline(
+            workers=postprocess_workers,
+            budget=parse_bytes(disk_budget) if disk_budget else None,
+        )
+        options["pipeline"] = post
+        # thread workers share the archive and journal connections instead of opening their own
+        options["archive"], options["journal"] = kept, journal
+    board = progress_dashboard(progress)
+    if executor != "process":
+        options["dashboard"] = board
+    pool = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    pool_options = {}
+    limiter = utils.throttle.shared()
+    if executor == "process" and limiter.limited:
+        # every worker process has a limiter of its own, so each gets an equal part
+        parts = max(1, workers)
+        pool_options = {
+            "initializer": _limit,
+            "initargs": (
+                limiter.default / parts if limiter.default else None,
+                [
+                    (start, end, rate / parts if rate else None)
+                    for start, end, rate in limiter.windows
+                ],
+            ),
+        }
+    console = board.console
+    started = time.monotonic()
+    discovered = 0
+
+    def report(result: dict) -> None:
+        results.append(result)
+        source = origin.pop(result["url"], None)
+        if source and result["status"] in ("done", "skipped"):
+            source["pending"] -= 1
+        elif source:
+            source["failed"] = True
+        if journal and result["status"] == "failed" and result["error"]:
+            video_id = utils.recognizer.video_id(result["url"])
+            if video_id:
+                journal.update("youtube", video_id, "failed", error=result["error"])
+        board.finish(result["url"], result["status"])
+        if board.mode == "json":
+            board.event({"event": "job", **result})
+        elif result["status"] == "skipped":
+            console.print(
+                f"[bold bright_blue]↷[/bold bright_blue] [dim][{len(results)}/{discovered}][/dim] [bright_blue]{result['title']}[/bright_blue] [dim](already downloaded)[/dim]"
+            )
+        elif result["status"] == "done":
+            console.print(
+                f"[bold green]✓[/bold green] [dim][{len(results)}/{discovered}][/dim] [green]{result['title']}[/green] [dim]({result['elapsed']:.1f}s)[/dim]"
+            )
+        else:
+            console.print(
+                f"[bold red]❌[/bold red] [dim][{len(results)}/{discovered}][/dim] [yellow]{result['url']}[/yellow] [red]{result['error']}[/red]"
+            )
+
+    with board, pool(max_workers=max(1, workers), **pool_options) as jobs:
+        running = set()
+        # post-processing futures mapped to their job status and hand-over time
+        building = {}
+
+        # submits discovered URLs until twice the worker count is queued, so playlists
+        # are enumerated only as fast as they are downloaded
+        def feed() -> None:
+            nonlocal discovered
+            while len(running) - len(building) < max(1, workers) * 2:
+                item = next(queue, None)
+                if item is None:
+                    return
+                url, error, source = item
+                if source:
+                    origin[url] = source
+                    sources[source["url"]] = source
+                discovered += 1
+                board.total = discovered
+                video_id = utils.recognizer.video_id(url)
+                record = kept.get("youtube", video_id) if kept and not error else None
+                if record and options.get("verify") and not kept.verify("youtube", video_id):
+                    record = None
+                if error or record:
+                    report(
+                        {
+                            "url": url,
+                            "title": os.path.basename(record["path"]) if record else None,
+                            "status": "skipped" if record else "failed",
+                            "error": error,
+                            "retryable": False,
+                            "elapsed": 0.0,
+                        }
+                    )
+                    continue
+                if journal and video_id:
+                    journal.update("youtube", video_id, "queued", url=url)
+                running.add(jobs.submit(_job, url, options))
+
+        try:
+            feed()
+            while running:
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in building:
+                        result, handed_over = building.pop(future)
+                        error = future.exception()
+                        result["status"] = "failed" if error else "done"
+                        result["error"] = (str(error) or type(error).__name__) if error else None
+                        result["elapsed"] += time.monotonic() - handed_over
+                        report(result)
+                        continue
+                    result = future.result()
+                    if result["status"] == "postprocessing":
+                        building_future = result.pop("postprocessing")
+                        building[building_future] = (result, time.monotonic())
+                        running.add(building_future)
+                        board.phase(result["url"], "merging")
+                        continue
+                    report(result)
+                feed()
+        except KeyboardInterrupt:
+            jobs.shutdown(wait=False, cancel_futures=True)
+            if post:
+                post.shutdown(wait=False, cancel_futures=True)
+            console.print(
+                "\n\n[bold bright_green]Operation cancelled by user.[/bold bright_green] Waiting for running jobs to finish...\n"
+            )
+    if post:
+        post.shutdown()
+    if kept:
+        kept.close()
+    if journal:
+        journal.close()
+    if marks:
+        # a mark only moves once every new video of its listing is kept
+        for source in sources.values():
+            if (
+                source["complete"]
+                and not source["failed"]
+                and not source["pending"]
+                and source["newest"]
+            ):
+                marks.put(
+                    source["url"],
+                    source["newest"]["id"],
+                    _upload_date(source["newest"]),
+                )
+        marks.close()
+
+    done = sum(1 for result in results if result["status"] == "done")
+    skipped = sum(1 for result in results if result["status"] == "skipped")
+    if board.mode == "json":
+        board.event(
+            {
+                "event": "summary",
+                "jobs": discovered,
+                "done": done,
+                "skipped": skipped,
+                "failed": len(results) - done - skipped,
+                "not_run": discovered - len(results),
+                "elapsed": time.monotonic() - started,
+            }
+        )
+        return results
+    summary = Table(title="Batch summary", show_header=False)
+    summary.add_row("Jobs", str(discovered))
+    summary.add_row("[green]Done[/green]", str(done))
+    summary.add_row("[bright_blue]Skipped[/bright_blue]", str(skipped))
+    summary.add_row("[red]Failed[/red]", str(len(results) - done - skipped))
+    summary.add_row("[dim]Not run[/dim]", str(discovered - len(results)))
+    summary.add_row("Elapsed", f"{time.monotonic() - started:.1f}s")
+    console.print()
+    console.print(summary)
+    return results
+
+
 if __name__ == "__main__":
     main()